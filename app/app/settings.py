@@ -37,14 +37,18 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'core',
     'users',
     'recipe',
+    'benchmark',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,14 +81,71 @@ WSGI_APPLICATION = 'app.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/2.1/ref/settings/#databases
+# The core.db backend keeps the connections for DB_CONN_MAX_AGE seconds
+# (0 closes them after each request, 'none' never does) and, with
+# DB_HEALTH_CHECKS, checks a kept connection works before a request uses
+# it. DB_POOL_SIZE > 0 shares that many idle connections between the
+# threads of a process, for servers starting a thread per request.
+
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '60')
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': (
+            None if DB_CONN_MAX_AGE.lower() == 'none'
+            else int(DB_CONN_MAX_AGE)
+        ),
+        'HEALTH_CHECKS': os.environ.get('DB_HEALTH_CHECKS', '1') == '1',
+        'POOL_SIZE': int(os.environ.get('DB_POOL_SIZE', 0)),
+    }
+}
+
+# Read replicas of the default database, as comma separated hosts with an
+# optional weight, e.g. DB_REPLICAS=replica-a=3,replica-b. The reads of
+# GET/HEAD/OPTIONS API requests are spread across them (see
+# core.db.routers) except for the users who made an unsafe request in the
+# last DB_REPLICA_PIN_SECONDS, their reads stay on the primary. The pins are
+# kept in the DB_REPLICA_PIN_CACHE cache, which must be shared by the
+# processes (not the local memory default), the start fails otherwise.
+DB_REPLICAS = [
+    replica.partition('=')
+    for replica in os.environ.get('DB_REPLICAS', '').split(',') if replica
+]
+DATABASE_REPLICAS = {
+    f'replica{number}': int(weight or 1)
+    for number, (host, _, weight) in enumerate(DB_REPLICAS, 1)
+}
+DATABASES.update({
+    f'replica{number}': {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+    for number, (host, _, weight) in enumerate(DB_REPLICAS, 1)
+})
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 10))
+REPLICA_PIN_CACHE = os.environ.get('DB_REPLICA_PIN_CACHE', 'default')
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+# The default local memory cache is per process, point CACHE_BACKEND and
+# CACHE_LOCATION at a shared cache (e.g. memcached) to enable the token and
+# recipe caches, invalidations then reach all the workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -131,4 +192,118 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Uploads are streamed to temporary files in this directory, keep it on the
+# MEDIA_ROOT filesystem so saving them is a rename rather than a copy
+FILE_UPLOAD_TEMP_DIR = os.environ.get('FILE_UPLOAD_TEMP_DIR')
+FILE_UPLOAD_PERMISSIONS = 0o644
+
 AUTH_USER_MODEL = 'core.User'
+
+# Cache alias and lifetime (in seconds) of the token -> user resolutions
+# done by users.authentication.CachedTokenAuthentication, only used when the
+# cache is shared by the processes (see core.caching) so that revoking a
+# token reaches all of them
+TOKEN_AUTH_CACHE = os.environ.get('TOKEN_AUTH_CACHE', 'default')
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 300))
+
+# Cache alias and lifetime (in seconds) of the serialized recipes kept by
+# recipe.cache, invalidated by the signals in recipe.signals. The versions
+# the ETags derive from live there too, neither is used unless the cache is
+# shared by the processes (see core.caching)
+RECIPE_CACHE = os.environ.get('RECIPE_CACHE', 'default')
+RECIPE_CACHE_TTL = int(os.environ.get('RECIPE_CACHE_TTL', 3600))
+
+# Resized copies generated for the uploaded recipe images by recipe.images:
+# the longest side in pixels and the formats each size is encoded to.
+# They are built by RECIPE_IMAGE_WORKERS threads, 0 builds them inline.
+RECIPE_IMAGE_VARIANT_SIZES = (128, 512, 1024)
+RECIPE_IMAGE_VARIANT_FORMATS = ('JPEG', 'WEBP')
+RECIPE_IMAGE_WORKERS = int(os.environ.get('RECIPE_IMAGE_WORKERS', 2))
+
+# Largest recipe image accepted by recipe.uploads, in bytes and in pixels
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.environ.get('RECIPE_IMAGE_MAX_BYTES', 20 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 50 * 1000 * 1000)
+)
+
+# Cursor pagination of the list endpoints, clients can ask for up to
+# API_MAX_PAGE_SIZE items per page with the `page_size` parameter
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 100))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+
+# Recipes read (and tags and ingredients looked up) at a time by the
+# streaming export of recipe.export
+RECIPE_EXPORT_CHUNK_SIZE = int(
+    os.environ.get('RECIPE_EXPORT_CHUNK_SIZE', 2000)
+)
+
+# Recipes validated and created per transaction by the imports of
+# recipe.importer, the import endpoint reports the errors of the first
+# RECIPE_IMPORT_MAX_ERRORS invalid rows
+RECIPE_IMPORT_CHUNK_SIZE = int(
+    os.environ.get('RECIPE_IMPORT_CHUNK_SIZE', 1000)
+)
+RECIPE_IMPORT_MAX_ERRORS = int(
+    os.environ.get('RECIPE_IMPORT_MAX_ERRORS', 1000)
+)
+
+# JSON renderer and parser of the API, API_JSON_BACKEND=orjson uses the
+# faster classes in core.renderers and core.parsers, stdlib uses DRF's own
+API_JSON_BACKEND = os.environ.get('API_JSON_BACKEND', 'orjson')
+API_JSON_CLASSES = {
+    'orjson': ('core.renderers.ORJSONRenderer', 'core.parsers.ORJSONParser'),
+    'stdlib': (
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.parsers.JSONParser'
+    ),
+}
+API_JSON_RENDERER, API_JSON_PARSER = API_JSON_CLASSES[API_JSON_BACKEND]
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        API_JSON_RENDERER,
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        API_JSON_PARSER,
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
+
+# Warm up (see core.warmup) the WSGI application when it is loaded, before
+# it serves the first request, and hand a connection to each pool of the
+# databases with a DB_POOL_SIZE. Off by default, leave it off with servers
+# loading the application before forking (e.g. gunicorn --preload).
+WARM_UP_ON_START = os.environ.get('WARM_UP_ON_START', '0') == '1'
+
+# Share of the requests (0 to 1) core.middleware.ServerTimingMiddleware
+# times, 0 removes the middleware. The timings of a sampled request are
+# logged by the core.middleware logger and, with SERVER_TIMING_HEADER, sent
+# back in a Server-Timing header.
+SERVER_TIMING_SAMPLE_RATE = float(
+    os.environ.get('SERVER_TIMING_SAMPLE_RATE', 0)
+)
+SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', '1') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.warmup': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.middleware': {
+            'handlers': ['console'],
+            'level': os.environ.get('SERVER_TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
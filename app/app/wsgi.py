@@ -9,8 +9,21 @@ https://docs.djangoproject.com/en/2.1/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+# load what the first requests would otherwise wait for, the apps have to
+# be set up first. A failure only costs the first requests some time. The
+# connection pools are filled here, in each worker importing this module,
+# which rules out servers loading the application before forking.
+if settings.WARM_UP_ON_START:
+    from core import warmup
+    try:
+        warmup.warm_up()
+        warmup.fill_pools()
+    except Exception:
+        warmup.logger.exception('Warm-up failed')
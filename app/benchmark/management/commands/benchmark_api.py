@@ -0,0 +1,158 @@
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Recipe
+from benchmark import runner, seed
+from benchmark.scenarios import SCENARIOS, RunState
+
+
+class Command(BaseCommand):
+    """Django command to measure the latency and throughput of the API"""
+    help = 'Seed data, load every API route concurrently and report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--recipes', type=int, default=200,
+                            help='Recipes per user')
+        parser.add_argument('--tags', type=int, default=20,
+                            help='Tags per user')
+        parser.add_argument('--ingredients', type=int, default=50,
+                            help='Ingredients per user')
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--only', help='Comma separated scenarios')
+        # the requests are made against this host, it has to be one of the
+        # ALLOWED_HOSTS
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--output', help='Write the results to a file')
+        parser.add_argument('--baseline',
+                            help='Compare with the results of a file')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the seeded data')
+
+    def handle(self, *args, **options):
+        scenarios = self.get_scenarios(options['only'])
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)['results']
+
+        run = uuid.uuid4().hex[:8]
+        rng = random.Random(options['seed'])
+        try:
+            start = time.perf_counter()
+            actors = seed.seed(
+                run,
+                rng,
+                users=options['users'],
+                recipes=options['recipes'],
+                tags=options['tags'],
+                ingredients=options['ingredients'],
+                tags_per_recipe=options['tags_per_recipe'],
+                ingredients_per_recipe=options['ingredients_per_recipe']
+            )
+            state = RunState(
+                run,
+                self.create_disposable(actors, options['requests'])
+            )
+            self.stdout.write(
+                f'Seeded {len(actors)} users in '
+                f'{time.perf_counter() - start:.1f}s'
+            )
+
+            results = {}
+            for scenario in scenarios:
+                samples, elapsed = runner.run_scenario(
+                    scenario,
+                    actors,
+                    state,
+                    requests=options['requests'],
+                    concurrency=options['concurrency'],
+                    host=options['host'],
+                    seed=options['seed']
+                )
+                results[scenario.name] = runner.summarize(samples, elapsed)
+                self.report(scenario.name, results[scenario.name])
+        finally:
+            if not options['keep']:
+                seed.cleanup(run)
+
+        if baseline is not None:
+            self.report_changes(runner.compare(results, baseline))
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({
+                    'run': run,
+                    'finished': datetime.now(timezone.utc).isoformat(),
+                    'options': {
+                        name: value for name, value in options.items()
+                        if name not in ('stdout', 'stderr')
+                        and isinstance(value, (int, str, type(None)))
+                    },
+                    'results': results,
+                }, output, indent=2)
+
+    def get_scenarios(self, only):
+        """Return the scenarios to run, all of them by default"""
+        if not only:
+            return SCENARIOS
+
+        names = only.split(',')
+        unknown = set(names) - {scenario.name for scenario in SCENARIOS}
+        if unknown:
+            raise CommandError(
+                f'Unknown scenarios: {", ".join(sorted(unknown))}'
+            )
+
+        return [scenario for scenario in SCENARIOS if scenario.name in names]
+
+    def create_disposable(self, actors, count):
+        """Create the recipes the destroy scenario deletes"""
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                user_id=actors[i % len(actors)].user_id,
+                title='Disposable recipe',
+                time_minutes=10,
+                price=Decimal('5.00')
+            ) for i in range(count)
+        )
+
+        return [
+            (actors[i % len(actors)], recipe.pk)
+            for i, recipe in enumerate(recipes)
+        ]
+
+    def report(self, name, stats):
+        """Write the statistics of a scenario"""
+        line = (
+            f'{name:<24} {stats["rps"] or 0:>8.1f} req/s '
+            f'p50 {stats["p50_ms"] or 0:>8.2f} ms '
+            f'p95 {stats["p95_ms"] or 0:>8.2f} ms '
+            f'p99 {stats["p99_ms"] or 0:>8.2f} ms '
+            f'{stats["queries_per_request"] or 0:>6.1f} queries/req'
+        )
+        if stats['errors']:
+            self.stdout.write(self.style.ERROR(
+                f'{line} {stats["errors"]} errors'
+            ))
+        else:
+            self.stdout.write(line)
+
+    def report_changes(self, changes):
+        """Write the changes against the baseline"""
+        self.stdout.write('Change against the baseline:')
+        for name, change in changes.items():
+            self.stdout.write(f'{name:<24} ' + ' '.join(
+                f'{key} {value:+.1f}%' for key, value in change.items()
+            ))
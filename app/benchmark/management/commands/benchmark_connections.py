@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from benchmark import runner
+from core.db import pool
+from core.db.backends.postgresql.base import DatabaseWrapper
+
+# Connection settings compared, on top of the configured database's
+MODES = (
+    ('close', {'CONN_MAX_AGE': 0, 'HEALTH_CHECKS': False, 'POOL_SIZE': 0}),
+    ('persistent', {
+        'CONN_MAX_AGE': 600, 'HEALTH_CHECKS': True, 'POOL_SIZE': 0,
+    }),
+    ('pool', {'CONN_MAX_AGE': 600, 'HEALTH_CHECKS': True}),
+)
+
+
+def handle_request(wrapper):
+    """Do what a request does with its connection: check it when the
+    request starts, run a query and check it again when the request ends.
+    Return the latency and the server process the query ran on."""
+    start = time.perf_counter()
+    wrapper.close_if_unusable_or_obsolete()
+    with wrapper.cursor() as cursor:
+        cursor.execute('SELECT pg_backend_pid()')
+        pid = cursor.fetchone()[0]
+    wrapper.close_if_unusable_or_obsolete()
+
+    return time.perf_counter() - start, pid
+
+
+class Command(BaseCommand):
+    """Django command to measure what reusing the connections saves"""
+    help = 'Time requests closing, keeping and pooling their connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--thread-per-request', action='store_true',
+                            help='Serve each request from a new thread, '
+                                 'like runserver does')
+        parser.add_argument('--output', help='Write the results to a file')
+
+    def handle(self, *args, **options):
+        settings_dict = connections[options['database']].settings_dict
+        results = {}
+        for name, mode in MODES:
+            results[name] = self.run_mode(
+                {
+                    **settings_dict,
+                    'POOL_SIZE': options['concurrency'],
+                    **mode,
+                },
+                options
+            )
+            self.report(name, results[name])
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({'results': results}, output, indent=2)
+
+    def run_mode(self, settings_dict, options):
+        """Send the requests with the connection settings, return their
+        statistics"""
+        samples = []
+        lock = threading.Lock()
+
+        def worker(index):
+            wrapper = None
+            measured = []
+            for _ in range(index, options['requests'], options['concurrency']):
+                if wrapper is None or options['thread_per_request']:
+                    # the connection of a thread goes away with it, the
+                    # next one starts without any
+                    if wrapper is not None:
+                        wrapper.close()
+                    wrapper = DatabaseWrapper(
+                        settings_dict,
+                        options['database']
+                    )
+                measured.append(handle_request(wrapper))
+            if wrapper is not None:
+                wrapper.close()
+            with lock:
+                samples.extend(measured)
+
+        start = time.perf_counter()
+        runner.run_threads(worker, options['concurrency'])
+        elapsed = time.perf_counter() - start
+        pool.clear_pools()
+
+        latencies = sorted(latency for latency, _ in samples)
+        return {
+            'requests': len(samples),
+            'rps': round(len(samples) / elapsed, 2) if elapsed else None,
+            'p50_ms': runner.ms(runner.percentile(latencies, 50)),
+            'p95_ms': runner.ms(runner.percentile(latencies, 95)),
+            'p99_ms': runner.ms(runner.percentile(latencies, 99)),
+            'connections': len({pid for _, pid in samples}),
+        }
+
+    def report(self, name, stats):
+        """Write the statistics of a mode"""
+        self.stdout.write(
+            f'{name:<12} {stats["rps"] or 0:>9.1f} req/s '
+            f'p50 {stats["p50_ms"] or 0:>7.2f} ms '
+            f'p95 {stats["p95_ms"] or 0:>7.2f} ms '
+            f'p99 {stats["p99_ms"] or 0:>7.2f} ms '
+            f'{stats["connections"]:>6} connections opened'
+        )
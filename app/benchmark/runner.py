@@ -0,0 +1,143 @@
+import json
+import math
+import random
+import threading
+import time
+
+from django.db import connection
+from django.test import Client
+
+
+class QueryCounter:
+    """Count the SQL statements run by a database connection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, percent):
+    """Return the nearest rank percentile of the sorted values"""
+    if not values:
+        return None
+
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def send(client, request):
+    """Send a scenario request through the WSGI client"""
+    extra = {}
+    if request.token:
+        extra['HTTP_AUTHORIZATION'] = f'Token {request.token}'
+
+    if request.content_type:
+        return client.generic(
+            request.method.upper(),
+            request.path,
+            json.dumps(request.data),
+            request.content_type,
+            **extra
+        )
+
+    return getattr(client, request.method)(request.path, request.data, **extra)
+
+
+def run_scenario(scenario, actors, state, requests, concurrency, host, seed):
+    """Send `requests` requests of the scenario from `concurrency` threads,
+    return their latencies, query counts and status codes"""
+    samples = []
+    lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(f'{seed}-{scenario.name}-{index}')
+        client = Client(HTTP_HOST=host)
+        counter = QueryCounter()
+        measured = []
+        try:
+            # each thread has its own connection to count the queries on
+            with connection.execute_wrapper(counter):
+                for _ in range(index, requests, concurrency):
+                    request = scenario.build(rng.choice(actors), rng, state)
+                    counter.count = 0
+                    start = time.perf_counter()
+                    try:
+                        response = send(client, request)
+                        if response.streaming:
+                            # the streamed body is what the view computes
+                            for _ in response.streaming_content:
+                                pass
+                        status = response.status_code
+                    except Exception:
+                        # the test client raises what the view didn't handle
+                        status = 500
+                    measured.append((
+                        time.perf_counter() - start,
+                        counter.count,
+                        status
+                    ))
+        finally:
+            connection.close()
+            with lock:
+                samples.extend(measured)
+
+    start = time.perf_counter()
+    run_threads(worker, concurrency)
+
+    return samples, time.perf_counter() - start
+
+
+def run_threads(target, count):
+    """Run `target(index)` in `count` threads and wait for them"""
+    threads = [
+        threading.Thread(target=target, args=(index, ))
+        for index in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def ms(value):
+    """Return seconds in milliseconds"""
+    return None if value is None else round(value * 1000, 3)
+
+
+def summarize(samples, elapsed):
+    """Return the statistics of the samples of a scenario"""
+    latencies = sorted(latency for latency, _, _ in samples)
+    queries = [count for _, count, _ in samples]
+    errors = sum(1 for _, _, status in samples if status >= 400)
+
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'rps': round(len(samples) / elapsed, 2) if elapsed else None,
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'queries_per_request': (
+            round(sum(queries) / len(queries), 2) if queries else None
+        ),
+    }
+
+
+def compare(results, baseline):
+    """Return the change in percent of the statistics against a baseline,
+    by scenario"""
+    changes = {}
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+
+        changes[name] = {
+            key: round((stats[key] - before[key]) / before[key] * 100, 1)
+            for key in ('rps', 'p50_ms', 'p95_ms', 'p99_ms')
+            if stats.get(key) is not None and before.get(key)
+        }
+
+    return changes
@@ -0,0 +1,231 @@
+import io
+import json
+import uuid
+from collections import namedtuple
+
+from django.urls import reverse
+from PIL import Image
+
+from benchmark.seed import PASSWORD, email_prefix
+from core.seeding import TAGS
+
+# A request to send, with the token it authenticates with if any
+Request = namedtuple('Request', 'method path data content_type token')
+Request.__new__.__defaults__ = (None, None, None)
+
+# A route of the API and how to build a request to it from the seeded
+# actor picked for it, a random generator and the run state
+Scenario = namedtuple('Scenario', 'name build')
+
+
+class RunState:
+    """What the scenarios of a run share"""
+
+    def __init__(self, run, disposable):
+        self.run = run
+        # (actor, recipe id) of the recipes the destroy scenario deletes
+        self.disposable = disposable
+        self.image = None
+
+    def image_file(self):
+        """Return a new file holding a photo sized JPEG"""
+        if self.image is None:
+            content = io.BytesIO()
+            Image.new('RGB', (1200, 900), (180, 90, 40)).save(
+                content,
+                format='JPEG'
+            )
+            self.image = content.getvalue()
+
+        image = io.BytesIO(self.image)
+        image.name = 'benchmark.jpg'
+        return image
+
+
+def sample(ids, count, rng):
+    """Return up to `count` random ids"""
+    return rng.sample(ids, min(count, len(ids)))
+
+
+def recipe_payload(actor, rng):
+    """Return the JSON payload of a new recipe of the actor"""
+    return {
+        'title': f'Benchmark recipe {rng.randint(0, 10 ** 6)}',
+        'time_minutes': rng.randint(5, 180),
+        'price': f'{rng.randint(100, 9999) / 100:.2f}',
+        'tags': sample(actor.tag_ids, 3, rng),
+        'ingredients': sample(actor.ingredient_ids, 8, rng),
+    }
+
+
+def import_file(rng, count=20):
+    """Return an NDJSON file of `count` new recipes, tagged by name"""
+    content = io.BytesIO(b''.join(
+        json.dumps({
+            'title': f'Imported recipe {rng.randint(0, 10 ** 6)}',
+            'time_minutes': rng.randint(5, 180),
+            'price': f'{rng.randint(100, 9999) / 100:.2f}',
+            'tags': rng.sample(TAGS, 2),
+        }).encode() + b'\n'
+        for _ in range(count)
+    ))
+    content.name = 'benchmark.ndjson'
+    return content
+
+
+def detail(actor, rng):
+    """Return the detail URL of one of the actor's recipes"""
+    return reverse(
+        'recipe:recipe-detail',
+        args=[rng.choice(actor.recipe_ids)]
+    )
+
+
+def destroy(actor, rng, state):
+    """Delete a recipe set aside for it, as its owner"""
+    owner, recipe_id = state.disposable.pop()
+    return Request(
+        'delete',
+        reverse('recipe:recipe-detail', args=[recipe_id]),
+        token=owner.token
+    )
+
+
+SCENARIOS = (
+    Scenario('users-create', lambda actor, rng, state: Request(
+        'post',
+        reverse('users:create'),
+        {
+            'email': f'{email_prefix(state.run)}{uuid.uuid4().hex}'
+                     '@example.com',
+            'password': PASSWORD,
+            'name': 'New user',
+        },
+        'application/json'
+    )),
+    Scenario('users-token', lambda actor, rng, state: Request(
+        'post',
+        reverse('users:token'),
+        {'email': actor.email, 'password': PASSWORD},
+        'application/json'
+    )),
+    Scenario('users-self', lambda actor, rng, state: Request(
+        'get',
+        reverse('users:self'),
+        token=actor.token
+    )),
+    Scenario('users-self-update', lambda actor, rng, state: Request(
+        'patch',
+        reverse('users:self'),
+        {'name': f'Benchmark user {rng.randint(0, 10 ** 6)}'},
+        'application/json',
+        actor.token
+    )),
+    Scenario('api-root', lambda actor, rng, state: Request(
+        'get',
+        reverse('recipe:api-root'),
+        token=actor.token
+    )),
+    Scenario('tag-list', lambda actor, rng, state: Request(
+        'get',
+        reverse('recipe:tag-list'),
+        token=actor.token
+    )),
+    Scenario('tag-create', lambda actor, rng, state: Request(
+        'post',
+        reverse('recipe:tag-list'),
+        {'name': f'Tag {rng.randint(0, 10 ** 6)}'},
+        'application/json',
+        actor.token
+    )),
+    Scenario('ingredient-list', lambda actor, rng, state: Request(
+        'get',
+        reverse('recipe:ingredient-list'),
+        token=actor.token
+    )),
+    Scenario('ingredient-create', lambda actor, rng, state: Request(
+        'post',
+        reverse('recipe:ingredient-list'),
+        {'name': f'Ingredient {rng.randint(0, 10 ** 6)}'},
+        'application/json',
+        actor.token
+    )),
+    Scenario('recipe-list', lambda actor, rng, state: Request(
+        'get',
+        reverse('recipe:recipe-list'),
+        token=actor.token
+    )),
+    Scenario('recipe-list-filtered', lambda actor, rng, state: Request(
+        'get',
+        reverse('recipe:recipe-list'),
+        {
+            'tags': ','.join(str(pk) for pk in sample(actor.tag_ids, 2, rng)),
+            'ingredients': str(rng.choice(actor.ingredient_ids)),
+        },
+        token=actor.token
+    )),
+    Scenario('recipe-search', lambda actor, rng, state: Request(
+        'get',
+        reverse('recipe:recipe-list'),
+        {'q': rng.choice(('pasta', 'spicy curry', 'chiken', 'garlic'))},
+        token=actor.token
+    )),
+    Scenario('recipe-cookable', lambda actor, rng, state: Request(
+        'get',
+        reverse('recipe:recipe-cookable'),
+        {
+            'ingredients': ','.join(
+                str(pk) for pk in sample(actor.ingredient_ids, 4, rng)
+            ),
+        },
+        token=actor.token
+    )),
+    Scenario('recipe-export', lambda actor, rng, state: Request(
+        'get',
+        reverse('recipe:recipe-export'),
+        {'output': rng.choice(('ndjson', 'csv'))},
+        token=actor.token
+    )),
+    Scenario('recipe-import', lambda actor, rng, state: Request(
+        'post',
+        reverse('recipe:recipe-import-recipes'),
+        {'file': import_file(rng)},
+        token=actor.token
+    )),
+    Scenario('recipe-create', lambda actor, rng, state: Request(
+        'post',
+        reverse('recipe:recipe-list'),
+        recipe_payload(actor, rng),
+        'application/json',
+        actor.token
+    )),
+    Scenario('recipe-detail', lambda actor, rng, state: Request(
+        'get',
+        detail(actor, rng),
+        token=actor.token
+    )),
+    Scenario('recipe-update', lambda actor, rng, state: Request(
+        'put',
+        detail(actor, rng),
+        recipe_payload(actor, rng),
+        'application/json',
+        actor.token
+    )),
+    Scenario('recipe-partial-update', lambda actor, rng, state: Request(
+        'patch',
+        detail(actor, rng),
+        {'time_minutes': rng.randint(5, 180)},
+        'application/json',
+        actor.token
+    )),
+    Scenario('recipe-upload-image', lambda actor, rng, state: Request(
+        'post',
+        reverse(
+            'recipe:recipe-upload-image',
+            args=[rng.choice(actor.recipe_ids)]
+        ),
+        {'image': state.image_file()},
+        token=actor.token
+    )),
+    Scenario('recipe-destroy', destroy),
+)
@@ -0,0 +1,116 @@
+import os
+import binascii
+from collections import namedtuple
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from rest_framework.authtoken.models import Token
+
+from core.models import Tag, Ingredient, Recipe
+from core.seeding import ADJECTIVES, DISHES, INGREDIENTS, TAGS, name
+from recipe import search
+
+# Password of every seeded user
+PASSWORD = 'benchmark-password'
+
+# A seeded user, with the ids of what they own
+Actor = namedtuple(
+    'Actor',
+    'user_id email token tag_ids ingredient_ids recipe_ids'
+)
+
+
+def email_prefix(run):
+    """Return the prefix of the emails of the users seeded for a run"""
+    return f'benchmark-{run}-'
+
+
+def names(words, count):
+    """Return `count` distinct names made of the words"""
+    return [name(words, i) for i in range(count)]
+
+
+def seed(run, rng, users, recipes, tags, ingredients, tags_per_recipe,
+         ingredients_per_recipe, batch_size=1000):
+    """Create `users` users owning `recipes` recipes, `tags` tags and
+    `ingredients` ingredients each, return them as Actors"""
+    password = make_password(PASSWORD)
+    created = get_user_model().objects.bulk_create(
+        get_user_model()(
+            email=f'{email_prefix(run)}{i}@example.com',
+            name=f'Benchmark user {i}',
+            password=password
+        ) for i in range(users)
+    )
+    tokens = Token.objects.bulk_create(
+        Token(user=user, key=binascii.hexlify(os.urandom(20)).decode())
+        for user in created
+    )
+
+    actors = []
+    for user, token in zip(created, tokens):
+        user_tags = Tag.objects.bulk_create(
+            Tag(user=user, name=name) for name in names(TAGS, tags)
+        )
+        user_ingredients = Ingredient.objects.bulk_create(
+            Ingredient(user=user, name=name)
+            for name in names(INGREDIENTS, ingredients)
+        )
+        user_recipes = Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    user=user,
+                    title=f'{rng.choice(ADJECTIVES)} {rng.choice(DISHES)}',
+                    time_minutes=rng.randint(5, 180),
+                    price=Decimal(rng.randint(100, 9999)) / 100,
+                    link=f'https://example.com/recipes/{i}'
+                ) for i in range(recipes)
+            ),
+            batch_size=batch_size
+        )
+
+        for field, related, per_recipe in (
+            (Recipe.tags.field, user_tags, tags_per_recipe),
+            (Recipe.ingredients.field, user_ingredients,
+             ingredients_per_recipe),
+        ):
+            through = field.remote_field.through
+            target = f'{field.m2m_reverse_field_name()}_id'
+            through.objects.bulk_create(
+                (
+                    through(recipe_id=recipe.pk, **{target: obj.pk})
+                    for recipe in user_recipes
+                    for obj in rng.sample(
+                        related,
+                        min(per_recipe, len(related))
+                    )
+                ),
+                batch_size=batch_size
+            )
+
+        # bulk_create sent no signal, the search needs the vectors
+        recipe_ids = [recipe.pk for recipe in user_recipes]
+        for start in range(0, len(recipe_ids), batch_size):
+            search.update_search_vectors(
+                recipe_ids[start:start + batch_size]
+            )
+
+        actors.append(Actor(
+            user_id=user.pk,
+            email=user.email,
+            token=token.key,
+            tag_ids=[tag.pk for tag in user_tags],
+            ingredient_ids=[obj.pk for obj in user_ingredients],
+            recipe_ids=recipe_ids
+        ))
+
+    return actors
+
+
+def cleanup(run):
+    """Delete the users of a run, with everything they own"""
+    get_user_model().objects.filter(
+        email__startswith=email_prefix(run)
+    ).delete()
@@ -0,0 +1,147 @@
+import json
+import random
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, \
+                        override_settings
+from django.urls import get_resolver, resolve
+
+from benchmark import runner
+from benchmark.scenarios import SCENARIOS, RunState
+from benchmark.seed import Actor
+
+# Namespaces of the URL conf whose routes the benchmark drives
+NAMESPACES = ('recipe', 'users')
+
+
+def api_routes():
+    """Return the names of the routes of the NAMESPACES, as in reverse()"""
+    resolver = get_resolver()
+    return {
+        f'{namespace}:{name}'
+        for namespace in NAMESPACES
+        for name in resolver.namespace_dict[namespace][1].reverse_dict
+        if isinstance(name, str)
+    }
+
+
+class RunnerTests(SimpleTestCase):
+
+    def test_percentile(self):
+        """Test the nearest rank percentiles"""
+        values = list(range(1, 101))
+
+        self.assertEqual(runner.percentile(values, 50), 50)
+        self.assertEqual(runner.percentile(values, 99), 99)
+        self.assertEqual(runner.percentile([7], 95), 7)
+        self.assertIsNone(runner.percentile([], 50))
+
+    def test_compare(self):
+        """Test the changes against a baseline are in percent"""
+        changes = runner.compare(
+            {'tag-list': {'rps': 150, 'p50_ms': 5, 'p95_ms': 9,
+                          'p99_ms': None}},
+            {'tag-list': {'rps': 100, 'p50_ms': 10, 'p95_ms': 9,
+                          'p99_ms': 20}}
+        )
+
+        self.assertEqual(changes, {
+            'tag-list': {'rps': 50.0, 'p50_ms': -50.0, 'p95_ms': 0.0},
+        })
+
+
+class ScenarioTests(SimpleTestCase):
+
+    def test_every_route_has_a_scenario(self):
+        """Test the scenarios request every route of the URL conf"""
+        actor = Actor(
+            user_id=1,
+            email='benchmark@example.com',
+            token='token',
+            tag_ids=[1, 2, 3],
+            ingredient_ids=[1, 2, 3, 4],
+            recipe_ids=[1, 2]
+        )
+        state = RunState('test', [(actor, 1)])
+
+        routes = {
+            resolve(scenario.build(actor, random.Random(0), state).path)
+            .view_name
+            for scenario in SCENARIOS
+        }
+
+        self.assertEqual(routes, api_routes())
+
+
+class BenchmarkCommandTests(TransactionTestCase):
+
+    @override_settings(ALLOWED_HOSTS=['localhost'], RECIPE_IMAGE_WORKERS=0)
+    def test_benchmark_api(self):
+        """Test every scenario runs without errors and the seeded data is
+        removed"""
+        with tempfile.TemporaryDirectory() as media, \
+                tempfile.NamedTemporaryFile('r', suffix='.json') as output, \
+                self.settings(MEDIA_ROOT=media):
+            call_command(
+                'benchmark_api',
+                users=2,
+                recipes=5,
+                requests=4,
+                concurrency=2,
+                output=output.name,
+                stdout=StringIO()
+            )
+            results = json.load(output)['results']
+
+        self.assertEqual(
+            list(results),
+            [scenario.name for scenario in SCENARIOS]
+        )
+        for name, stats in results.items():
+            self.assertEqual(stats['requests'], 4, name)
+            self.assertEqual(stats['errors'], 0, name)
+            self.assertIsNotNone(stats['p99_ms'], name)
+            self.assertIsNotNone(stats['queries_per_request'], name)
+
+        self.assertFalse(get_user_model().objects.exists())
+
+
+class ConnectionsBenchmarkTests(TestCase):
+
+    def test_benchmark_connections(self):
+        """Test reusing the connections opens fewer of them"""
+        with tempfile.NamedTemporaryFile('r', suffix='.json') as output:
+            call_command(
+                'benchmark_connections',
+                requests=6,
+                concurrency=2,
+                output=output.name,
+                stdout=StringIO()
+            )
+            results = json.load(output)['results']
+
+        self.assertEqual(list(results), ['close', 'persistent', 'pool'])
+        self.assertEqual(results['close']['connections'], 6)
+        self.assertEqual(results['persistent']['connections'], 2)
+        self.assertLessEqual(results['pool']['connections'], 2)
+        for stats in results.values():
+            self.assertEqual(stats['requests'], 6)
+
+    def test_benchmark_connections_thread_per_request(self):
+        """Test only the pool reuses connections across threads"""
+        with tempfile.NamedTemporaryFile('r', suffix='.json') as output:
+            call_command(
+                'benchmark_connections',
+                requests=6,
+                concurrency=2,
+                thread_per_request=True,
+                output=output.name,
+                stdout=StringIO()
+            )
+            results = json.load(output)['results']
+
+        self.assertEqual(results['persistent']['connections'], 6)
+        self.assertLessEqual(results['pool']['connections'], 2)
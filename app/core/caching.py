@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.cache import caches
+
+# cache backends whose entries the other processes never see
+PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared(alias):
+    """Return whether every process of the server sees the `alias` cache"""
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    return backend is not None and backend not in PROCESS_CACHES
+
+
+def shared_cache(alias):
+    """Return the `alias` cache, None unless it is shared: what a process
+    invalidates in it would stay valid in the others"""
+    return caches[alias] if is_shared(alias) else None
@@ -0,0 +1,103 @@
+import time
+
+from django.db.backends.postgresql import base
+
+from core.db.pool import get_pool
+
+Database = base.Database
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend checking persistent connections before reusing
+    them and optionally sharing them between threads through a pool.
+
+    HEALTH_CHECKS in the database settings makes the first query of each
+    request check the connection kept from an earlier request still works,
+    and replace it otherwise. POOL_SIZE keeps up to that many connections
+    for the other threads when a request ends, CONN_MAX_AGE then sets how
+    long they are reused for.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = self.settings_dict.get(
+            'HEALTH_CHECKS',
+            False
+        )
+        self.health_check_done = False
+        self.pool_size = self.settings_dict.get('POOL_SIZE', 0)
+        self.pool = None
+        self.connection_created_at = None
+
+    def get_new_connection(self, conn_params):
+        if self.pool_size:
+            self.pool = get_pool(
+                tuple(sorted(
+                    (name, repr(value)) for name, value in conn_params.items()
+                )),
+                self.pool_size,
+                self.settings_dict['CONN_MAX_AGE']
+            )
+            pooled = self.pool.get(
+                self.connection_works if self.health_check_enabled else None
+            )
+            if pooled is not None:
+                connection, self.connection_created_at = pooled
+                return connection
+
+        self.connection_created_at = time.monotonic()
+        return super().get_new_connection(conn_params)
+
+    def connection_works(self, connection):
+        """Return whether a DB-API connection answers a query"""
+        if connection.closed:
+            return False
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        except Database.Error:
+            return False
+
+        return True
+
+    def connect(self):
+        # a new connection doesn't need checking, connect() itself goes
+        # through ensure_connection()
+        self.health_check_done = True
+        super().connect()
+
+    def ensure_connection(self):
+        if self.connection is not None and self.health_check_enabled and \
+                not self.health_check_done and not self.in_atomic_block:
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        """Called when requests start and end, the connection is checked
+        again on the next request and given back to the pool if any"""
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+        if self.pool is not None and self.connection is not None and \
+                not self.in_atomic_block:
+            self.close()
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+
+        connection = self.connection
+        if self.in_atomic_block or self.errors_occurred or connection.closed:
+            return super()._close()
+
+        try:
+            if connection.status != Database.extensions.STATUS_READY:
+                connection.rollback()
+        except Database.Error:
+            return super()._close()
+
+        self.pool.put(connection, self.connection_created_at)
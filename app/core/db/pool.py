@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import deque
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Idle DB-API connections shared by the threads of a process.
+
+    Connections are handed out most recently used first and dropped once
+    they are older than `max_age` seconds (None keeps them forever).
+    """
+
+    def __init__(self, size, max_age=None):
+        self.size = size
+        self.max_age = max_age
+        self.idle = deque()
+        self.lock = threading.Lock()
+
+    def expired(self, created):
+        return self.max_age is not None and \
+            time.monotonic() - created >= self.max_age
+
+    def get(self, check=None):
+        """Return an idle connection and its creation time, None when there
+        is none. `check` tells whether a connection still works."""
+        while True:
+            with self.lock:
+                if not self.idle:
+                    return None
+                connection, created = self.idle.pop()
+
+            if self.expired(created) or check and not check(connection):
+                self.discard(connection)
+                continue
+
+            return connection, created
+
+    def put(self, connection, created):
+        """Keep a connection for reuse, close it when the pool is full or
+        the connection too old"""
+        if not self.expired(created):
+            with self.lock:
+                if len(self.idle) < self.size:
+                    self.idle.append((connection, created))
+                    return
+
+        self.discard(connection)
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def clear(self):
+        """Close the idle connections"""
+        with self.lock:
+            idle, self.idle = self.idle, deque()
+
+        for connection, created in idle:
+            self.discard(connection)
+
+
+def get_pool(key, size, max_age):
+    """Return the pool of the connections opened with the same parameters"""
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(size, max_age)
+
+        return _pools[key]
+
+
+def clear_pools():
+    """Close the idle connections of every pool and forget the pools"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for pool in pools:
+        pool.clear()
@@ -0,0 +1,127 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import SimpleLazyObject
+
+from core import caching
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_local = threading.local()
+
+
+def pin_cache_key(user_id):
+    """Return the cache key marking a user as pinned to the primary"""
+    return f'primary-pin:{user_id}'
+
+
+def pin_to_primary(user):
+    """Read the data of the user from the primary for the next
+    REPLICA_PIN_SECONDS, so they see what they just wrote"""
+    caches[settings.REPLICA_PIN_CACHE].set(
+        pin_cache_key(user.pk),
+        True,
+        settings.REPLICA_PIN_SECONDS
+    )
+
+
+def is_pinned(user):
+    """Return whether the reads of the user go to the primary"""
+    return caches[settings.REPLICA_PIN_CACHE].get(
+        pin_cache_key(user.pk),
+        False
+    )
+
+
+def check_pin_cache():
+    """Refuse replicas with a pin cache the other processes can't read,
+    their reads would miss what the user just wrote elsewhere"""
+    if not settings.DATABASE_REPLICAS:
+        return
+
+    alias = settings.REPLICA_PIN_CACHE
+    if not caching.is_shared(alias):
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        raise ImproperlyConfigured(
+            f'DATABASE_REPLICAS need a REPLICA_PIN_CACHE shared by the '
+            f'processes, the "{alias}" cache is {backend or "not defined"}.'
+        )
+
+
+def authenticated_user(request):
+    """Return the user the API authenticated the request as, None until
+    then"""
+    user = getattr(request, 'user', None)
+    # the lazy user set by the session middleware is replaced once DRF has
+    # authenticated the request
+    if user is None or type(user) is SimpleLazyObject:
+        return None
+
+    return user
+
+
+class Routing:
+    """How the reads of the request being handled are routed"""
+    unset = object()
+
+    def __init__(self, request):
+        self.request = request
+        self.replica = self.unset
+
+    def choose_replica(self):
+        """Return a replica alias picked according to the weights, None
+        when the request reads from the primary"""
+        if self.request.method not in SAFE_METHODS:
+            return None
+
+        user = authenticated_user(self.request)
+        if user is None:
+            # authenticating reads the tokens and users from the primary
+            return None
+
+        if self.replica is self.unset:
+            if user.is_authenticated and is_pinned(user):
+                self.replica = None
+            else:
+                replicas = settings.DATABASE_REPLICAS
+                self.replica = random.choices(
+                    list(replicas),
+                    weights=list(replicas.values())
+                )[0]
+
+        return self.replica
+
+
+@contextmanager
+def routing(request):
+    """Route the reads of the thread according to the request"""
+    previous, _local.routing = getattr(_local, 'routing', None), \
+        Routing(request)
+    try:
+        yield _local.routing
+    finally:
+        _local.routing = previous
+
+
+class ReplicaRouter:
+    """Send the reads of safe requests to the DATABASE_REPLICAS once the
+    user is authenticated, unless they wrote recently. Everything else
+    goes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        current = getattr(_local, 'routing', None)
+        if current is None or not settings.DATABASE_REPLICAS:
+            return None
+
+        return current.choose_replica()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """The replicas hold the same data as the primary"""
+        return True
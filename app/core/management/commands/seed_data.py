@@ -0,0 +1,224 @@
+import csv
+import io
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import User, Tag, Ingredient, Recipe
+from core.seeding import ADJECTIVES, DISHES, INGREDIENTS, TAGS, name
+from recipe.search import update_search_vectors
+
+DISTRIBUTIONS = ('fixed', 'uniform', 'exponential')
+
+
+def draw(rng, mean, distribution, maximum=None):
+    """Return a count of mean `mean` following the distribution"""
+    if distribution == 'uniform':
+        count = rng.randint(0, 2 * mean)
+    elif distribution == 'exponential':
+        count = int(rng.expovariate(1 / mean)) if mean else 0
+    else:
+        count = mean
+
+    return count if maximum is None else min(count, maximum)
+
+
+class CopyWriter:
+    """Buffer the rows of a table as CSV and COPY them in batches"""
+
+    def __init__(self, cursor, table, columns, options=''):
+        self.cursor = cursor
+        self.sql = (
+            f'COPY {connection.ops.quote_name(table)} '
+            f'({", ".join(columns)}) FROM STDIN WITH (FORMAT csv{options})'
+        )
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.rows = 0
+        self.total = 0
+
+    def write(self, row):
+        self.writer.writerow(row)
+        self.rows += 1
+
+    def flush(self):
+        """Send the buffered rows"""
+        if self.rows:
+            self.buffer.seek(0)
+            self.cursor.copy_expert(self.sql, self.buffer)
+            self.total += self.rows
+
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.rows = 0
+
+
+class Command(BaseCommand):
+    """Django command to fill the database with synthetic data quickly"""
+    help = 'Generate users, tags, ingredients and recipes with COPY'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=100,
+                            help='Mean number of recipes per user')
+        parser.add_argument('--tags', type=int, default=20,
+                            help='Mean number of tags per user')
+        parser.add_argument('--ingredients', type=int, default=50,
+                            help='Mean number of ingredients per user')
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        for option in ('recipes', 'tags', 'ingredients', 'relations'):
+            parser.add_argument(
+                f'--{option}-distribution',
+                choices=DISTRIBUTIONS,
+                default='fixed' if option == 'relations' else 'exponential',
+                help=f'How the number of {option} varies around its mean'
+            )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--email-prefix', default='seed-')
+        parser.add_argument('--password', default='seed-password')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Users generated per transaction')
+        parser.add_argument('--skip-search-vectors', action='store_true')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        password = make_password(options['password'])
+        start = time.perf_counter()
+        totals = {}
+
+        for first in range(0, options['users'], options['batch_size']):
+            count = min(options['batch_size'], options['users'] - first)
+            with transaction.atomic(), connection.cursor() as cursor:
+                written = self.seed_users(
+                    cursor,
+                    rng,
+                    range(first, first + count),
+                    password,
+                    options
+                )
+
+            for table, rows in written.items():
+                totals[table] = totals.get(table, 0) + rows
+            self.stdout.write(
+                f'{first + count} users, {totals["recipes"]} '
+                f'recipes in {time.perf_counter() - start:.1f}s'
+            )
+
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f'{rows} {table}' for table, rows in totals.items()
+        )))
+
+    def reserve_ids(self, cursor, model, count):
+        """Return `count` new ids of the sequence of the model"""
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+            'FROM generate_series(1, %s)',
+            [model._meta.db_table, model._meta.pk.column, count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def seed_users(self, cursor, rng, indexes, password, options):
+        """Generate a batch of users with everything they own, return the
+        number of rows written by table"""
+        plans = [
+            (
+                index,
+                draw(rng, options['tags'], options['tags_distribution']),
+                draw(rng, options['ingredients'],
+                     options['ingredients_distribution']),
+                draw(rng, options['recipes'],
+                     options['recipes_distribution']),
+            )
+            for index in indexes
+        ]
+        ids = {
+            model: iter(self.reserve_ids(cursor, model, sum(
+                plan[column] for plan in plans
+            ) if column else len(plans)))
+            for model, column in (
+                (User, 0), (Tag, 1), (Ingredient, 2), (Recipe, 3),
+            )
+        }
+        through = {
+            'tags': Recipe.tags.through._meta.db_table,
+            'ingredients': Recipe.ingredients.through._meta.db_table,
+        }
+        writers = {
+            'users': CopyWriter(cursor, User._meta.db_table, (
+                'id', 'password', 'is_superuser', 'email', 'name',
+                'is_active', 'is_staff',
+            )),
+            'tags': CopyWriter(
+                cursor, Tag._meta.db_table, ('id', 'name', 'user_id')
+            ),
+            'ingredients': CopyWriter(
+                cursor, Ingredient._meta.db_table, ('id', 'name', 'user_id')
+            ),
+            'recipes': CopyWriter(cursor, Recipe._meta.db_table, (
+                'id', 'user_id', 'title', 'time_minutes', 'price', 'link',
+                'image_variants',
+            ), ', FORCE_NOT_NULL (link)'),
+            'recipe_tags': CopyWriter(
+                cursor, through['tags'], ('recipe_id', 'tag_id')
+            ),
+            'recipe_ingredients': CopyWriter(
+                cursor, through['ingredients'], ('recipe_id', 'ingredient_id')
+            ),
+        }
+        recipe_ids = []
+
+        for index, tags, ingredients, recipes in plans:
+            user_id = next(ids[User])
+            writers['users'].write((
+                user_id, password, False,
+                f'{options["email_prefix"]}{index}@example.com',
+                f'User {index}', True, False,
+            ))
+            tag_ids = [next(ids[Tag]) for _ in range(tags)]
+            for i, tag_id in enumerate(tag_ids):
+                writers['tags'].write((tag_id, name(TAGS, i), user_id))
+            ingredient_ids = [
+                next(ids[Ingredient]) for _ in range(ingredients)
+            ]
+            for i, ingredient_id in enumerate(ingredient_ids):
+                writers['ingredients'].write(
+                    (ingredient_id, name(INGREDIENTS, i), user_id)
+                )
+
+            for i in range(recipes):
+                recipe_id = next(ids[Recipe])
+                recipe_ids.append(recipe_id)
+                writers['recipes'].write((
+                    recipe_id, user_id,
+                    f'{rng.choice(ADJECTIVES)} {rng.choice(DISHES)}',
+                    rng.randint(5, 180),
+                    f'{rng.randint(100, 9999) / 100:.2f}',
+                    f'https://example.com/{recipe_id}' if i % 3 else '',
+                    '{}',
+                ))
+                for writer, related, mean in (
+                    ('recipe_tags', tag_ids, options['tags_per_recipe']),
+                    ('recipe_ingredients', ingredient_ids,
+                     options['ingredients_per_recipe']),
+                ):
+                    for related_id in rng.sample(related, draw(
+                        rng,
+                        mean,
+                        options['relations_distribution'],
+                        len(related)
+                    )):
+                        writers[writer].write((recipe_id, related_id))
+
+        for writer in writers.values():
+            writer.flush()
+
+        if not options['skip_search_vectors']:
+            update_search_vectors(recipe_ids)
+
+        return {
+            table: writer.total for table, writer in writers.items()
+        }
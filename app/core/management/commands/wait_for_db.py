@@ -1,21 +1,80 @@
 import time
 
 from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+
+from core.warmup import warm_up
 
 
 class Command(BaseCommand):
     """Django command to pause execution until DB is available"""
 
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--timeout', type=float, default=60,
+                            help='Seconds to give up after')
+        parser.add_argument('--delay', type=float, default=0.1,
+                            help='Seconds to wait after the first failure, '
+                                 'doubled after each one')
+        parser.add_argument('--max-delay', type=float, default=5)
+        parser.add_argument('--check-migrations', action='store_true',
+                            help='Fail when migrations are not applied')
+        parser.add_argument('--warm-up', action='store_true',
+                            help='Load what the first request would')
+
     def handle(self, *args, **options):
         self.stdout.write('Waiting for Database...')
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('DB not available, waiting for 1 second...')
-                time.sleep(1)
+        connection = connections[options['database']]
+        deadline = time.monotonic() + options['timeout']
+        delay = options['delay']
+        while not self.probe(connection):
+            if time.monotonic() + delay > deadline:
+                raise CommandError(
+                    f'DB not available after {options["timeout"]} seconds'
+                )
+            self.stdout.write(
+                f'DB not available, waiting for {delay:g} seconds...'
+            )
+            time.sleep(delay)
+            delay = min(delay * 2, options['max_delay'])
 
         self.stdout.write(self.style.SUCCESS('Database is now available!'))
+
+        pending = self.pending_migrations(connection)
+        if pending:
+            message = f'{len(pending)} unapplied migrations: ' + ', '.join(
+                f'{migration.app_label}.{migration.name}'
+                for migration in pending
+            )
+            if options['check_migrations']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+
+        if options['warm_up']:
+            durations = warm_up()
+            self.stdout.write(self.style.SUCCESS('Warmed up ' + ', '.join(
+                f'{name} in {duration * 1000:.1f}ms'
+                for name, duration in durations.items()
+            )))
+
+    def probe(self, connection):
+        """Return whether the database answers a query"""
+        try:
+            connection.ensure_connection()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except OperationalError:
+            return False
+
+        return True
+
+    def pending_migrations(self, connection):
+        """Return the migrations not applied to the database yet"""
+        executor = MigrationExecutor(connection)
+        return [
+            migration for migration, backwards in executor.migration_plan(
+                executor.loader.graph.leaf_nodes()
+            )
+        ]
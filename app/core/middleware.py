@@ -0,0 +1,119 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from core import timing
+from core.db import routers
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """Record the queries, database, serialization and render time of a
+    sample of the requests, with counts like the recipe cache hits and
+    misses, report them in a `Server-Timing` header and a log line.
+
+    The durations overlap: `serialize` includes the queries run while
+    serializing and `total` includes everything.
+    """
+
+    def __init__(self, get_response):
+        self.rate = settings.SERVER_TIMING_SAMPLE_RATE
+        if self.rate <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if self.rate < 1 and random.random() >= self.rate:
+            return self.get_response(request)
+
+        recorder = timing.Timing()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            stack.enter_context(timing.recording(recorder))
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        recorder.add('total', time.perf_counter() - start)
+
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = self.header(recorder)
+        logger.info(
+            '%s %s %s queries=%d %s',
+            request.method,
+            request.path,
+            response.status_code,
+            recorder.queries,
+            ' '.join([
+                f'{name}_ms={duration * 1000:.2f}'
+                for name, duration in recorder.durations.items()
+            ] + [
+                f'{name}={value}' for name, value in recorder.counts.items()
+            ]),
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': recorder.queries,
+                'durations_ms': {
+                    name: round(duration * 1000, 3)
+                    for name, duration in recorder.durations.items()
+                },
+                'counts': recorder.counts,
+            }
+        )
+
+        return response
+
+    def process_template_response(self, request, response):
+        """Time the rendering, done by the handler right after this"""
+        recorder = timing.current()
+        if recorder is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(lambda response: recorder.add(
+                'render',
+                time.perf_counter() - start
+            ))
+
+        return response
+
+    def header(self, recorder):
+        """Return the Server-Timing header value of the timing"""
+        metrics = [f'db;dur={recorder.durations.get("db", 0) * 1000:.2f};'
+                   f'desc="{recorder.queries} queries"']
+        metrics.extend(
+            f'{name};dur={duration * 1000:.2f}'
+            for name, duration in recorder.durations.items()
+            if name != 'db'
+        )
+        metrics.extend(
+            f'{name};desc="{value}"' for name, value in recorder.counts.items()
+        )
+
+        return ', '.join(metrics)
+
+
+class ReplicaRoutingMiddleware:
+    """Let core.db.routers.ReplicaRouter route the reads of the request and
+    pin the users making unsafe requests to the primary for a while"""
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with routers.routing(request):
+            response = self.get_response(request)
+
+        if request.method not in routers.SAFE_METHODS:
+            user = routers.authenticated_user(request)
+            if user is not None and user.is_authenticated:
+                routers.pin_to_primary(user)
+
+        return response
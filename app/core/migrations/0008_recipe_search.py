@@ -0,0 +1,61 @@
+# Generated by Django 2.1.15 on 2026-10-17 01:28
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+TRIGRAM_INDEXES = (
+    ('core_recipe_title_trgm', 'core_recipe', 'title'),
+    ('core_tag_name_trgm', 'core_tag', 'name'),
+    ('core_ingredient_name_trgm', 'core_ingredient', 'name'),
+)
+
+BACKFILL_SEARCH_VECTORS = """
+UPDATE core_recipe SET search_vector =
+    setweight(to_tsvector('english'::regconfig, title), 'A') ||
+    setweight(to_tsvector('english'::regconfig,
+        COALESCE((
+            SELECT string_agg(core_tag.name, ' ')
+            FROM core_tag
+            JOIN core_recipe_tags ON core_recipe_tags.tag_id = core_tag.id
+            WHERE core_recipe_tags.recipe_id = core_recipe.id
+        ), '') || ' ' ||
+        COALESCE((
+            SELECT string_agg(core_ingredient.name, ' ')
+            FROM core_ingredient
+            JOIN core_recipe_ingredients
+                ON core_recipe_ingredients.ingredient_id = core_ingredient.id
+            WHERE core_recipe_ingredients.recipe_id = core_recipe.id
+        ), '')
+    ), 'B')
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recipe_image_variants'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_vector_gin'),
+        ),
+        migrations.RunSQL(
+            [
+                f'CREATE INDEX {name} ON {table} USING gin ({column} gin_trgm_ops)'
+                for name, table, column in TRIGRAM_INDEXES
+            ],
+            [f'DROP INDEX {name}' for name, _, _ in TRIGRAM_INDEXES],
+        ),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTORS, migrations.RunSQL.noop),
+    ]
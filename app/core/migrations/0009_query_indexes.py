@@ -0,0 +1,72 @@
+# Generated by Django 2.1.15 on 2026-10-17 01:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# The through tables are only indexed on (recipe_id, <related>_id) and on
+# each column, these serve lookups from a tag/ingredient to its recipes
+# and supersede the single column indexes created by Django
+THROUGH_INDEXES = (
+    ('core_recipe_tags_tag_recipe_idx', 'core_recipe_tags',
+     'tag_id, recipe_id', 'core_recipe_tags_tag_id_10c0ffea', 'tag_id'),
+    ('core_recipe_ingredients_ingredient_recipe_idx',
+     'core_recipe_ingredients', 'ingredient_id, recipe_id',
+     'core_recipe_ingredients_ingredient_id_a8fec9ee', 'ingredient_id'),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_recipe_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', 'name', 'id'], name='ingredient_user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'id'], name='recipe_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', 'name', 'id'], name='tag_user_name_idx'),
+        ),
+        migrations.AlterField(
+            model_name='ingredient',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='tag',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunSQL(
+            [
+                sql
+                for name, table, columns, old_name, _ in THROUGH_INDEXES
+                for sql in (
+                    f'CREATE INDEX {name} ON {table} ({columns})',
+                    f'DROP INDEX IF EXISTS {old_name}',
+                )
+            ],
+            [
+                sql
+                for name, table, _, old_name, old_column in THROUGH_INDEXES
+                for sql in (
+                    f'CREATE INDEX {old_name} ON {table} ({old_column})',
+                    f'DROP INDEX {name}',
+                )
+            ],
+        ),
+    ]
@@ -0,0 +1,69 @@
+from django.db import migrations
+
+
+# Django can't declare unique indexes on expressions, these make the names
+# of the tags and ingredients unique per user regardless of case and back
+# the INSERT ... ON CONFLICT of NameQuerySet.upsert_names.
+UNIQUE_INDEXES = (
+    ('core_tag_user_lower_name_uniq', 'core_tag', 'core_recipe_tags',
+     'tag_id'),
+    ('core_ingredient_user_lower_name_uniq', 'core_ingredient',
+     'core_recipe_ingredients', 'ingredient_id'),
+)
+
+
+def merge_duplicates_sql(table, through, column):
+    """Return the statements merging the objects of a user whose names
+    only differ by case into the oldest one, like the merge_duplicates
+    command, so the unique index can be created. Cached representations
+    of the repointed recipes outlive it, clear a shared cache after."""
+    merge = f'{table}_merge'
+    return [
+        # duplicate id -> id of the oldest object of the same name
+        f'''
+        CREATE TEMPORARY TABLE {merge} AS
+        SELECT id, keep_id FROM (
+            SELECT id, min(id) OVER (
+                PARTITION BY user_id, lower(name)
+            ) AS keep_id
+            FROM {table}
+        ) AS grouped
+        WHERE id <> keep_id
+        ''',
+        f'''
+        INSERT INTO {through} (recipe_id, {column})
+        SELECT t.recipe_id, m.keep_id FROM {through} t
+        JOIN {merge} m ON t.{column} = m.id
+        ON CONFLICT DO NOTHING
+        ''',
+        f'DELETE FROM {through} WHERE {column} IN (SELECT id FROM {merge})',
+        f'DELETE FROM {table} WHERE id IN (SELECT id FROM {merge})',
+        f'DROP TABLE {merge}',
+        # run the deferred foreign key checks of the deletes now, an
+        # index can't be created on a table with pending trigger events
+        'SET CONSTRAINTS ALL IMMEDIATE',
+        'SET CONSTRAINTS ALL DEFERRED',
+    ]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_query_indexes'),
+    ]
+
+    operations = [
+        operation
+        for name, table, through, column in UNIQUE_INDEXES
+        for operation in (
+            migrations.RunSQL(
+                merge_duplicates_sql(table, through, column),
+                migrations.RunSQL.noop
+            ),
+            migrations.RunSQL(
+                f'CREATE UNIQUE INDEX {name} ON {table} '
+                '(user_id, lower(name));',
+                f'DROP INDEX {name};'
+            ),
+        )
+    ]
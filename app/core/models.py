@@ -1,6 +1,9 @@
 import uuid
 import os
-from django.db import models
+from django.db import connections, models, router
+from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
                                         PermissionsMixin
 from django.conf import settings
@@ -47,14 +50,86 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+class NameQuerySet(models.QuerySet):
+    """Tags and ingredients, unique per user by case insensitive name"""
+
+    # resolve the names, inserting the missing ones, returns per input name
+    # the id and name of its object and whether it was just created
+    UPSERT_SQL = """
+        WITH inserted AS (
+            INSERT INTO {table} (user_id, name)
+            SELECT DISTINCT ON (lower(name)) %(user_id)s, name
+            FROM unnest(%(names)s::text[]) WITH ORDINALITY AS n(name, i)
+            ORDER BY lower(name), i
+            ON CONFLICT (user_id, lower(name)) DO NOTHING
+            RETURNING id, name
+        )
+        SELECT n.name,
+               coalesce(i.id, e.id),
+               coalesce(i.name, e.name),
+               i.id IS NOT NULL
+        FROM unnest(%(names)s::text[]) AS n(name)
+        LEFT JOIN inserted i ON lower(i.name) = lower(n.name)
+        LEFT JOIN {table} e
+            ON e.user_id = %(user_id)s AND lower(e.name) = lower(n.name)
+    """
+
+    def upsert_names(self, user, names):
+        """Return {name: (object, created)} for the names of the user,
+        creating the missing objects with a single INSERT ... ON CONFLICT.
+
+        Names differing only by case resolve to the same object. No signal
+        is sent for the created objects.
+        """
+        connection = connections[self._db or router.db_for_write(self.model)]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        missing = list(dict.fromkeys(names))
+        resolved = {}
+
+        # an object inserted by a concurrent transaction once the statement
+        # started conflicts but isn't visible yet, the next statement sees it
+        while missing:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    self.UPSERT_SQL.format(table=table),
+                    {'user_id': user.pk, 'names': missing}
+                )
+                rows = cursor.fetchall()
+
+            for name, pk, stored_name, created in rows:
+                if pk is not None:
+                    resolved[name] = (
+                        self.model(id=pk, name=stored_name, user_id=user.pk),
+                        created
+                    )
+
+            missing = [name for name in missing if name not in resolved]
+
+        return resolved
+
+
 class Tag(models.Model):
     """Tags to be used for a recipe"""
     name = models.CharField(max_length=255)
+    # indexed by tag_user_name_idx
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
 
+    objects = NameQuerySet.as_manager()
+
+    class Meta:
+        # also unique on (user, lower(name)), see migration 0010
+        indexes = [
+            # the tags of a user, listed by name
+            models.Index(
+                fields=['user', 'name', 'id'],
+                name='tag_user_name_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -62,20 +137,36 @@ class Tag(models.Model):
 class Ingredient(models.Model):
     """Ingredient that is used in recipes"""
     name = models.CharField(max_length=255)
+    # indexed by ingredient_user_name_idx
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
 
+    objects = NameQuerySet.as_manager()
+
+    class Meta:
+        # also unique on (user, lower(name)), see migration 0010
+        indexes = [
+            # the ingredients of a user, listed by name
+            models.Index(
+                fields=['user', 'name', 'id'],
+                name='ingredient_user_name_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
 class Recipe(models.Model):
     """Recipe object"""
+    # indexed by recipe_user_id_idx
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     title = models.CharField(max_length=255)
     time_minutes = models.IntegerField()
@@ -84,6 +175,20 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    # storage names of the resized copies of `image`, by variant name
+    image_variants = JSONField(default=dict, blank=True)
+    # title, tag and ingredient names, maintained by recipe.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # the recipes of a user, listed by id
+            models.Index(fields=['user', 'id'], name='recipe_user_id_idx'),
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_gin'
+            ),
+        ]
 
     def __str__(self):
         return self.title
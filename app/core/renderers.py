@@ -0,0 +1,38 @@
+import orjson
+
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Render JSON with orjson, byte for byte like the DRF renderer"""
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring"""
+        if data is None:
+            return bytes()
+
+        renderer_context = renderer_context or {}
+        # orjson can't indent by an arbitrary amount or escape non ascii
+        # characters, leave those rare cases to the stdlib encoder
+        if self.ensure_ascii or \
+                self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # DRF's encoder handles what orjson doesn't know about natively:
+            # datetimes (formatted the DRF way), Decimal, lazy strings...
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=self.options
+            )
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits, let the stdlib encoder
+            # render them or raise the usual error
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # like the DRF renderer, escape the two characters valid in JSON but
+        # not in javascript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028') \
+            .replace(b'\xe2\x80\xa9', b'\\u2029')
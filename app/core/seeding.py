@@ -0,0 +1,23 @@
+# Words the titles and names are made of, so searches find something
+ADJECTIVES = (
+    'Spicy', 'Creamy', 'Roasted', 'Grilled', 'Smoky', 'Crispy', 'Baked',
+    'Fresh', 'Sweet', 'Tangy', 'Slow Cooked', 'Braised',
+)
+DISHES = (
+    'Pasta', 'Curry', 'Chicken', 'Salad', 'Soup', 'Pizza', 'Burger',
+    'Risotto', 'Tacos', 'Stew', 'Noodles', 'Pie', 'Omelette', 'Casserole',
+)
+TAGS = (
+    'Vegan', 'Vegetarian', 'Dessert', 'Breakfast', 'Lunch', 'Dinner',
+    'Quick', 'Healthy', 'Comfort', 'Party', 'Kids', 'Gluten Free',
+)
+INGREDIENTS = (
+    'Salt', 'Pepper', 'Garlic', 'Onion', 'Tomato', 'Basil', 'Cheese',
+    'Butter', 'Olive Oil', 'Lemon', 'Chili', 'Rice', 'Flour', 'Egg',
+)
+
+
+def name(words, index):
+    """Return the index-th distinct name made of the words"""
+    word = words[index % len(words)]
+    return word if index < len(words) else f'{word} {index // len(words)}'
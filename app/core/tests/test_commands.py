@@ -1,24 +1,167 @@
+from io import StringIO
+from itertools import chain, repeat
 from unittest.mock import patch
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
+from django.db.migrations import Migration
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core import warmup
+from core.models import Tag, Ingredient, Recipe
+
+ENSURE_CONNECTION = \
+    'django.db.backends.base.base.BaseDatabaseWrapper.ensure_connection'
+
 
 class CommnadTests(TestCase):
 
     def test_wait_for_db_ready(self):
         """Test waiting for DB when DB is available"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
+        with patch(ENSURE_CONNECTION) as ec:
+            call_command('wait_for_db', stdout=StringIO())
 
-            self.assertEqual(gi.call_count, 1)
+            self.assertTrue(ec.called)
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db(self, ts):
-        """Test waiting for DB"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEqual(gi.call_count, 6)
+        """Test waiting for DB with an exponential backoff"""
+        with patch(ENSURE_CONNECTION) as ec:
+            ec.side_effect = chain([OperationalError] * 5, repeat(None))
+            call_command('wait_for_db', max_delay=1, stdout=StringIO())
+
+        self.assertEqual(
+            [call[0][0] for call in ts.call_args_list],
+            [0.1, 0.2, 0.4, 0.8, 1]
+        )
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_timeout(self, ts):
+        """Test waiting for DB gives up after the timeout"""
+        with patch(ENSURE_CONNECTION) as ec, \
+                patch('time.monotonic', side_effect=range(100)):
+            ec.side_effect = OperationalError
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', timeout=3, stdout=StringIO())
+
+        self.assertEqual(ts.call_count, 2)
+
+    def test_wait_for_db_migrations(self):
+        """Test the unapplied migrations are reported"""
+        migration = Migration('0099_pending', 'core')
+        with patch(
+            'django.db.migrations.executor.MigrationExecutor.migration_plan',
+            return_value=[(migration, False)]
+        ):
+            out = StringIO()
+            call_command('wait_for_db', stdout=out)
+            self.assertIn('1 unapplied migrations: core.0099_pending',
+                          out.getvalue())
+
+            with self.assertRaises(CommandError):
+                call_command(
+                    'wait_for_db',
+                    check_migrations=True,
+                    stdout=StringIO()
+                )
+
+    def test_wait_for_db_migrated(self):
+        """Test nothing is reported when the migrations are applied"""
+        out = StringIO()
+        call_command('wait_for_db', check_migrations=True, stdout=out)
+
+        self.assertNotIn('unapplied', out.getvalue())
+
+    def test_wait_for_db_warm_up(self):
+        """Test the warm-up builds the routes and model metadata"""
+        out = StringIO()
+        call_command('wait_for_db', warm_up=True, stdout=out)
+
+        self.assertIn('Warmed up apps in', out.getvalue())
+        self.assertIn('models in', out.getvalue())
+        self.assertIn(Recipe, warmup.build_model_metadata())
+
+    def test_warm_up_leaves_databases(self):
+        """Test the warm-up never connects, and connecting per worker
+        survives a database that is down"""
+        with patch(ENSURE_CONNECTION) as ensure_connection:
+            warmup.warm_up()
+        ensure_connection.assert_not_called()
+
+        with patch(ENSURE_CONNECTION, side_effect=OperationalError), \
+                self.assertLogs('core.warmup', 'WARNING'):
+            self.assertEqual(warmup.open_connections(), [])
+
+    def test_fill_pools(self):
+        """Test only the databases with a pool are connected to, and the
+        connections handed to the pools"""
+        self.assertEqual(warmup.fill_pools(), [])
+
+        connection = connections['default']
+        with patch.dict(connection.settings_dict, POOL_SIZE=2), \
+                patch(ENSURE_CONNECTION) as ensure_connection, \
+                patch.object(connection, 'close') as close:
+            self.assertEqual(warmup.fill_pools(), ['default'])
+
+        ensure_connection.assert_called_once_with()
+        close.assert_called_once_with()
+
+
+class SeedDataCommandTests(TestCase):
+
+    def seed(self, **options):
+        call_command(
+            'seed_data',
+            users=3,
+            recipes=4,
+            tags=5,
+            ingredients=6,
+            tags_per_recipe=2,
+            ingredients_per_recipe=3,
+            recipes_distribution='fixed',
+            tags_distribution='fixed',
+            ingredients_distribution='fixed',
+            batch_size=2,
+            stdout=StringIO(),
+            **options
+        )
+
+    def test_seed_data(self):
+        """Test the data is copied with the requested counts"""
+        self.seed()
+
+        self.assertEqual(get_user_model().objects.count(), 3)
+        self.assertEqual(Tag.objects.count(), 15)
+        self.assertEqual(Ingredient.objects.count(), 18)
+        self.assertEqual(Recipe.objects.count(), 12)
+        self.assertEqual(Recipe.tags.through.objects.count(), 24)
+        self.assertEqual(Recipe.ingredients.through.objects.count(), 36)
+        self.assertFalse(
+            Recipe.objects.filter(search_vector__isnull=True).exists()
+        )
+        user = get_user_model().objects.get(email='seed-0@example.com')
+        self.assertTrue(user.check_password('seed-password'))
+        for recipe in Recipe.objects.prefetch_related('tags', 'ingredients'):
+            for related in (*recipe.tags.all(), *recipe.ingredients.all()):
+                self.assertEqual(related.user_id, recipe.user_id)
+
+    def test_seed_data_reproducible(self):
+        """Test the same seed generates the same data"""
+        def snapshot():
+            return list(Recipe.objects.values_list(
+                'user__email', 'title', 'time_minutes', 'price',
+                'tags__name', 'ingredients__name'
+            ).order_by('id', 'tags__name', 'ingredients__name'))
+
+        self.seed(seed=7, skip_search_vectors=True)
+        first = snapshot()
+        get_user_model().objects.all().delete()
+        self.seed(seed=7, skip_search_vectors=True)
+
+        self.assertEqual(snapshot(), first)
+        self.assertTrue(
+            Recipe.objects.filter(search_vector__isnull=True).exists()
+        )
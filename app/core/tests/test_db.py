@@ -0,0 +1,112 @@
+from django.db import connection
+from django.test import TestCase
+
+from core.db import pool
+from core.db.backends.postgresql.base import DatabaseWrapper
+
+
+class DatabaseWrapperTests(TestCase):
+
+    def setUp(self):
+        self.wrappers = []
+
+    def tearDown(self):
+        for wrapper in self.wrappers:
+            wrapper.close()
+        pool.clear_pools()
+
+    def wrapper(self, **settings):
+        """Return a new connection to the test database, other than the one
+        the test runs in"""
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, **settings},
+            connection.alias
+        )
+        self.wrappers.append(wrapper)
+        return wrapper
+
+    def backend_pid(self, wrapper):
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            return cursor.fetchone()[0]
+
+    def terminate(self, pid):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [pid])
+
+    def test_health_check(self):
+        """Test a kept connection is replaced when it stopped working"""
+        wrapper = self.wrapper(CONN_MAX_AGE=60, HEALTH_CHECKS=True)
+        pid = self.backend_pid(wrapper)
+        wrapper.close_if_unusable_or_obsolete()
+        self.assertEqual(self.backend_pid(wrapper), pid)
+
+        wrapper.close_if_unusable_or_obsolete()
+        self.terminate(pid)
+
+        self.assertNotEqual(self.backend_pid(wrapper), pid)
+
+    def test_pool_reuses_connections(self):
+        """Test a connection goes back to the pool when a request ends"""
+        first = self.wrapper(POOL_SIZE=2, CONN_MAX_AGE=60)
+        pid = self.backend_pid(first)
+        first.close_if_unusable_or_obsolete()
+
+        self.assertIsNone(first.connection)
+        self.assertEqual(self.backend_pid(self.wrapper(
+            POOL_SIZE=2,
+            CONN_MAX_AGE=60
+        )), pid)
+
+    def test_pool_rolls_back(self):
+        """Test the pooled connections have no transaction left open"""
+        first = self.wrapper(POOL_SIZE=1, CONN_MAX_AGE=60)
+        first.set_autocommit(False)
+        pid = self.backend_pid(first)
+        first.close()
+        second = self.wrapper(POOL_SIZE=1, CONN_MAX_AGE=60)
+
+        self.assertEqual(self.backend_pid(second), pid)
+        self.assertTrue(second.get_autocommit())
+        with second.cursor() as cursor:
+            cursor.execute('SELECT now() = statement_timestamp()')
+            self.assertTrue(cursor.fetchone()[0])
+
+    def test_pool_size(self):
+        """Test the pool closes the connections it has no room for"""
+        wrappers = [
+            self.wrapper(POOL_SIZE=1, CONN_MAX_AGE=60) for _ in range(2)
+        ]
+        pids = [self.backend_pid(wrapper) for wrapper in wrappers]
+        for wrapper in wrappers:
+            wrapper.close_if_unusable_or_obsolete()
+
+        self.assertEqual(len(wrappers[0].pool.idle), 1)
+        self.assertEqual(
+            self.backend_pid(self.wrapper(POOL_SIZE=1, CONN_MAX_AGE=60)),
+            pids[0]
+        )
+
+    def test_pool_max_age(self):
+        """Test the connections older than CONN_MAX_AGE are not reused"""
+        first = self.wrapper(POOL_SIZE=1, CONN_MAX_AGE=0)
+        pid = self.backend_pid(first)
+        first.close_if_unusable_or_obsolete()
+
+        self.assertNotEqual(self.backend_pid(self.wrapper(
+            POOL_SIZE=1,
+            CONN_MAX_AGE=0
+        )), pid)
+
+    def test_pool_health_check(self):
+        """Test the pool drops the connections that stopped working"""
+        first = self.wrapper(POOL_SIZE=1, CONN_MAX_AGE=60, HEALTH_CHECKS=True)
+        pid = self.backend_pid(first)
+        first.close_if_unusable_or_obsolete()
+        self.terminate(pid)
+
+        self.assertNotEqual(self.backend_pid(self.wrapper(
+            POOL_SIZE=1,
+            CONN_MAX_AGE=60,
+            HEALTH_CHECKS=True
+        )), pid)
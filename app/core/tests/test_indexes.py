@@ -0,0 +1,188 @@
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Ingredient, Recipe, Tag
+from recipe import search
+
+
+USERS = 20
+ROWS_PER_USER = 250
+TAGS_PER_RECIPE = 3
+SEARCH_ROWS = 1000
+SEARCH_INDEXES = (
+    'recipe_search_vector_gin',
+    'core_recipe_title_trgm',
+    'core_tag_name_trgm',
+    'core_ingredient_name_trgm',
+)
+
+
+class QueryIndexTests(TestCase):
+    """Test the list queries are served by indexes on a large dataset"""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f'user{i}@somewhere.com')
+            for i in range(USERS)
+        )
+        for user in users:
+            tags = Tag.objects.bulk_create(
+                Tag(user=user, name=f'tag {i}') for i in range(ROWS_PER_USER)
+            )
+            ingredients = Ingredient.objects.bulk_create(
+                Ingredient(user=user, name=f'ingredient {i}')
+                for i in range(ROWS_PER_USER)
+            )
+            recipes = Recipe.objects.bulk_create(
+                Recipe(user=user, title=f'recipe {i}', time_minutes=10,
+                       price=5)
+                for i in range(ROWS_PER_USER)
+            )
+            Recipe.tags.through.objects.bulk_create(
+                Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+                for i, recipe in enumerate(recipes)
+                for tag in tags[i:i + TAGS_PER_RECIPE]
+            )
+            Recipe.ingredients.through.objects.bulk_create(
+                Recipe.ingredients.through(
+                    recipe_id=recipe.id,
+                    ingredient_id=ingredient.id
+                )
+                for i, recipe in enumerate(recipes)
+                for ingredient in ingredients[i:i + TAGS_PER_RECIPE]
+            )
+
+        cls.user = users[0]
+        cls.tag = tags[0]
+        cls.ingredient = ingredients[0]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'ANALYZE core_user, core_tag, core_ingredient, core_recipe, '
+                'core_recipe_tags, core_recipe_ingredients'
+            )
+
+    def assertIndexScan(self, queryset, index_name):
+        """Assert the query plan of a queryset scans an index"""
+        plan = queryset.explain()
+
+        self.assertIn(index_name, plan)
+        self.assertNotIn('Seq Scan', plan)
+
+    def test_tag_list_uses_index(self):
+        """Test listing the tags of a user scans (user, name, id)"""
+        self.assertIndexScan(
+            Tag.objects.filter(user=self.user).order_by('-name', '-id')[:100],
+            'tag_user_name_idx'
+        )
+
+    def test_ingredient_list_uses_index(self):
+        """Test listing the ingredients of a user scans (user, name, id)"""
+        self.assertIndexScan(
+            Ingredient.objects.filter(user=self.user)
+            .order_by('-name', '-id')[:100],
+            'ingredient_user_name_idx'
+        )
+
+    def test_recipe_list_uses_index(self):
+        """Test listing the recipes of a user scans (user, id)"""
+        self.assertIndexScan(
+            Recipe.objects.filter(user=self.user).order_by('-id')[:100],
+            'recipe_user_id_idx'
+        )
+
+    def test_recipes_by_tag_use_index(self):
+        """Test filtering recipes by tag scans the through table by tag"""
+        self.assertIndexScan(
+            Recipe.tags.through.objects.filter(tag_id=self.tag.id)
+            .values('recipe_id'),
+            'core_recipe_tags_tag_recipe_idx'
+        )
+
+    def test_recipes_by_ingredient_use_index(self):
+        """Test filtering recipes by ingredient scans the through table"""
+        self.assertIndexScan(
+            Recipe.ingredients.through.objects
+            .filter(ingredient_id=self.ingredient.id)
+            .values('recipe_id'),
+            'core_recipe_ingredients_ingredient_recipe_idx'
+        )
+
+
+class SearchIndexTests(TestCase):
+    """Test the recipe search is served by indexes for a user with many
+    recipes, tags and ingredients"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            'cook@somewhere.com',
+            'password123'
+        )
+
+        def word(prefix, i):
+            return hashlib.md5(f'{prefix}{i}'.encode()).hexdigest()[:10]
+
+        tags = Tag.objects.bulk_create(
+            Tag(user=cls.user, name=word('tag', i))
+            for i in range(SEARCH_ROWS)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(user=cls.user, name=word('ingredient', i))
+            for i in range(SEARCH_ROWS)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(user=cls.user, title=f'{word("recipe", i)} pie',
+                   time_minutes=10, price=5)
+            for i in range(SEARCH_ROWS)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe, tag in zip(recipes, tags)
+        )
+        Recipe.ingredients.through.objects.bulk_create(
+            Recipe.ingredients.through(
+                recipe_id=recipe.id,
+                ingredient_id=ingredient.id
+            )
+            for recipe, ingredient in zip(recipes, ingredients)
+        )
+        search.update_search_vectors(recipe.id for recipe in recipes)
+        with connection.cursor() as cursor:
+            # Nothing vacuums the GIN indexes within the test transaction,
+            # flush their pending lists for the planner to cost them
+            for index_name in SEARCH_INDEXES:
+                cursor.execute(
+                    'SELECT gin_clean_pending_list(%s::regclass)',
+                    [index_name]
+                )
+            cursor.execute(
+                'ANALYZE core_tag, core_ingredient, core_recipe, '
+                'core_recipe_tags, core_recipe_ingredients'
+            )
+
+    def test_recipe_search_uses_indexes(self):
+        """Test each part of the search UNION can scan its own index rather
+        than every recipe of the user.
+
+        The planner guesses a trigram match keeps 1% of the rows, which on
+        this little data is cheaper to scan, so sequential scans are
+        disabled to show the indexes the query can use.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+        try:
+            plan = search.search_recipes(
+                Recipe.objects.filter(user=self.user),
+                hashlib.md5(b'recipe7').hexdigest()[:10],
+                self.user
+            ).explain()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('RESET enable_seqscan')
+
+        for index_name in SEARCH_INDEXES:
+            self.assertIn(index_name, plan)
@@ -0,0 +1,98 @@
+import re
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def metrics(response):
+    """Return the Server-Timing metrics of a response by name"""
+    return {
+        metric.split(';')[0]: metric
+        for metric in response['Server-Timing'].split(', ')
+    }
+
+
+class ServerTimingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@londonappdev.com',
+            'testpass'
+        )
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample recipe',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_server_timing_header(self):
+        """Test the timings of a sampled request are sent and logged"""
+        with self.assertLogs('core.middleware', 'INFO') as logs, \
+                self.assertNumQueries(2):
+            res = self.client.get(RECIPE_URL)
+
+        timings = metrics(res)
+        self.assertEqual(
+            set(timings),
+            {'db', 'serialize', 'render', 'total'}
+        )
+        self.assertIn('desc="2 queries"', timings['db'])
+        for metric in timings.values():
+            self.assertRegex(metric, r';dur=\d+\.\d\d')
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].queries, 2)
+        self.assertEqual(logs.records[0].status, 200)
+        self.assertTrue(re.search(
+            r'GET /api/recipe/recipes/ 200 queries=2 .*render_ms=',
+            logs.output[0]
+        ))
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_server_timing_serializer_path(self):
+        """Test the instance serializers are timed too"""
+        with self.assertLogs('core.middleware', 'INFO'):
+            res = self.client.get(
+                reverse('recipe:recipe-detail', args=[Recipe.objects.get().pk])
+            )
+
+        self.assertIn('serialize', metrics(res))
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1, SERVER_TIMING_HEADER=False)
+    def test_server_timing_log_only(self):
+        """Test the header can be left out"""
+        with self.assertLogs('core.middleware', 'INFO'):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertFalse(res.has_header('Server-Timing'))
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0.5)
+    def test_server_timing_sampled(self):
+        """Test only the sampled requests are timed"""
+        with patch('random.random', side_effect=[0.7, 0.2]), \
+                self.assertLogs('core.middleware', 'INFO') as logs:
+            skipped = self.client.get(RECIPE_URL)
+            sampled = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertFalse(skipped.has_header('Server-Timing'))
+        self.assertTrue(sampled.has_header('Server-Timing'))
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_server_timing_disabled(self):
+        """Test nothing is timed when disabled"""
+        res = self.client.get(RECIPE_URL)
+
+        self.assertFalse(res.has_header('Server-Timing'))
@@ -65,6 +65,38 @@ class ModelTest(TestCase):
         )
         self.assertEqual(str(sample_ingredient), sample_ingredient.name)
 
+    def test_upsert_names(self):
+        """Test resolving names creates only the missing objects"""
+        user = sample_user()
+        salt = models.Ingredient.objects.create(user=user, name='Salt')
+
+        with self.assertNumQueries(1):
+            resolved = models.Ingredient.objects.upsert_names(
+                user,
+                ['salt', 'Pepper', 'SALT', 'pepper']
+            )
+
+        self.assertEqual(resolved['salt'], (salt, False))
+        self.assertEqual(resolved['SALT'], (salt, False))
+        pepper, created = resolved['Pepper']
+        self.assertTrue(created)
+        self.assertEqual(pepper.name, 'Pepper')
+        self.assertEqual(resolved['pepper'], (pepper, True))
+        self.assertEqual(
+            models.Ingredient.objects.filter(user=user).count(),
+            2
+        )
+
+    def test_upsert_names_per_user(self):
+        """Test the same name is a different object for another user"""
+        tag = models.Tag.objects.create(user=sample_user(), name='Vegan')
+        other = sample_user(email='other@somewhere.com')
+
+        resolved = models.Tag.objects.upsert_names(other, ['vegan'])
+
+        self.assertNotEqual(resolved['vegan'][0], tag)
+        self.assertTrue(resolved['vegan'][1])
+
     def test_recipe_str(self):
         """Test the Recipe string representation"""
         sample_recipe = models.Recipe.objects.create(
@@ -0,0 +1,82 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+
+class ORJSONTests(TestCase):
+
+    def assertRendersLikeDRF(self, data, accepted_media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type)
+        )
+
+    def test_render_matches_drf(self):
+        """Test the orjson renderer output is identical to DRF's"""
+        self.assertRendersLikeDRF({
+            'id': 1,
+            'title': 'Crème brûlée \u2028\u2029',
+            'price': Decimal('5.50'),
+            'created': datetime.datetime(
+                2020, 1, 2, 3, 4, 5, 600, tzinfo=datetime.timezone.utc
+            ),
+            'day': datetime.date(2020, 1, 2),
+            'uuid': uuid.UUID(int=1),
+            'label': gettext_lazy('Tags'),
+            'tags': (n for n in range(3)),
+            'huge': 2 ** 70,
+            1: None,
+        })
+
+    def test_render_empty(self):
+        """Test no data renders an empty body"""
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_render_indent(self):
+        """Test an indented response is still rendered"""
+        self.assertRendersLikeDRF(
+            {'a': [1, 2]},
+            'application/json; indent=4'
+        )
+
+    def test_parse(self):
+        """Test the orjson parser reads JSON bodies like DRF's"""
+        content = b'{"title":"Cr\\u00e8me","price":"5.50","tags":[1,2]}'
+
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(content)),
+            JSONParser().parse(io.BytesIO(content))
+        )
+
+    def test_parse_other_encoding(self):
+        """Test bodies in other charsets are decoded first"""
+        content = '{"title": "Crème"}'.encode('latin-1')
+
+        data = ORJSONParser().parse(
+            io.BytesIO(content),
+            parser_context={'encoding': 'latin-1'}
+        )
+
+        self.assertEqual(data, {'title': 'Crème'})
+
+    def test_parse_error(self):
+        """Test invalid JSON raises a parse error"""
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"title": NaN}'))
+
+    def test_api_uses_orjson(self):
+        """Test the API renders and parses with the configured classes"""
+        self.assertIn(ORJSONRenderer, api_settings.DEFAULT_RENDERER_CLASSES)
+        self.assertIn(ORJSONParser, api_settings.DEFAULT_PARSER_CLASSES)
@@ -0,0 +1,210 @@
+import json
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import RequestFactory, SimpleTestCase, TestCase, \
+    override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import caching
+from core.db import routers
+from core.models import Recipe, Tag
+
+RECIPE_URL = reverse('recipe:recipe-list')
+EXPORT_URL = reverse('recipe:recipe-export')
+
+REPLICA = 'replica-test'
+
+
+@override_settings(DATABASE_REPLICAS={REPLICA: 1})
+class ReplicaRouterTests(TestCase):
+    """Reads against a second database, written to separately, so the
+    tests can tell where a read went"""
+    multi_db = True
+
+    @classmethod
+    def setUpClass(cls):
+        settings_dict = {
+            **connections['default'].settings_dict,
+            'TEST': {'NAME': f'{connections["default"].settings_dict["NAME"]}'
+                             '_replica'},
+        }
+        connections.databases[REPLICA] = settings_dict
+        cls.replica_name = connections[REPLICA].settings_dict['NAME']
+        connections[REPLICA].creation.create_test_db(verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].creation.destroy_test_db(
+            cls.replica_name,
+            verbosity=0
+        )
+        del connections.databases[REPLICA]
+        delattr(connections._connections, REPLICA)
+
+    def setUp(self):
+        caches[settings.REPLICA_PIN_CACHE].clear()
+        self.user = get_user_model().objects.create_user(
+            'test@londonappdev.com',
+            'testpass'
+        )
+        token = Token.objects.create(user=self.user)
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='On the primary',
+            time_minutes=10,
+            price=5.00
+        )
+        # the replica lags behind, only the user and an older recipe made it
+        get_user_model().objects.using(REPLICA).create(
+            id=self.user.id,
+            email=self.user.email
+        )
+        # with an id of its own, to be cached apart from the primary's
+        Recipe.objects.using(REPLICA).create(
+            id=recipe.id + 10 ** 6,
+            user_id=self.user.id,
+            title='On the replica',
+            time_minutes=10,
+            price=5.00
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def titles(self):
+        res = self.client.get(RECIPE_URL)
+        return [recipe['title'] for recipe in res.data]
+
+    def test_reads_go_to_the_replica(self):
+        """Test the reads of safe requests are served by the replica while
+        the token is checked against the primary"""
+        self.assertEqual(self.titles(), ['On the replica'])
+
+    def test_export_reads_the_replica(self):
+        """Test the export streamed after the request is handled still
+        reads from the replica picked for the request"""
+        tag = Tag.objects.using(REPLICA).create(
+            user_id=self.user.id,
+            name='Replica tag'
+        )
+        Recipe.tags.through.objects.using(REPLICA).create(
+            recipe=Recipe.objects.using(REPLICA).get(),
+            tag=tag
+        )
+
+        res = self.client.get(EXPORT_URL)
+        rows = [
+            json.loads(line)
+            for line in b''.join(res.streaming_content).splitlines()
+        ]
+
+        self.assertEqual(
+            [(row['title'], row['tags']) for row in rows],
+            [('On the replica', ['Replica tag'])]
+        )
+
+    def test_writes_pin_to_the_primary(self):
+        """Test a user reads their writes during the pin window"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        res = self.client.post(RECIPE_URL, {
+            'title': 'Just created',
+            'time_minutes': 5,
+            'price': '3.00',
+            'tags': [tag.id],
+        })
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(
+            Recipe.objects.using(REPLICA).filter(title='Just created').count(),
+            0
+        )
+        self.assertEqual(
+            sorted(self.titles()),
+            ['Just created', 'On the primary']
+        )
+
+        caches[settings.REPLICA_PIN_CACHE].delete(
+            routers.pin_cache_key(self.user.id)
+        )
+        self.assertEqual(self.titles(), ['On the replica'])
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_pin_window(self):
+        """Test the pin window is configurable"""
+        self.client.patch(reverse('users:self'), {'name': 'New name'})
+
+        self.assertEqual(self.titles(), ['On the replica'])
+
+    def test_no_replicas(self):
+        """Test everything goes to the primary without replicas"""
+        with self.settings(DATABASE_REPLICAS={}):
+            self.assertEqual(self.titles(), ['On the primary'])
+
+    def test_outside_requests(self):
+        """Test the reads outside of requests go to the primary"""
+        self.assertEqual(
+            list(Recipe.objects.values_list('title', flat=True)),
+            ['On the primary']
+        )
+
+
+class WeightedReplicaTests(TestCase):
+
+    @override_settings(DATABASE_REPLICAS={'replica1': 3, 'replica2': 1})
+    def test_weighted_choice(self):
+        """Test the replica of a request is picked once, by weight"""
+        request = RequestFactory().get(RECIPE_URL)
+        request.user = get_user_model()(id=1)
+        router = routers.ReplicaRouter()
+
+        with patch('random.choices', return_value=['replica2']) as choices, \
+                routers.routing(request):
+            self.assertEqual(router.db_for_read(Recipe), 'replica2')
+            self.assertEqual(router.db_for_read(Tag), 'replica2')
+
+        choices.assert_called_once_with(
+            ['replica1', 'replica2'],
+            weights=[3, 1]
+        )
+        self.assertEqual(router.db_for_write(Recipe), 'default')
+
+
+class PinCacheTests(SimpleTestCase):
+
+    def test_process_cache_refused(self):
+        """Test replicas with a per process or missing pin cache fail"""
+        for caches_setting in (
+            {'default': {'BACKEND': caching.PROCESS_CACHES[0]}},
+            {'default': {'BACKEND': caching.PROCESS_CACHES[1]}},
+            {},
+        ):
+            with self.settings(DATABASE_REPLICAS={'replica1': 1},
+                               REPLICA_PIN_CACHE='default',
+                               CACHES=caches_setting):
+                with self.assertRaises(ImproperlyConfigured):
+                    routers.check_pin_cache()
+
+    @override_settings(REPLICA_PIN_CACHE='default', CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_shared_cache_required_with_replicas_only(self):
+        """Test a shared pin cache passes, any cache does without replicas"""
+        with self.settings(DATABASE_REPLICAS={}):
+            routers.check_pin_cache()
+
+        with self.settings(DATABASE_REPLICAS={'replica1': 1}, CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.memcached.'
+                           'MemcachedCache',
+            },
+        }):
+            routers.check_pin_cache()
@@ -0,0 +1,10 @@
+import tempfile
+
+# A cache seen by every process, unlike the local memory default, for the
+# tests of the caches only used when they are shared (see core.caching)
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(prefix='app-test-cache-'),
+    },
+}
@@ -0,0 +1,79 @@
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class Timing:
+    """Durations (in seconds), query count and other counts recorded during
+    a request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.durations = {}
+        self.counts = {}
+
+    def add(self, name, duration):
+        self.durations[name] = self.durations.get(name, 0) + duration
+
+    def count(self, name, value):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper counting and timing the queries"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.add('db', time.perf_counter() - start)
+
+
+def current():
+    """Return the timing of the request of this thread, None when it isn't
+    recorded"""
+    return getattr(_local, 'timing', None)
+
+
+@contextmanager
+def recording(timing):
+    """Make `timing` the current timing of this thread"""
+    previous, _local.timing = current(), timing
+    try:
+        yield timing
+    finally:
+        _local.timing = previous
+
+
+def count(name, value):
+    """Add `value` to a count of the current timing, if any"""
+    timing = current()
+    if timing is not None:
+        timing.count(name, value)
+
+
+@contextmanager
+def measure(name):
+    """Add the time spent in the block to the current timing, if any"""
+    timing = current()
+    if timing is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - start)
+
+
+class TimedDataMixin:
+    """Record the time a root serializer takes to build its `data` as the
+    `serialize` timing, nested serializers aren't measured twice as they
+    don't go through `data`"""
+
+    @property
+    def data(self):
+        with measure('serialize'):
+            return super().data
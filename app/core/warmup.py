@@ -0,0 +1,115 @@
+import logging
+import time
+from importlib import import_module
+
+from django.apps import apps
+from django.db import connections
+from django.db.utils import OperationalError
+from django.urls import URLPattern, URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def _views(patterns):
+    """Yield the callbacks of the URL patterns, recursively"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern.callback
+
+
+def import_apps():
+    """Import the modules Django only loads on the first request"""
+    for app_config in apps.get_app_configs():
+        for module in ('views', 'serializers', 'urls'):
+            try:
+                import_module(f'{app_config.name}.{module}')
+            except ModuleNotFoundError as error:
+                if error.name != f'{app_config.name}.{module}':
+                    raise
+
+
+def _populate(resolver):
+    """Build the reverse lookups of the resolver and the included ones"""
+    resolver.reverse_dict
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            _populate(pattern)
+
+
+def build_routes():
+    """Compile the URL patterns and their reverse lookups, return the
+    views they route to"""
+    resolver = get_resolver()
+    _populate(resolver)
+
+    return list(_views(resolver.url_patterns))
+
+
+def build_model_metadata():
+    """Fill the field caches of the models' Options, which the ORM and
+    every ModelSerializer introspect, return the models"""
+    models = apps.get_models()
+    for model in models:
+        model._meta.get_fields()
+        model._meta.get_fields(include_hidden=True)
+        model._meta.fields_map
+
+    return models
+
+
+def open_connections(aliases=None):
+    """Connect the current thread to the `aliases` databases, all by
+    default, return the aliases connected to.
+
+    Connections are per thread and must not cross a fork, call this in
+    each worker after forking, never before. A database that is down is
+    logged and left to connect on demand.
+    """
+    connected = []
+    for alias in connections if aliases is None else aliases:
+        try:
+            connections[alias].ensure_connection()
+        except OperationalError:
+            logger.warning('Could not connect to %s', alias, exc_info=True)
+        else:
+            connected.append(alias)
+
+    return connected
+
+
+def fill_pools():
+    """Connect to the databases with a POOL_SIZE and hand the connections
+    to their pools, for the first request threads of the worker to reuse,
+    return the aliases connected to"""
+    connected = open_connections([
+        alias for alias in connections
+        if connections[alias].settings_dict.get('POOL_SIZE')
+    ])
+    for alias in connected:
+        # closing gives the connection back to the pool
+        connections[alias].close()
+
+    return connected
+
+
+def _timed(durations, name, step, *args):
+    """Run a warm-up step, recording its duration"""
+    start = time.perf_counter()
+    result = step(*args)
+    durations[name] = time.perf_counter() - start
+
+    return result
+
+
+def warm_up():
+    """Do the work the first requests of a new process would pay for,
+    without touching the databases so it is safe before forking, return
+    the duration of each step in seconds"""
+    durations = {}
+    _timed(durations, 'apps', import_apps)
+    _timed(durations, 'routes', build_routes)
+    _timed(durations, 'models', build_model_metadata)
+
+    return durations
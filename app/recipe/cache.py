@@ -0,0 +1,111 @@
+import time
+
+from django.conf import settings
+
+from core import caching, timing
+
+# Bump whenever the serialized shape of a recipe changes so stale
+# representations from a previous deploy are never served
+REPRESENTATION_VERSION = 1
+
+# Names of the cached representations, one per recipe serializer
+REPRESENTATIONS = ('recipe', 'recipe-detail')
+
+
+def get_representation_cache():
+    """Return the cache holding the serialized recipes and the versions,
+    None unless it is shared by the processes: a change would only be seen
+    by the process that handled it"""
+    return caching.shared_cache(settings.RECIPE_CACHE)
+
+
+def representation_key(name, recipe_id):
+    """Return the cache key of a serialized recipe"""
+    return f'recipe-repr:{REPRESENTATION_VERSION}:{name}:{recipe_id}'
+
+
+def get_many(name, recipe_ids):
+    """Return the cached representations of the recipes as {id: data},
+    counting the hits and misses in the timing of the request"""
+    keys = {representation_key(name, pk): pk for pk in recipe_ids}
+    cache = get_representation_cache()
+    if cache is None:
+        return {}
+
+    found = cache.get_many(keys)
+    # reported for tuning by core.middleware.ServerTimingMiddleware
+    timing.count('cache_hits', len(found))
+    timing.count('cache_misses', len(keys) - len(found))
+
+    return {keys[key]: data for key, data in found.items()}
+
+
+def set_many(name, representations):
+    """Cache the {id: data} representations of the recipes"""
+    cache = get_representation_cache()
+    if cache is None:
+        return
+
+    cache.set_many(
+        {
+            representation_key(name, pk): data
+            for pk, data in representations.items()
+        },
+        settings.RECIPE_CACHE_TTL
+    )
+
+
+def version_key(scope):
+    """Return the cache key of a version, e.g. of `user:1` or `recipe:1`"""
+    return f'recipe-version:{scope}'
+
+
+def get_version(scope):
+    """Return the version of a scope, the timestamp of its last change,
+    None without a shared cache to keep it.
+
+    A scope unknown to the cache (never changed or evicted) starts a new
+    version, which can only cause a spurious miss, never a stale hit.
+    """
+    key = version_key(scope)
+    cache = get_representation_cache()
+    if cache is None:
+        return None
+
+    cache.add(key, time.time(), None)
+
+    return cache.get(key)
+
+
+def touch(scopes):
+    """Start a new version of the scopes"""
+    cache = get_representation_cache()
+    if cache is None:
+        return
+
+    now = time.time()
+    cache.set_many(
+        {version_key(scope): now for scope in scopes},
+        None
+    )
+
+
+def invalidate_recipes(recipe_ids):
+    """Drop every cached representation of the recipes and bump their
+    versions"""
+    cache = get_representation_cache()
+    if cache is None:
+        return
+
+    recipe_ids = list(recipe_ids)
+    cache.delete_many([
+        representation_key(name, pk)
+        for pk in recipe_ids
+        for name in REPRESENTATIONS
+    ])
+    touch(f'recipe:{pk}' for pk in recipe_ids)
+
+
+def invalidate_user(user_id):
+    """Bump the version of the recipes, tags and ingredients of a user"""
+    touch([f'user:{user_id}'])
@@ -0,0 +1,92 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+
+from rest_framework.generics import get_object_or_404
+
+from recipe import cache
+
+
+class ConditionalGetMixin:
+    """Answer conditional list and retrieve requests (If-None-Match) with
+    304 Not Modified.
+
+    The ETag derives from the versions bumped by recipe.signals, so
+    checking it costs a cache lookup and never loads a row. Without a
+    shared RECIPE_CACHE to keep the versions there is no ETag. There is no
+    Last-Modified: its whole seconds can't tell apart two writes in the
+    same second.
+    """
+
+    def get_version_scope(self):
+        """Return the version scope of the requested resource"""
+        if self.action == 'retrieve':
+            return f'recipe:{self.kwargs[self.lookup_field]}'
+
+        return f'user:{self.request.user.pk}'
+
+    def get_etag(self, request):
+        """Return the ETag of the request, None without a version"""
+        version = cache.get_version(self.get_version_scope())
+        if version is None:
+            return None
+
+        key = ':'.join((
+            str(request.user.pk),
+            repr(version),
+            request.accepted_media_type,
+            request.get_full_path(),
+        ))
+
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    def check_not_modified(self, request):
+        """Raise unless the request may be answered with 304: the object
+        of a retrieve is looked up and authorized without loading it, a
+        304 would tell the recipes of other users exist"""
+        if self.action != 'retrieve':
+            return
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        obj = get_object_or_404(
+            self.get_queryset().prefetch_related(None).only('pk'),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, obj)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """Run `handler` unless the client copy is still fresh"""
+        etag = self.get_etag(request)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            self.check_not_modified(request)
+        else:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_vary_headers(response, ('Authorization', ))
+
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """Answer conditional list requests with 304 Not Modified"""
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    """Answer conditional retrieve requests with 304 Not Modified"""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,29 @@
+from django.db.models import Count, F, Q
+
+from core.models import Recipe
+
+
+def rank_by_coverage(queryset, ingredient_ids):
+    """Filter the recipes using any of the ingredients and annotate them
+    with how many of their ingredients are `matched` and `missing`.
+
+    The candidates are found through the (ingredient_id, recipe_id) index
+    of the through table, only their ingredients are then counted, in one
+    grouped aggregate.
+    """
+    ingredient_ids = list(ingredient_ids)
+    links = Recipe.ingredients.through.objects.filter(
+        ingredient_id__in=ingredient_ids
+    )
+
+    return queryset.filter(
+        pk__in=links.values('recipe_id')
+    ).annotate(
+        total=Count('ingredients'),
+        matched=Count(
+            'ingredients',
+            filter=Q(ingredients__in=ingredient_ids)
+        ),
+    ).annotate(
+        missing=F('total') - F('matched')
+    )
@@ -0,0 +1,116 @@
+import csv
+import zlib
+from itertools import islice
+
+import orjson
+
+from core.models import Recipe
+from recipe.rows import format_decimal
+
+# Columns of the exported recipes, tags and ingredients are lists of names
+COLUMNS = ('id', 'title', 'time_minutes', 'price', 'link', 'tags',
+           'ingredients')
+# What the tag and ingredient names are joined with in CSV cells
+CSV_LIST_SEPARATOR = ';'
+
+
+def related_names(field_name, recipe_ids, using=None):
+    """Return the names of the tags or ingredients of the recipes as
+    {recipe id: [name, ...]}, with one query on the `using` database"""
+    field = Recipe._meta.get_field(field_name)
+    through = field.remote_field.through
+    column = field.related_model._meta.model_name
+    names = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, name in through.objects.using(using).filter(
+        recipe_id__in=recipe_ids
+    ).order_by(f'{column}_id').values_list('recipe_id', f'{column}__name'):
+        names[recipe_id].append(name)
+
+    return names
+
+
+def export_rows(queryset, chunk_size):
+    """Yield the recipes of the queryset as dicts of COLUMNS, reading them
+    through a server side cursor and their tags and ingredients with one
+    query per chunk, all from the database of the queryset"""
+    rows = queryset.prefetch_related(None).values_list(
+        'id', 'title', 'time_minutes', 'price', 'link'
+    ).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+
+        ids = [row[0] for row in chunk]
+        tags = related_names('tags', ids, queryset.db)
+        ingredients = related_names('ingredients', ids, queryset.db)
+        for recipe_id, title, time_minutes, price, link in chunk:
+            yield {
+                'id': recipe_id,
+                'title': title,
+                'time_minutes': time_minutes,
+                'price': format_decimal(price),
+                'link': link,
+                'tags': tags[recipe_id],
+                'ingredients': ingredients[recipe_id],
+            }
+
+
+def ndjson_lines(rows):
+    """Yield each row as a line of JSON"""
+    for row in rows:
+        yield orjson.dumps(row) + b'\n'
+
+
+class _Line:
+    """File-like object handing back what the csv writer writes"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """Yield a header line then each row as a line of CSV"""
+    writer = csv.writer(_Line())
+    yield writer.writerow(COLUMNS).encode()
+    for row in rows:
+        yield writer.writerow([
+            CSV_LIST_SEPARATOR.join(row[column])
+            if column in ('tags', 'ingredients') else row[column]
+            for column in COLUMNS
+        ]).encode()
+
+
+# format -> (content type, function writing the rows as lines)
+FORMATS = {
+    'ndjson': ('application/x-ndjson', ndjson_lines),
+    'csv': ('text/csv', csv_lines),
+}
+
+
+def blocks(lines, size=64 * 1024):
+    """Join the lines into blocks of about `size` bytes, so the server
+    doesn't write them one by one"""
+    block = []
+    block_size = 0
+    for line in lines:
+        block.append(line)
+        block_size += len(line)
+        if block_size >= size:
+            yield b''.join(block)
+            block = []
+            block_size = 0
+
+    if block:
+        yield b''.join(block)
+
+
+def gzip_blocks(blocks):
+    """Compress a stream of blocks into a gzip stream"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
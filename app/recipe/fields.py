@@ -0,0 +1,97 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import six
+
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    """Resolve a list of primary keys with a single query.
+
+    The objects may be preloaded for a whole bulk payload by the parent
+    list serializer, see `preload_related_objects`.
+    """
+
+    def to_pk(self, item):
+        """Return the primary key `item` stands for"""
+        try:
+            return self.child_relation.get_queryset().model._meta.pk \
+                .to_python(item)
+        except (DjangoValidationError, TypeError, ValueError):
+            self.child_relation.fail(
+                'incorrect_type',
+                data_type=type(item).__name__
+            )
+
+    def get_objects(self, pks):
+        """Return the existing objects among the primary keys as {pk: obj}"""
+        preloaded = self.context.get('related_objects', {})
+        if self.field_name in preloaded:
+            return preloaded[self.field_name]
+
+        return self.child_relation.get_queryset().in_bulk(set(pks))
+
+    def to_internal_value(self, data):
+        if isinstance(data, six.text_type) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        pks = [self.to_pk(item) for item in data]
+        objects = self.get_objects(pks)
+        missing = [pk for pk in pks if pk not in objects]
+
+        if missing:
+            message = self.child_relation.error_messages['does_not_exist']
+            raise serializers.ValidationError(
+                [message.format(pk_value=pk) for pk in missing],
+                code='does_not_exist'
+            )
+
+        return [objects[pk] for pk in pks]
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key relation limited to the objects of the request user"""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+
+        return BatchedManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        request = self.context.get('request')
+        user = request.user if request else self.context.get('user')
+
+        return super().get_queryset().filter(user=user)
+
+
+def preload_related_objects(serializer, data):
+    """Resolve the primary keys of every item of a bulk payload with one
+    query per batched field, shared by all the items"""
+    preloaded = {}
+
+    for field_name, field in serializer.child.fields.items():
+        if field.read_only or not isinstance(field, BatchedManyRelatedField):
+            continue
+
+        pks = set()
+        for item in data:
+            values = item.get(field_name) if isinstance(item, dict) else None
+            if not isinstance(values, list):
+                continue
+            for value in values:
+                try:
+                    pks.add(field.to_pk(value))
+                except serializers.ValidationError:
+                    # reported when the item itself gets validated
+                    pass
+
+        preloaded[field_name] = field.child_relation.get_queryset() \
+            .in_bulk(pks)
+
+    return preloaded
@@ -0,0 +1,150 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+
+from core.models import Recipe
+
+from recipe import cache
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the pool of threads generating the image variants"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                thread_name_prefix='recipe-image'
+            )
+
+    return _executor
+
+
+def get_variant_formats():
+    """Return the configured formats this Pillow build can encode"""
+    Image.init()
+    return [
+        image_format for image_format in settings.RECIPE_IMAGE_VARIANT_FORMATS
+        if image_format in Image.SAVE
+    ]
+
+
+def variant_name(size, image_format):
+    """Return the name of a variant, e.g. `512-webp`"""
+    return f'{size}-{image_format.lower()}'
+
+
+def variant_file_path(image_name, size, image_format):
+    """Generate the file path of an image variant"""
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    filename = f'{stem}-{size}.{image_format.lower()}'
+
+    return os.path.join('uploads/recipe/variants/', filename)
+
+
+def variant_urls(recipe, request=None):
+    """Return the URLs of the variants of a recipe image generated so far
+    by variant name, absolute when a request is given"""
+    urls = {}
+    for name, path in recipe.image_variants.items():
+        url = default_storage.url(path)
+        urls[name] = request.build_absolute_uri(url) if request else url
+
+    return urls
+
+
+def delete_variants(paths):
+    """Delete the stored variant files"""
+    for path in paths:
+        try:
+            default_storage.delete(path)
+        except Exception:
+            logger.exception('Could not delete the image variant %s', path)
+
+
+def render_variants(image_file):
+    """Yield (size, format, encoded bytes) for every configured variant"""
+    sizes = sorted(settings.RECIPE_IMAGE_VARIANT_SIZES, reverse=True)
+
+    with Image.open(image_file) as image:
+        # let the JPEG decoder downscale while decoding, way cheaper than
+        # decoding the full image and resizing it afterwards
+        image.draft('RGB', (sizes[0], sizes[0]))
+        image = image.convert('RGB')
+
+        for size in sizes:
+            image.thumbnail((size, size), Image.LANCZOS)
+            for image_format in get_variant_formats():
+                buffer = io.BytesIO()
+                image.save(buffer, format=image_format, quality=85)
+                yield size, image_format, buffer.getvalue()
+
+
+def generate_variants(recipe_id, image_name, replaced=()):
+    """Delete the `replaced` variants of the previous image, then generate
+    and store those of the recipe image"""
+    variants = {}
+
+    try:
+        delete_variants(replaced)
+        with default_storage.open(image_name) as image_file:
+            for size, image_format, content in render_variants(image_file):
+                variants[variant_name(size, image_format)] = \
+                    default_storage.save(
+                        variant_file_path(image_name, size, image_format),
+                        ContentFile(content)
+                    )
+
+        # a newer upload may have replaced the image in the meantime
+        updated = Recipe.objects.filter(
+            pk=recipe_id,
+            image=image_name
+        ).update(image_variants=variants)
+        if updated:
+            cache.invalidate_recipes([recipe_id])
+        else:
+            delete_variants(variants.values())
+            variants = {}
+    except Exception:
+        logger.exception('Could not generate the variants of %s', image_name)
+    finally:
+        if settings.RECIPE_IMAGE_WORKERS:
+            connection.close()
+
+    return variants
+
+
+def schedule_variants(recipe, replaced=()):
+    """Generate the variants of a recipe image once the upload is
+    committed, in the worker pool unless RECIPE_IMAGE_WORKERS is 0. The
+    `replaced` variant files of the previous image are deleted first."""
+    recipe_id, image_name = recipe.pk, recipe.image.name
+    replaced = list(replaced)
+
+    def submit():
+        if settings.RECIPE_IMAGE_WORKERS:
+            get_executor().submit(
+                generate_variants,
+                recipe_id,
+                image_name,
+                replaced
+            )
+        else:
+            generate_variants(recipe_id, image_name, replaced)
+
+    transaction.on_commit(submit)
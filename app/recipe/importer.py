@@ -0,0 +1,192 @@
+import codecs
+import csv
+import gzip
+import zlib
+from itertools import islice
+
+import orjson
+
+from django.db import transaction
+
+from rest_framework import serializers
+
+from core.models import Tag, Ingredient, Recipe
+from recipe import cache, search
+from recipe.export import CSV_LIST_SEPARATOR
+
+FORMATS = ('ndjson', 'csv')
+# What reading a file that isn't UTF-8 text, or is a broken gzip stream,
+# raises along the way
+READ_ERRORS = (UnicodeDecodeError, OSError, EOFError, zlib.error)
+
+
+class UnreadableFile(Exception):
+    """The file could not be read to the end, the chunks before are
+    saved, `created` and `failed` tell how many rows"""
+
+    def __init__(self, message, created, failed):
+        super().__init__(message)
+        self.created = created
+        self.failed = failed
+
+
+class RecipeImportSerializer(serializers.ModelSerializer):
+    """Validate a recipe of an import file, its tags and ingredients are
+    given by name"""
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False
+    )
+    ingredients = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        required=False
+    )
+
+    class Meta:
+        model = Recipe
+        fields = ('title', 'time_minutes', 'price', 'link', 'tags',
+                  'ingredients')
+
+
+def guess_format(filename):
+    """Return the format of a file from its name, NDJSON by default"""
+    name = filename.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+
+    return 'csv' if name.endswith('.csv') else 'ndjson'
+
+
+def open_lines(binary, filename=''):
+    """Return the lines of a binary file as text, gunzipping it on the way
+    when the name says so"""
+    if filename.lower().endswith('.gz'):
+        binary = gzip.GzipFile(fileobj=binary)
+
+    return codecs.iterdecode(binary, 'utf-8-sig')
+
+
+def parse_ndjson(lines):
+    """Yield (line number, row, errors) for the lines of JSON objects"""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+
+        try:
+            row = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            yield number, line, {'non_field_errors': ['Invalid JSON.']}
+            continue
+
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, row, {'non_field_errors': ['Expected an object.']}
+
+
+def parse_csv(lines):
+    """Yield (line number, row, errors) for the rows of a CSV file with a
+    header, tags and ingredients are lists of names"""
+    reader = csv.DictReader(lines)
+    try:
+        for row in reader:
+            for column in ('tags', 'ingredients'):
+                row[column] = [
+                    name.strip()
+                    for name in (row.get(column) or '').split(
+                        CSV_LIST_SEPARATOR
+                    ) if name.strip()
+                ]
+            yield reader.line_num, row, None
+    except csv.Error as exc:
+        yield reader.line_num, None, {'non_field_errors': [str(exc)]}
+
+
+PARSERS = {'ndjson': parse_ndjson, 'csv': parse_csv}
+
+
+def save_chunk(user, chunk):
+    """Create the validated recipes of the user with their tags and
+    ingredients, resolved by name, in one transaction"""
+    recipes = []
+    with transaction.atomic():
+        related = {
+            field_name: model.objects.upsert_names(user, [
+                name for attrs in chunk for name in attrs.get(field_name, ())
+            ])
+            for field_name, model in (
+                ('tags', Tag),
+                ('ingredients', Ingredient),
+            )
+        }
+        for attrs in chunk:
+            attrs = dict(attrs)
+            for field_name in related:
+                attrs.pop(field_name, None)
+            recipes.append(Recipe(user=user, **attrs))
+
+        Recipe.objects.bulk_create(recipes)
+        for field_name, resolved in related.items():
+            field = Recipe._meta.get_field(field_name)
+            through = field.remote_field.through
+            target = f'{field.m2m_reverse_field_name()}_id'
+            through.objects.bulk_create([
+                through(recipe_id=recipe.pk, **{target: related_id})
+                for recipe, attrs in zip(recipes, chunk)
+                for related_id in dict.fromkeys(
+                    resolved[name][0].pk
+                    for name in attrs.get(field_name, ())
+                )
+            ])
+
+        # bulk_create sent no signal, do what they would have
+        search.update_search_vectors(recipe.pk for recipe in recipes)
+
+    return recipes
+
+
+def import_recipes(user, rows, chunk_size, on_error=None, on_chunk=None):
+    """Validate and create the recipes of parsed rows, `chunk_size` at a
+    time. `on_error(line, row, errors)` is called for each invalid row and
+    `on_chunk(created, failed)` after each chunk. Return how many recipes
+    were created and how many rows failed, raise UnreadableFile if the file
+    can't be read to the end."""
+    serializer = RecipeImportSerializer()
+    created = failed = 0
+    rows = iter(rows)
+    try:
+        while True:
+            chunk = []
+            try:
+                parsed = list(islice(rows, chunk_size))
+            except READ_ERRORS as exc:
+                raise UnreadableFile(
+                    f'The file could not be read after {created + failed} '
+                    f'rows: {exc}',
+                    created,
+                    failed
+                ) from exc
+            if not parsed:
+                break
+
+            for number, row, errors in parsed:
+                if errors is None:
+                    try:
+                        chunk.append(serializer.run_validation(row))
+                    except serializers.ValidationError as exc:
+                        errors = exc.detail
+
+                if errors is not None:
+                    failed += 1
+                    if on_error is not None:
+                        on_error(number, row, errors)
+
+            if chunk:
+                created += len(save_chunk(user, chunk))
+            if on_chunk is not None:
+                on_chunk(created, failed)
+    finally:
+        if created:
+            cache.invalidate_user(user.pk)
+
+    return created, failed
@@ -0,0 +1,125 @@
+import io
+import timeit
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Tag, Ingredient, Recipe
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+from recipe.serializers import RecipeDetailSerializer, RecipeImageSerializer
+
+
+class Command(BaseCommand):
+    """Compare the JSON renderers and parsers on recipe payloads"""
+    help = 'Time the stdlib and orjson JSON classes on recipe payloads'
+    renderers = (JSONRenderer, ORJSONRenderer)
+    parsers = (JSONParser, ORJSONParser)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+        # the image URLs are made absolute against this host, it has to be
+        # one of the ALLOWED_HOSTS
+        parser.add_argument('--host', default='localhost')
+
+    def handle(self, *args, **options):
+        # the recipes only exist for the time it takes to serialize them
+        with transaction.atomic():
+            payloads = self.build_payloads(
+                options['recipes'],
+                options['host']
+            )
+            transaction.set_rollback(True)
+
+        for name, data in payloads.items():
+            self.stdout.write(f'{name} ({len(data)} recipes)')
+            outputs = set()
+            for renderer_class in self.renderers:
+                renderer = renderer_class()
+                content = renderer.render(data)
+                outputs.add(content)
+                self.report(
+                    f'render {renderer_class.__name__}',
+                    lambda: renderer.render(data),
+                    options['repeat'],
+                    len(content)
+                )
+
+            for parser_class in self.parsers:
+                parser = parser_class()
+                self.report(
+                    f'parse {parser_class.__name__}',
+                    lambda: parser.parse(io.BytesIO(content)),
+                    options['repeat'],
+                    len(content)
+                )
+
+            if len(outputs) == 1:
+                self.stdout.write(self.style.SUCCESS('  output identical'))
+            else:
+                self.stdout.write(self.style.ERROR('  output differs'))
+
+    def report(self, label, func, repeat, size):
+        """Write the best time of `func` out of `repeat` runs"""
+        seconds = min(timeit.repeat(func, number=1, repeat=repeat))
+        self.stdout.write(
+            f'  {label:<24} {seconds * 1000:9.2f} ms '
+            f'{size / seconds / 1024 / 1024:9.1f} MB/s'
+        )
+
+    def build_payloads(self, count, host):
+        """Create `count` recipes and return their serialized forms"""
+        user = get_user_model().objects.create_user(
+            f'benchmark-{uuid.uuid4().hex}@localhost',
+            uuid.uuid4().hex
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(user=user, name=f'Tag ñ {i}') for i in range(20)
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(user=user, name=f'Ingredient {i}') for i in range(50)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(
+                user=user,
+                title=f'Recipe {i} – crème brûlée',
+                time_minutes=i % 120,
+                price=Decimal(i % 5000) / 100,
+                link=f'https://example.com/recipes/{i}',
+                image=f'uploads/recipe/{uuid.uuid4()}.jpg'
+            ) for i in range(count)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe=recipe, tag=tags[(i + n) % 20])
+            for i, recipe in enumerate(recipes) for n in range(3)
+        )
+        Recipe.ingredients.through.objects.bulk_create(
+            Recipe.ingredients.through(
+                recipe=recipe,
+                ingredient=ingredients[(i + n) % 50]
+            )
+            for i, recipe in enumerate(recipes) for n in range(8)
+        )
+
+        recipes = Recipe.objects.filter(user=user).order_by('-id') \
+            .prefetch_related('tags', 'ingredients')
+        request = RequestFactory().get('/', HTTP_HOST=host)
+        context = {'request': request}
+        # bypass the representation cache, the ids won't exist afterwards
+        detail = RecipeDetailSerializer(context=context)
+        return {
+            'recipe-detail': [
+                detail.build_representation(recipe) for recipe in recipes
+            ],
+            'recipe-image': RecipeImageSerializer(
+                recipes, many=True, context=context
+            ).data,
+        }
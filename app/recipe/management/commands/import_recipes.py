@@ -0,0 +1,78 @@
+import sys
+import time
+
+import orjson
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe import importer
+
+
+class Command(BaseCommand):
+    """Django command to import the recipes of a user from a file"""
+    help = 'Create recipes from an NDJSON or CSV file, as exported'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email of the owner')
+        parser.add_argument('path', help='File to import, - for stdin')
+        parser.add_argument('--input', choices=importer.FORMATS,
+                            help='Format of the file, guessed from its name '
+                                 'by default')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Recipes created per transaction')
+        parser.add_argument('--errors',
+                            help='Write the invalid rows to this NDJSON file')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}')
+
+        path = options['path']
+        input_format = options['input'] or importer.guess_format(path)
+        errors = open(options['errors'], 'wb') if options['errors'] else None
+        binary = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        start = time.perf_counter()
+
+        def on_error(line, row, row_errors):
+            if errors is not None:
+                errors.write(orjson.dumps({
+                    'line': line,
+                    'row': row,
+                    'errors': row_errors,
+                }) + b'\n')
+
+        def on_chunk(created, failed):
+            elapsed = max(time.perf_counter() - start, 1e-6)
+            self.stdout.write(
+                f'{created} created, {failed} failed, '
+                f'{(created + failed) / elapsed:.0f} rows/s'
+            )
+
+        try:
+            created, failed = importer.import_recipes(
+                user,
+                importer.PARSERS[input_format](
+                    importer.open_lines(binary, path)
+                ),
+                options['chunk_size'],
+                on_error=on_error,
+                on_chunk=on_chunk
+            )
+        except importer.UnreadableFile as exc:
+            raise CommandError(
+                f'{exc}. {exc.created} recipes were imported, '
+                f'{exc.failed} rows failed'
+            )
+        finally:
+            if binary is not sys.stdin.buffer:
+                binary.close()
+            if errors is not None:
+                errors.close()
+
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(
+            f'Imported {created} recipes, {failed} rows failed'
+        ))
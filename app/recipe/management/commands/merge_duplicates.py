@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import Tag, Ingredient, Recipe
+from recipe import cache, search
+
+
+class Command(BaseCommand):
+    """Merge the tags and ingredients of a user whose names only differ by
+    case into the oldest one, repointing the recipes to it"""
+    help = 'Merge duplicate tags and ingredients, migration 0010 merges ' \
+           'them too'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the duplicates without merging them'
+        )
+
+    def handle(self, *args, **options):
+        for model, field in (
+            (Tag, Recipe.tags.field),
+            (Ingredient, Recipe.ingredients.field),
+        ):
+            with transaction.atomic():
+                merged, recipe_ids, user_ids = self.merge(model, field)
+
+                if options['dry_run']:
+                    transaction.set_rollback(True)
+                else:
+                    # the raw SQL sent no signal, do what they would have
+                    search.update_search_vectors(recipe_ids)
+                    cache.invalidate_recipes(recipe_ids)
+                    for user_id in user_ids:
+                        cache.invalidate_user(user_id)
+
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {merged} duplicates '
+                f'of {len(user_ids)} users, {len(recipe_ids)} recipes '
+                f'{"to repoint" if options["dry_run"] else "repointed"}'
+            )
+
+    def merge(self, model, field):
+        """Merge the duplicates of `model`, return how many there were and
+        the ids of the recipes and users they belonged to"""
+        quote = connection.ops.quote_name
+        names = {
+            'table': quote(model._meta.db_table),
+            'merge': quote(f'{model._meta.db_table}_merge'),
+            'through': quote(field.m2m_db_table()),
+            'recipe': quote(field.m2m_column_name()),
+            'related': quote(field.m2m_reverse_name()),
+        }
+
+        with connection.cursor() as cursor:
+            # duplicate id -> id of the oldest object of the same name
+            cursor.execute("""
+                CREATE TEMPORARY TABLE {merge} AS
+                SELECT id, keep_id, user_id FROM (
+                    SELECT id, user_id, min(id) OVER (
+                        PARTITION BY user_id, lower(name)
+                    ) AS keep_id
+                    FROM {table}
+                ) AS grouped
+                WHERE id <> keep_id
+            """.format(**names))
+            cursor.execute('SELECT DISTINCT user_id FROM {merge}'.format(
+                **names
+            ))
+            user_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute("""
+                SELECT DISTINCT t.{recipe} FROM {through} t
+                JOIN {merge} m ON t.{related} = m.id
+            """.format(**names))
+            recipe_ids = [row[0] for row in cursor.fetchall()]
+
+            cursor.execute("""
+                INSERT INTO {through} ({recipe}, {related})
+                SELECT t.{recipe}, m.keep_id FROM {through} t
+                JOIN {merge} m ON t.{related} = m.id
+                ON CONFLICT DO NOTHING
+            """.format(**names))
+            cursor.execute("""
+                DELETE FROM {through}
+                WHERE {related} IN (SELECT id FROM {merge})
+            """.format(**names))
+            cursor.execute("""
+                DELETE FROM {table} WHERE id IN (SELECT id FROM {merge})
+            """.format(**names))
+            merged = cursor.rowcount
+            cursor.execute('DROP TABLE {merge}'.format(**names))
+
+        return merged, recipe_ids, user_ids
@@ -0,0 +1,98 @@
+from rest_framework import mixins, serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core.timing import measure
+from recipe.rows import RowSerializer
+
+
+def boolean_param(request, name, default):
+    """Return the `name` query parameter as a boolean, `default` when it
+    is missing, a validation error on the parameter when it is invalid"""
+    try:
+        return serializers.BooleanField().to_internal_value(
+            request.query_params.get(name, default)
+        )
+    except ValidationError as error:
+        raise ValidationError({name: error.detail})
+
+
+class BulkCreateModelMixin(mixins.CreateModelMixin):
+    """Create a model instance, or many of them from a list payload.
+
+    Lists are all-or-nothing by default, with `?atomic=0` the valid items
+    are created and the errors of the others are reported by position.
+    """
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            self.perform_create(serializer)
+
+            # serializers resolving existing objects tell if they created one
+            return Response(
+                serializer.data,
+                status=(
+                    status.HTTP_201_CREATED
+                    if getattr(serializer, 'created', True)
+                    else status.HTTP_200_OK
+                ),
+                headers=self.get_success_headers(serializer.data)
+            )
+
+        context = self.get_serializer_context()
+        context['atomic'] = self._get_atomic(request)
+        serializer = self.get_serializer_class()(
+            data=request.data,
+            many=True,
+            context=context
+        )
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+
+        if context['atomic']:
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        return Response(
+            {'created': serializer.data, 'errors': serializer.item_errors},
+            status=(
+                status.HTTP_201_CREATED if serializer.validated_data
+                else status.HTTP_400_BAD_REQUEST
+            )
+        )
+
+    def _get_atomic(self, request):
+        """Return the `atomic` query parameter as a boolean"""
+        return boolean_param(request, 'atomic', True)
+
+
+class ValuesListMixin(mixins.ListModelMixin):
+    """List objects from `.values()` rows instead of model instances.
+
+    The representations are identical, views whose serializer has fields
+    the rows can't provide fall back to the regular list.
+    """
+
+    def list(self, request, *args, **kwargs):
+        rows = RowSerializer(self.get_serializer())
+        if not rows.supported:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is None:
+            with measure('serialize'):
+                data = rows.to_representation(rows.values(queryset))
+            return Response(data)
+
+        # the cursor is read from the fields the pagination orders by
+        ordering = self.paginator.get_ordering(request, queryset, self)
+        page = self.paginate_queryset(rows.values(
+            queryset,
+            *(name.lstrip('-') for name in ordering)
+        ))
+
+        with measure('serialize'):
+            data = rows.to_representation(page)
+
+        return self.get_paginated_response(data)
@@ -0,0 +1,134 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+from rest_framework.response import Response
+
+
+class LinkHeaderCursorPagination(CursorPagination):
+    """Cursor pagination that advertises the next/previous pages in a
+    `Link` header, keeping the response body a plain list"""
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_paginated_response(self, data):
+        """Return the page with the cursors in a Link header"""
+        links = []
+        next_link = self.get_next_link()
+        previous_link = self.get_previous_link()
+
+        if next_link:
+            links.append(f'<{next_link}>; rel="next"')
+        if previous_link:
+            links.append(f'<{previous_link}>; rel="prev"')
+
+        headers = {'Link': ', '.join(links)} if links else None
+        return Response(data, headers=headers)
+
+
+class KeysetCursorPagination(LinkHeaderCursorPagination):
+    """Cursor pagination positioned on every field of the ordering.
+
+    The plain cursor only remembers the first field and skips the rows
+    tied on it with an OFFSET, which grows with the ties. The position here
+    is the whole ordering tuple, unique thanks to the trailing id, so the
+    next page starts right after it whatever the ties.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        # the positions are unique, the offset of the cursor is never set
+        _, reverse, position = self.cursor or (0, False, None)
+
+        queryset = queryset.order_by(*(
+            _reverse_ordering(self.ordering) if reverse else self.ordering
+        ))
+        if position is not None:
+            queryset = self._filter_after(queryset, position, reverse)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if len(results) > len(self.page) else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = True, position
+            self.has_previous = following is not None
+            self.previous_position = following
+        else:
+            self.has_next = following is not None
+            self.next_position = following
+            self.has_previous = position is not None
+            self.previous_position = position
+
+        return self.page
+
+    def _filter_after(self, queryset, position, reverse):
+        """Filter the rows following `position` in the queryset order"""
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or \
+                    len(values) != len(self.ordering):
+                raise ValueError(position)
+
+            # (a, b) follows (x, y) when a > x, or a = x and b > y
+            following = None
+            for order, value in reversed(list(zip(self.ordering, values))):
+                name = order.lstrip('-')
+                lookup = 'lt' if order.startswith('-') != reverse else 'gt'
+                after = Q(**{f'{name}__{lookup}': value})
+                if following is not None:
+                    after |= Q(**{name: value}) & following
+                following = after
+
+            # the first field bounded alone is a range of the index
+            return queryset.filter(
+                Q(**{f'{name}__{lookup}e': value}),
+                following
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        names = [order.lstrip('-') for order in ordering]
+        if isinstance(instance, dict):
+            values = [instance[name] for name in names]
+        else:
+            values = [getattr(instance, name) for name in names]
+
+        # decimals are written as strings, to be read back exactly
+        return json.dumps(values, cls=DjangoJSONEncoder)
+
+
+class RecipePagination(KeysetCursorPagination):
+    """Paginate recipes newest first, best first for search results, or
+    fewest missing ingredients first for the cookable ones"""
+    ordering = ('-id', )
+
+    def get_ordering(self, request, queryset, view):
+        if 'missing' in queryset.query.annotations:
+            return ('missing', '-matched', '-id')
+        if 'rank' in queryset.query.annotations:
+            return ('-rank', '-id')
+
+        return super().get_ordering(request, queryset, view)
+
+
+class NamePagination(KeysetCursorPagination):
+    """Paginate tags and ingredients by name, using the id as tie breaker"""
+    ordering = ('-name', '-id')
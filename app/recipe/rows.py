@@ -0,0 +1,206 @@
+from django.contrib.postgres.fields import ArrayField
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import OuterRef, Subquery
+
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from recipe import cache
+
+
+class Array(Subquery):
+    """Collect the single column rows of a subquery into an array"""
+    template = 'ARRAY(%(subquery)s)'
+
+    def __init__(self, queryset, output_field=None, **extra):
+        super().__init__(
+            queryset,
+            output_field or ArrayField(models.IntegerField()),
+            **extra
+        )
+
+
+def format_decimal(value):
+    """Format a decimal like DecimalField with coerce_to_string"""
+    return '{:f}'.format(value)
+
+
+class RowSerializer:
+    """Build the representations of a read only serializer straight from
+    `.values()` rows, without model instances or per field calls.
+
+    Only model columns and many to many relations, as primary keys or
+    nested serializers of model columns, are supported. `supported` is
+    False when the serializer has other fields.
+    """
+
+    def __init__(self, serializer):
+        self.serializer = serializer
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.cache_name = getattr(
+            serializer,
+            'representation_cache_name',
+            None
+        )
+        # field name -> (values() key, conversion or None)
+        self.columns = {}
+        # field name -> the many to many model field
+        self.relations = {}
+        # field name -> RowSerializer of the nested related objects
+        self.nested = {}
+        self.supported = all(
+            self.add_field(field) for field in serializer._readable_fields
+        )
+        self.names = [
+            field.field_name for field in serializer._readable_fields
+        ]
+
+    def add_field(self, field):
+        """Plan how to read `field` from a row, False if it can't be"""
+        if field.source == '*' or len(field.source_attrs) != 1:
+            return False
+
+        try:
+            model_field = self.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return False
+
+        if isinstance(field, serializers.ListSerializer):
+            if not isinstance(model_field, models.ManyToManyField) \
+                    or not isinstance(
+                        field.child, serializers.ModelSerializer
+                    ):
+                return False
+
+            nested = RowSerializer(field.child)
+            if not nested.supported or nested.relations or nested.cache_name:
+                return False
+
+            self.relations[field.field_name] = model_field
+            self.nested[field.field_name] = nested
+            return True
+
+        if isinstance(field, serializers.ManyRelatedField):
+            child = field.child_relation
+            if not isinstance(model_field, models.ManyToManyField) \
+                    or not isinstance(
+                        child, serializers.PrimaryKeyRelatedField
+                    ) or child.pk_field is not None:
+                return False
+
+            self.relations[field.field_name] = model_field
+            return True
+
+        if model_field.is_relation:
+            return False
+
+        if isinstance(field, (serializers.CharField,
+                              serializers.IntegerField,
+                              serializers.BooleanField)):
+            # their to_representation leaves database values unchanged
+            convert = None
+        elif isinstance(field, serializers.DecimalField) \
+                and not field.localize and getattr(
+                    field,
+                    'coerce_to_string',
+                    api_settings.COERCE_DECIMAL_TO_STRING
+                ):
+            # the database already rounds to the field's decimal places
+            convert = format_decimal
+        else:
+            return False
+
+        self.columns[field.field_name] = (model_field.attname, convert)
+        return True
+
+    def values(self, queryset, *keys):
+        """Return the rows of `queryset` with the columns of the fields and
+        the extra `keys`, e.g. those the pagination orders by"""
+        names = [self.pk]
+        for key, _ in self.columns.values():
+            names.append(key)
+        names.extend(keys)
+
+        return queryset.prefetch_related(None).values(
+            *dict.fromkeys(names)
+        )
+
+    def related_ids(self, pks):
+        """Return the ids of the many to many relations of the objects as
+        {pk: {field name: [ids]}}, in one query"""
+        if not self.relations or not pks:
+            return {}
+
+        arrays = {}
+        for name, model_field in self.relations.items():
+            through = model_field.remote_field.through
+            target = f'{model_field.m2m_reverse_field_name()}_id'
+            # annotations can't be named after the model fields
+            arrays[f'{name}_ids'] = Array(
+                through.objects.filter(**{
+                    model_field.m2m_field_name(): OuterRef('pk')
+                }).order_by(target).values(target)
+            )
+
+        rows = self.model._default_manager.filter(
+            pk__in=pks
+        ).annotate(**arrays).values_list(self.pk, *arrays)
+
+        related = {
+            row[0]: dict(zip(self.relations, row[1:])) for row in rows
+        }
+        for name, nested in self.nested.items():
+            self.nest_related(related, name, nested)
+
+        return related
+
+    def nest_related(self, related, name, nested):
+        """Replace the ids of the `name` relation with the nested
+        representations of the objects, fetched in one query"""
+        pks = {pk for ids in related.values() for pk in ids[name]}
+        model = self.relations[name].remote_field.model
+        rows = list(
+            nested.values(model._default_manager.filter(pk__in=pks))
+        )
+        objects = dict(zip(
+            (row[nested.pk] for row in rows),
+            nested.to_representation(rows)
+        ))
+
+        for ids in related.values():
+            ids[name] = [objects[pk] for pk in ids[name]]
+
+    def build(self, row, related):
+        """Return the representation of a single row"""
+        data = {}
+        for name in self.names:
+            if name in self.relations:
+                data[name] = related.get(name, [])
+                continue
+
+            key, convert = self.columns[name]
+            value = row[key]
+            data[name] = value if value is None or convert is None \
+                else convert(value)
+
+        return data
+
+    def to_representation(self, rows):
+        """Return the representations of the rows, in order"""
+        pks = [row[self.pk] for row in rows]
+        found = cache.get_many(self.cache_name, pks) if self.cache_name \
+            else {}
+        missing = [row for row in rows if row[self.pk] not in found]
+        related = self.related_ids([row[self.pk] for row in missing])
+        built = {
+            row[self.pk]: self.build(row, related.get(row[self.pk], {}))
+            for row in missing
+        }
+
+        if self.cache_name and built:
+            cache.set_many(self.cache_name, built)
+
+        found.update(built)
+        return [found[pk] for pk in pks]
@@ -0,0 +1,84 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, \
+                                           SearchVector, TrigramSimilarity
+from django.db.models import DecimalField, F, OuterRef, Subquery
+from django.db.models.functions import Cast
+
+from core.models import Ingredient, Recipe, Tag
+
+# Text search configuration of the recipe search vectors
+SEARCH_CONFIG = 'english'
+
+
+def _names(model):
+    """Return a subquery of the space separated names of the tags or
+    ingredients of the outer recipe"""
+    return Subquery(
+        model.objects.filter(recipe=OuterRef('pk'))
+        .order_by()
+        .values('recipe')
+        .annotate(names=StringAgg('name', ' '))
+        .values('names')
+    )
+
+
+def update_search_vectors(recipe_ids):
+    """Rebuild the search vectors of the recipes from their title (ranked
+    first) and the names of their tags and ingredients"""
+    Recipe.objects.filter(pk__in=list(recipe_ids)).update(
+        search_vector=(
+            SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+            SearchVector(
+                _names(Tag),
+                _names(Ingredient),
+                weight='B',
+                config=SEARCH_CONFIG
+            )
+        )
+    )
+
+
+def _matching_ids(text, query, user):
+    """Return the UNION of the ids of the user's recipes matching `text`.
+
+    Each part is served by its own index: the GIN index on the search
+    vector, the trigram indexes on the title and on the tag and ingredient
+    names. An OR of the conditions would scan every recipe of the user.
+    """
+    recipes = Recipe.objects.filter(user=user).order_by()
+    parts = [
+        recipes.filter(search_vector=query).values('pk'),
+        recipes.filter(title__trigram_similar=text).values('pk'),
+    ]
+    for field in (Recipe.tags.field, Recipe.ingredients.field):
+        related = field.m2m_reverse_field_name()
+        parts.append(
+            field.remote_field.through.objects.filter(**{
+                f'{related}__user': user,
+                f'{related}__name__trigram_similar': text,
+            }).order_by().values('recipe_id')
+        )
+
+    return parts[0].union(*parts[1:])
+
+
+def search_recipes(queryset, text, user):
+    """Filter the recipes of `user` matching `text` and annotate them with
+    a `rank`.
+
+    Full text matches go through the GIN index on the search vector and
+    misspellings through the trigram indexes on the title and the names,
+    only the matching recipes are ranked. The rank is a decimal of fixed
+    scale, for the pagination cursor to hold it exactly.
+    """
+    query = SearchQuery(text, config=SEARCH_CONFIG)
+
+    return queryset.filter(
+        pk__in=_matching_ids(text, query, user)
+    ).annotate(
+        rank=Cast(
+            SearchRank(F('search_vector'), query) +
+            TrigramSimilarity('title', text),
+            DecimalField(max_digits=12, decimal_places=9)
+        )
+    )
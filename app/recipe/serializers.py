@@ -1,32 +1,260 @@
+from django.db import models, transaction
+
 from rest_framework import serializers
+from rest_framework.utils import model_meta
 from core.models import Tag, Ingredient, Recipe
+from core.timing import TimedDataMixin
+
+from recipe import cache, images, search
+from recipe.fields import UserPrimaryKeyRelatedField, \
+                         preload_related_objects
+
+
+class BulkCreateListSerializer(TimedDataMixin, serializers.ListSerializer):
+    """Create a list of objects with one bulk insert per table.
+
+    With `atomic` set to False in the context the valid items are created
+    and the errors of the others are kept in `item_errors`.
+    """
+
+    def to_internal_value(self, data):
+        self.item_errors = []
+        if isinstance(data, list):
+            self._context['related_objects'] = preload_related_objects(
+                self,
+                data
+            )
+
+        if self.context.get('atomic', True) or not isinstance(data, list):
+            return super().to_internal_value(data)
+
+        ret = []
+        for item in data:
+            try:
+                ret.append(self.child.run_validation(item))
+            except serializers.ValidationError as exc:
+                self.item_errors.append(exc.detail)
+            else:
+                self.item_errors.append({})
+
+        return ret
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        info = model_meta.get_field_info(model)
+        many_to_many = [
+            field_name for field_name, relation in info.relations.items()
+            if relation.to_many and field_name in self.child.fields
+        ]
+
+        instances = []
+        relations = []
+        for attrs in validated_data:
+            attrs = dict(attrs)
+            relations.append({
+                field_name: attrs.pop(field_name, [])
+                for field_name in many_to_many
+            })
+            instances.append(model(**attrs))
+
+        with transaction.atomic():
+            model.objects.bulk_create(instances)
+            for field_name in many_to_many:
+                self._bulk_link(model, field_name, instances, relations)
+
+        models.prefetch_related_objects(instances, *many_to_many)
+        self.bulk_created(instances)
+
+        return instances
+
+    def bulk_created(self, instances):
+        """Do what the signals skipped by bulk_create would have done"""
+        for user_id in {instance.user_id for instance in instances}:
+            cache.invalidate_user(user_id)
+
+    def _bulk_link(self, model, field_name, instances, relations):
+        """Insert the through rows of a many to many field at once"""
+        field = model._meta.get_field(field_name)
+        through = field.remote_field.through
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+
+        through.objects.bulk_create([
+            through(**{source: instance.pk, target: related_id})
+            for instance, related in zip(instances, relations)
+            for related_id in dict.fromkeys(
+                obj.pk for obj in related[field_name]
+            )
+        ])
+
+
+class UpsertListSerializer(BulkCreateListSerializer):
+    """Resolve a list of tags or ingredients by name, creating the missing
+    ones with one statement per user"""
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        names = {}
+        for attrs in validated_data:
+            names.setdefault(attrs['user'], []).append(attrs['name'])
+
+        resolved = {
+            user: model.objects.upsert_names(user, user_names)
+            for user, user_names in names.items()
+        }
+        self.bulk_created([
+            instance
+            for user_resolved in resolved.values()
+            for instance, created in user_resolved.values() if created
+        ])
+
+        return [
+            resolved[attrs['user']][attrs['name']][0]
+            for attrs in validated_data
+        ]
+
+
+class UpsertNameMixin:
+    """Return the existing object of the same name instead of creating a
+    duplicate, `created` tells which happened"""
+
+    def create(self, validated_data):
+        user = validated_data['user']
+        name = validated_data['name']
+        instance, self.created = self.Meta.model.objects.upsert_names(
+            user,
+            [name]
+        )[name]
+
+        if self.created:
+            cache.invalidate_user(user.pk)
 
+        return instance
 
-class TagSerilizer(serializers.ModelSerializer):
+
+class TagSerilizer(TimedDataMixin,
+                   UpsertNameMixin,
+                   serializers.ModelSerializer):
     """Serializer for Tag object"""
 
     class Meta:
         model = Tag
         fields = ('id', 'name')
         read_only_fields = ('id', )
+        list_serializer_class = UpsertListSerializer
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedDataMixin,
+                           UpsertNameMixin,
+                           serializers.ModelSerializer):
     """Serilizer for Ingredient object"""
 
     class Meta:
         model = Ingredient
         fields = ('id', 'name')
         read_only_fields = ('id', )
+        list_serializer_class = UpsertListSerializer
+
+
+class CachedRepresentationListSerializer(BulkCreateListSerializer):
+    """Serialize a list of recipes from the representation cache, only
+    the cache misses are serialized, with one lookup for the whole list"""
+
+    def to_representation(self, data):
+        name = self.child.representation_cache_name
+        if name is None:
+            return super().to_representation(data)
+
+        items = list(
+            data.all() if isinstance(data, models.Manager) else data
+        )
+        cached = cache.get_many(name, [item.pk for item in items])
+        missing = {
+            item.pk: self.child.build_representation(item)
+            for item in items if item.pk not in cached
+        }
+
+        if missing:
+            cache.set_many(name, missing)
+            cached.update(missing)
+
+        return [cached[item.pk] for item in items]
+
+    def bulk_created(self, instances):
+        super().bulk_created(instances)
+        search.update_search_vectors(instance.pk for instance in instances)
+
+
+class CachedRepresentationMixin:
+    """Cache the representation of a recipe under its id"""
+    representation_cache_name = None
+
+    def to_representation(self, instance):
+        name = self.representation_cache_name
+        if name is None:
+            return self.build_representation(instance)
+
+        cached = cache.get_many(name, [instance.pk])
+
+        if instance.pk not in cached:
+            cached[instance.pk] = self.build_representation(instance)
+            cache.set_many(name, cached)
 
+        return cached[instance.pk]
 
-class RecipeSerializer(serializers.ModelSerializer):
+    def build_representation(self, instance):
+        """Serialize the recipe, bypassing the cache"""
+        return super().to_representation(instance)
+
+
+class SparseFieldsMixin:
+    """Keep only the `fields` asked for and nest the related objects of
+    the `expand` relations.
+
+    The trimmed or expanded representations differ from the cached ones,
+    they are always built.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sparse_fields = fields
+        self.expand = expand
+
+        if fields is not None or expand:
+            self.representation_cache_name = None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.expand:
+            fields[name] = self.expandable_fields[name](
+                many=True,
+                read_only=True
+            )
+
+        if self.sparse_fields is not None:
+            for name in list(fields):
+                if name not in self.sparse_fields:
+                    del fields[name]
+
+        return fields
+
+
+class RecipeSerializer(TimedDataMixin,
+                       SparseFieldsMixin,
+                       CachedRepresentationMixin,
+                       serializers.ModelSerializer):
     """Serialize a Recipe object"""
-    ingredients = serializers.PrimaryKeyRelatedField(
+    representation_cache_name = 'recipe'
+    expandable_fields = {
+        'tags': TagSerilizer,
+        'ingredients': IngredientSerializer,
+    }
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
@@ -41,18 +269,34 @@ class RecipeSerializer(serializers.ModelSerializer):
                   'price',
                   'link')
         read_only_fields = ('id', )
+        list_serializer_class = CachedRepresentationListSerializer
 
 
 class RecipeDetailSerializer(RecipeSerializer):
     """Serialize a recipe detail"""
+    representation_cache_name = 'recipe-detail'
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerilizer(many=True, read_only=True)
+    image_variants = serializers.SerializerMethodField()
 
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('image_variants', )
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+    def get_image_variants(self, recipe):
+        """Return the URLs of the variants generated so far, relative to
+        the site as the representation is cached"""
+        return images.variant_urls(recipe)
+
+
+class RecipeImageSerializer(TimedDataMixin, serializers.ModelSerializer):
     """Serializer for uploading images for Recipes"""
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'image_variants')
         read_only_fields = ('id', )
+
+    def get_image_variants(self, recipe):
+        """Return the URLs of the variants generated so far"""
+        return images.variant_urls(recipe, self.context.get('request'))
@@ -0,0 +1,87 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, \
+                                     pre_delete
+from django.dispatch import receiver
+
+from core.models import Ingredient, Recipe, Tag
+
+from recipe import cache, search
+
+
+def linked_recipe_ids(related):
+    """Return the ids of the recipes linked to a tag or ingredient"""
+    if isinstance(related, Tag):
+        links = Recipe.tags.through.objects.filter(tag_id=related.pk)
+    else:
+        links = Recipe.ingredients.through.objects.filter(
+            ingredient_id=related.pk
+        )
+
+    return list(links.values_list('recipe_id', flat=True))
+
+
+def recipes_changed(recipe_ids, user_id):
+    """Drop the cached representations of the recipes and bump the
+    versions of their owner"""
+    cache.invalidate_recipes(recipe_ids)
+    cache.invalidate_user(user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, **kwargs):
+    """Refresh the search vector and the caches of a saved recipe"""
+    search.update_search_vectors([instance.pk])
+    recipes_changed([instance.pk], instance.user_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    """Drop the cached representations of a deleted recipe"""
+    recipes_changed([instance.pk], instance.user_id)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def related_saved(sender, instance, created, **kwargs):
+    """Refresh the recipes nesting a saved tag/ingredient"""
+    recipe_ids = [] if created else linked_recipe_ids(instance)
+    search.update_search_vectors(recipe_ids)
+    recipes_changed(recipe_ids, instance.user_id)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def related_deleting(sender, instance, **kwargs):
+    """Remember the recipes of a tag/ingredient about to be deleted, the
+    through rows are cascaded by the time post_delete is sent"""
+    instance._linked_recipe_ids = linked_recipe_ids(instance)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def related_deleted(sender, instance, **kwargs):
+    """Refresh the recipes that nested a deleted tag/ingredient"""
+    recipe_ids = getattr(instance, '_linked_recipe_ids', [])
+    search.update_search_vectors(recipe_ids)
+    recipes_changed(recipe_ids, instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recipe_relations_changed(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    """Refresh the recipes whose tags or ingredients changed"""
+    if action == 'pre_clear' and reverse:
+        instance._linked_recipe_ids = linked_recipe_ids(instance)
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        recipe_ids = [instance.pk]
+    elif action == 'post_clear':
+        recipe_ids = instance._linked_recipe_ids
+    else:
+        recipe_ids = list(pk_set)
+
+    search.update_search_vectors(recipe_ids)
+    recipes_changed(recipe_ids, instance.user_id)
@@ -0,0 +1,213 @@
+import json
+import os
+import tempfile
+from importlib import import_module
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.utils import SHARED_CACHES
+from recipe import cache
+
+
+class CommandTests(TestCase):
+
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    def test_benchmark_json(self):
+        """Test the JSON benchmark reports identical renderer output"""
+        out = StringIO()
+
+        call_command('benchmark_json', recipes=5, repeat=1, stdout=out)
+
+        self.assertIn('ORJSONRenderer', out.getvalue())
+        self.assertIn('output identical', out.getvalue())
+        self.assertNotIn('output differs', out.getvalue())
+        self.assertFalse(Recipe.objects.exists())
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class MergeDuplicatesTests(TestCase):
+
+    def setUp(self):
+        cache.get_representation_cache().clear()
+        # duplicates predate the unique indexes, drop them for this test
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX core_tag_user_lower_name_uniq')
+            cursor.execute('DROP INDEX core_ingredient_user_lower_name_uniq')
+
+        self.user = get_user_model().objects.create_user(
+            'test@somewhere.com',
+            'testpassword'
+        )
+        self.other = get_user_model().objects.create_user(
+            'other@somewhere.com',
+            'testpassword'
+        )
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.salt_dups = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('salt', 'SALT')
+        ]
+        self.other_salt = Ingredient.objects.create(
+            user=self.other,
+            name='salt'
+        )
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.vegan_dup = Tag.objects.create(user=self.user, name='vegan')
+
+        self.recipe1 = Recipe.objects.create(
+            user=self.user,
+            title='Fries',
+            time_minutes=10,
+            price=5.00
+        )
+        self.recipe1.ingredients.add(self.salt, self.salt_dups[0])
+        self.recipe1.tags.add(self.vegan_dup)
+        self.recipe2 = Recipe.objects.create(
+            user=self.user,
+            title='Chips',
+            time_minutes=10,
+            price=5.00
+        )
+        self.recipe2.ingredients.add(self.salt_dups[1])
+
+    def test_merge_duplicates(self):
+        """Test duplicates are merged into the oldest and recipes repointed"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.get(reverse('recipe:recipe-list'))
+
+        call_command('merge_duplicates', stdout=StringIO())
+
+        self.assertEqual(
+            list(Ingredient.objects.filter(user=self.user)),
+            [self.salt]
+        )
+        self.assertEqual(list(Tag.objects.filter(user=self.user)), [
+            self.vegan
+        ])
+        self.assertTrue(Ingredient.objects.filter(
+            pk=self.other_salt.pk
+        ).exists())
+        self.assertEqual(list(self.recipe1.ingredients.all()), [self.salt])
+        self.assertEqual(list(self.recipe2.ingredients.all()), [self.salt])
+        self.assertEqual(list(self.recipe1.tags.all()), [self.vegan])
+
+        # the cached recipes were dropped
+        response = client.get(reverse('recipe:recipe-list'))
+        self.assertEqual(
+            [recipe['ingredients'] for recipe in response.data],
+            [[self.salt.id], [self.salt.id]]
+        )
+
+    def test_migration_merges_duplicates(self):
+        """Test the unique names migration merges the duplicates before
+        creating its indexes"""
+        migration = import_module('core.migrations.0010_unique_names')
+
+        with connection.cursor() as cursor:
+            for operation in migration.Migration.operations:
+                for sql in operation.sql if isinstance(
+                    operation.sql, list
+                ) else [operation.sql]:
+                    cursor.execute(sql)
+
+        self.assertEqual(
+            list(Ingredient.objects.filter(user=self.user)),
+            [self.salt]
+        )
+        self.assertEqual(list(Tag.objects.filter(user=self.user)), [
+            self.vegan
+        ])
+        self.assertEqual(list(self.recipe1.ingredients.all()), [self.salt])
+        self.assertEqual(list(self.recipe2.ingredients.all()), [self.salt])
+        self.assertEqual(list(self.recipe1.tags.all()), [self.vegan])
+        self.assertTrue(Ingredient.objects.filter(
+            pk=self.other_salt.pk
+        ).exists())
+
+    def test_merge_duplicates_dry_run(self):
+        """Test a dry run only reports the duplicates"""
+        out = StringIO()
+
+        call_command('merge_duplicates', dry_run=True, stdout=out)
+
+        self.assertIn('ingredients: 2 duplicates', out.getvalue())
+        self.assertIn('tags: 1 duplicates', out.getvalue())
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(self.recipe2.ingredients.get(), self.salt_dups[1])
+
+
+class ImportRecipesTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@somewhere.com',
+            'testpassword'
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_import_recipes(self):
+        """Test the rows of a file are imported and the invalid ones
+        written to the errors file"""
+        with open(self.path('recipes.csv'), 'w') as f:
+            f.write('title,time_minutes,price,tags,ingredients\n'
+                    'Soup,20,4.50,Vegan,Leek;Salt\n'
+                    'Toast,soon,1.00,,\n'
+                    'Salad,5,3.00,Vegan,Salt\n')
+        out = StringIO()
+
+        call_command('import_recipes', 'test@somewhere.com',
+                     self.path('recipes.csv'), chunk_size=2,
+                     errors=self.path('errors.ndjson'), stdout=out)
+
+        self.assertIn('Imported 2 recipes, 1 rows failed', out.getvalue())
+        self.assertEqual(
+            sorted(Recipe.objects.values_list('title', flat=True)),
+            ['Salad', 'Soup']
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        with open(self.path('errors.ndjson')) as f:
+            errors = [json.loads(line) for line in f]
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0]['line'], 3)
+        self.assertEqual(errors[0]['row']['title'], 'Toast')
+        self.assertIn('time_minutes', errors[0]['errors'])
+
+    def test_import_recipes_unreadable(self):
+        """Test a file that can't be read fails the command with what was
+        imported before"""
+        with open(self.path('recipes.ndjson'), 'wb') as f:
+            f.write(b'{"title": "Soup", "time_minutes": 20, '
+                    b'"price": "4.50"}\n{"title": "Cr\xe8pes"}\n')
+        with open(self.path('recipes.ndjson.gz'), 'wb') as f:
+            f.write(b'not gzipped\n')
+
+        for name, created in (('recipes.ndjson', 1),
+                              ('recipes.ndjson.gz', 0)):
+            with self.assertRaisesRegex(
+                CommandError,
+                f'could not be read.*{created} recipes were imported'
+            ):
+                call_command('import_recipes', 'test@somewhere.com',
+                             self.path(name), chunk_size=1,
+                             stdout=StringIO())
+
+        self.assertEqual(Recipe.objects.get().title, 'Soup')
+
+    def test_import_recipes_unknown_user(self):
+        """Test the owner must exist"""
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', 'nobody@somewhere.com', '-')
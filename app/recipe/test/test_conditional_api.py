@@ -0,0 +1,171 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from core.tests.utils import SHARED_CACHES
+from recipe import cache
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAG_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Return a Recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'sample_recipe',
+        'time_minutes': 10,
+        'price': 10.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class ConditionalGetApiTest(TestCase):
+    """Test conditional GET requests on the recipe API"""
+
+    def setUp(self):
+        cache.get_representation_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='some_random_user@somewhere.com',
+            password='some_random_pass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_not_modified(self):
+        """Test an unchanged list is answered with 304 without queries"""
+        sample_recipe(user=self.user)
+        response = self.client.get(RECIPE_URL)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                RECIPE_URL,
+                HTTP_IF_NONE_MATCH=response['ETag']
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_modified_after_write(self):
+        """Test a write by the user changes the list ETag"""
+        response = self.client.get(TAG_URL)
+
+        Tag.objects.create(user=self.user, name='Vegan')
+        response = self.client.get(
+            TAG_URL,
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
+    def test_list_if_modified_since_ignored(self):
+        """Test a write in the same second is never hidden by
+        If-Modified-Since"""
+        response = self.client.get(TAG_URL)
+
+        Tag.objects.create(user=self.user, name='Vegan')
+        response = self.client.get(
+            TAG_URL,
+            HTTP_IF_MODIFIED_SINCE=http_date()
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
+    def test_list_etag_depends_on_query(self):
+        """Test every page and filter has its own ETag"""
+        response = self.client.get(RECIPE_URL)
+
+        response = self.client.get(
+            RECIPE_URL,
+            {'page_size': 1},
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_etag_per_recipe(self):
+        """Test the detail ETag only changes with its own recipe"""
+        recipe = sample_recipe(user=self.user)
+        other = sample_recipe(user=self.user, title='Pizza')
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        other.title = 'Pepperoni Pizza'
+        other.save()
+        response = self.client.get(
+            detail_url(recipe.id),
+            HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        response = self.client.get(
+            detail_url(recipe.id),
+            HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['tags']), 1)
+
+    def test_detail_not_found_before_not_modified(self):
+        """Test the recipes of other users and unknown ids are 404, even
+        with a validator matching anything"""
+        other = get_user_model().objects.create_user(
+            'other@somewhere.com',
+            'password123'
+        )
+        recipe = sample_recipe(user=other)
+
+        for recipe_id in (recipe.id, recipe.id + 1000):
+            response = self.client.get(
+                detail_url(recipe_id),
+                HTTP_IF_NONE_MATCH='*'
+            )
+            self.assertEqual(
+                response.status_code,
+                status.HTTP_404_NOT_FOUND
+            )
+
+    def test_detail_not_modified_one_query(self):
+        """Test a fresh detail only costs the ownership check"""
+        recipe = sample_recipe(user=self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                detail_url(recipe.id),
+                HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_process_cache_not_used(self):
+        """Test there is no ETag nor cached representation with a cache the
+        other processes don't see, their writes wouldn't change them"""
+        sample_recipe(user=self.user)
+        with self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}):
+            self.assertIsNone(cache.get_version(f'user:{self.user.pk}'))
+            response = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
+        self.assertEqual(
+            cache.get_many('recipe', [response.data[0]['id']]),
+            {}
+        )
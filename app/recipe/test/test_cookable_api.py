@@ -0,0 +1,187 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+COOKABLE_URL = reverse('recipe:recipe-cookable')
+
+
+def next_page_url(response, rel='next'):
+    """Return the next page URL advertised in the Link header, if any"""
+    match = re.search(rf'<([^>]+)>; rel="{rel}"', response.get('Link', ''))
+    return match.group(1) if match else None
+
+
+class CookableApiTest(TestCase):
+    """Test ranking the recipes by the ingredients a user has"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='some_random_user@somewhere.com',
+            password='some_random_pass'
+        )
+        self.client.force_authenticate(self.user)
+
+        self.ingredients = {
+            name: Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Eggs', 'Salt', 'Flour', 'Milk', 'Leek')
+        }
+        self.recipes = {
+            title: self.sample_recipe(title, names)
+            for title, names in (
+                ('Omelette', ('Eggs', 'Salt')),
+                ('Pancakes', ('Eggs', 'Flour', 'Milk')),
+                ('Crepes', ('Eggs', 'Flour', 'Milk', 'Salt')),
+                ('Boiled eggs', ('Eggs', )),
+                ('Leek soup', ('Leek', 'Salt')),
+                ('Water', ()),
+            )
+        }
+
+    def sample_recipe(self, title, names):
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title=title,
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.ingredients.add(*(self.ingredients[name] for name in names))
+        return recipe
+
+    def cookable(self, names, params=None):
+        response = self.client.get(COOKABLE_URL, {
+            'ingredients': ','.join(
+                str(self.ingredients[name].id) for name in names
+            ),
+            **(params or {}),
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_ranked_by_coverage(self):
+        """Test the fully covered recipes come first, then those missing
+        the fewest ingredients, recipes using none are left out"""
+        response = self.cookable(('Eggs', 'Flour', 'Milk'))
+
+        self.assertEqual(
+            [
+                (recipe['title'], recipe['matched'], recipe['missing'])
+                for recipe in response.data
+            ],
+            [
+                ('Pancakes', 3, 0),
+                ('Boiled eggs', 1, 0),
+                ('Crepes', 3, 1),
+                ('Omelette', 1, 1),
+            ]
+        )
+        pancakes = response.data[0]
+        self.assertEqual(pancakes['id'], self.recipes['Pancakes'].id)
+        self.assertEqual(len(pancakes['ingredients']), 3)
+
+    def test_paginated_by_cursor(self):
+        """Test walking the ranking page by page"""
+        response = self.cookable(('Eggs', 'Salt'), {'page_size': 1})
+        titles = [recipe['title'] for recipe in response.data]
+        next_url = next_page_url(response)
+        while next_url:
+            response = self.client.get(next_url)
+            titles.extend(recipe['title'] for recipe in response.data)
+            next_url = next_page_url(response)
+
+        self.assertEqual(titles, [
+            'Omelette', 'Boiled eggs', 'Leek soup', 'Crepes', 'Pancakes'
+        ])
+
+    def test_cursor_positioned_on_ties(self):
+        """Test the cursor resumes after the last recipe of the page among
+        recipes tied on missing and matched, without an OFFSET"""
+        for i in range(6):
+            self.sample_recipe(f'Tied {i}', ('Eggs', 'Salt'))
+        expected = [
+            recipe['title']
+            for recipe in self.cookable(('Eggs', 'Salt')).data
+        ]
+
+        response = self.cookable(('Eggs', 'Salt'), {'page_size': 2})
+        pages = [response]
+        next_url = next_page_url(response)
+        while next_url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(next_url)
+            self.assertNotIn('OFFSET', queries[0]['sql'])
+            pages.append(response)
+            next_url = next_page_url(response)
+
+        self.assertEqual(
+            [recipe['title'] for page in pages for recipe in page.data],
+            expected
+        )
+        previous = self.client.get(next_page_url(pages[2], 'prev'))
+        self.assertEqual(previous.data, pages[1].data)
+
+    def test_invalid_cursor(self):
+        """Test a cursor that isn't a position of the ordering is refused"""
+        # p=["a"] and p=["a",1,2]
+        for cursor in ('cD1bImEiXQ==', 'cD1bImEiLDEsMl0='):
+            response = self.client.get(COOKABLE_URL, {
+                'ingredients': self.ingredients['Eggs'].id,
+                'cursor': cursor,
+            })
+
+            self.assertEqual(
+                response.status_code,
+                status.HTTP_404_NOT_FOUND
+            )
+
+    def test_filtered_like_the_list(self):
+        """Test the other list filters still apply"""
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        self.recipes['Pancakes'].tags.add(tag)
+
+        response = self.cookable(('Eggs', ), {'tags': tag.id})
+
+        self.assertEqual(
+            [recipe['title'] for recipe in response.data],
+            ['Pancakes']
+        )
+
+    def test_limited_to_user(self):
+        """Test the recipes of other users are never ranked, even with
+        their ingredients"""
+        other = get_user_model().objects.create_user(
+            'other@somewhere.com',
+            'password123'
+        )
+        eggs = Ingredient.objects.create(user=other, name='Eggs')
+        recipe = Recipe.objects.create(
+            user=other,
+            title='Not mine',
+            time_minutes=5,
+            price=1.00
+        )
+        recipe.ingredients.add(eggs)
+
+        response = self.client.get(COOKABLE_URL, {'ingredients': eggs.id})
+
+        self.assertEqual(response.data, [])
+
+    def test_ingredients_required(self):
+        """Test the ingredients must be a list of ids"""
+        for params in ({}, {'ingredients': 'eggs'}):
+            response = self.client.get(COOKABLE_URL, params)
+
+            self.assertEqual(
+                response.status_code,
+                status.HTTP_400_BAD_REQUEST
+            )
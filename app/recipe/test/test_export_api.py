@@ -0,0 +1,154 @@
+import csv
+import gzip
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class ExportApiTest(TestCase):
+    """Test streaming the recipes of a user"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='some_random_user@somewhere.com',
+            password='some_random_pass'
+        )
+        self.client.force_authenticate(self.user)
+
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        quick = Tag.objects.create(user=self.user, name='Quick, easy')
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.recipes = []
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10 + i,
+                price=5.00,
+                link=f'https://example.com/{i}' if i % 2 else ''
+            )
+            recipe.tags.add(vegan)
+            if i % 2:
+                recipe.tags.add(quick)
+            recipe.ingredients.add(salt)
+            self.recipes.append(recipe)
+
+        other = get_user_model().objects.create_user(
+            'other@londonappdev.com',
+            'password123'
+        )
+        Recipe.objects.create(
+            user=other,
+            title='Not mine',
+            time_minutes=5,
+            price=1.00
+        )
+
+    def export(self, params=None):
+        response = self.client.get(EXPORT_URL, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_export_ndjson(self):
+        """Test every recipe of the user is exported as a line of JSON"""
+        response, content = self.export()
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="recipes.ndjson"'
+        )
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0], {
+            'id': self.recipes[4].id,
+            'title': 'Recipe 4',
+            'time_minutes': 14,
+            'price': '5.00',
+            'link': '',
+            'tags': ['Vegan'],
+            'ingredients': ['Salt'],
+        })
+        self.assertEqual(rows[1]['tags'], ['Vegan', 'Quick, easy'])
+
+    def test_export_csv(self):
+        """Test the recipes are exported as CSV with lists of names"""
+        response, content = self.export({'output': 'csv'})
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1], {
+            'id': str(self.recipes[3].id),
+            'title': 'Recipe 3',
+            'time_minutes': '13',
+            'price': '5.00',
+            'link': 'https://example.com/3',
+            'tags': 'Vegan;Quick, easy',
+            'ingredients': 'Salt',
+        })
+
+    def test_export_gzip(self):
+        """Test the export can be gzipped"""
+        response, content = self.export({'gzip': '1'})
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(
+            response['Content-Disposition'],
+            'attachment; filename="recipes.ndjson.gz"'
+        )
+        self.assertEqual(
+            gzip.decompress(content),
+            self.export()[1]
+        )
+
+    def test_export_gzip_boolean(self):
+        """Test `gzip` takes the boolean values of the other parameters"""
+        response, content = self.export({'gzip': 'yes'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+
+        response, content = self.export({'gzip': 'false'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        response = self.client.get(EXPORT_URL, {'gzip': 'maybe'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('gzip', response.data)
+
+    def test_export_filters(self):
+        """Test the export is filtered like the list"""
+        tag = Tag.objects.get(name='Quick, easy')
+        response, content = self.export({'tags': tag.id})
+
+        self.assertEqual(len(content.splitlines()), 2)
+
+    @override_settings(RECIPE_EXPORT_CHUNK_SIZE=2)
+    def test_export_queries_per_chunk(self):
+        """Test the tags and ingredients are read once per chunk"""
+        with CaptureQueriesContext(connection) as queries:
+            response, content = self.export()
+
+        self.assertEqual(len(content.splitlines()), 5)
+        # a server side cursor, then the tags and ingredients of 3 chunks
+        self.assertEqual(len(queries), 1 + 3 * 2)
+        self.assertIn('DECLARE', queries[0]['sql'])
+
+    def test_export_invalid_output(self):
+        """Test an unknown output format is refused"""
+        response = self.client.get(EXPORT_URL, {'output': 'xml'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,196 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+IMPORT_URL = reverse('recipe:recipe-import-recipes')
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+def ndjson(*rows):
+    """Return the rows as the content of an NDJSON file"""
+    return b''.join(json.dumps(row).encode() + b'\n' for row in rows)
+
+
+class ImportApiTest(TestCase):
+    """Test creating recipes from an uploaded file"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='some_random_user@somewhere.com',
+            password='some_random_pass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content, name='recipes.ndjson', params=''):
+        return self.client.post(
+            f'{IMPORT_URL}{params}',
+            {'file': SimpleUploadedFile(name, content)},
+            format='multipart'
+        )
+
+    def test_import_ndjson(self):
+        """Test the recipes of an NDJSON file are created with their tags
+        and ingredients, resolved by name"""
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        res = self.upload(ndjson(
+            {'title': 'Soup', 'time_minutes': 20, 'price': '4.50',
+             'tags': ['vegan', 'Quick'], 'ingredients': ['Leek', 'Salt']},
+            {'title': 'Salad', 'time_minutes': 5, 'price': '3.00',
+             'tags': ['Quick', 'quick'], 'ingredients': ['Salt']},
+        ))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'created': 2, 'failed': 0, 'errors': []})
+        soup = Recipe.objects.get(user=self.user, title='Soup')
+        self.assertEqual(str(soup.price), '4.50')
+        self.assertEqual(
+            sorted(soup.tags.values_list('id', flat=True))[0],
+            vegan.id
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(),
+            2
+        )
+        salad = Recipe.objects.get(user=self.user, title='Salad')
+        self.assertEqual(salad.tags.count(), 1)
+        self.assertIsNotNone(salad.search_vector)
+
+    def test_import_csv(self):
+        """Test the recipes of a CSV file are created"""
+        res = self.upload(
+            b'title,time_minutes,price,link,tags,ingredients\r\n'
+            b'Soup,20,4.50,,Vegan;Quick,Leek;Salt\r\n'
+            b'Toast,3,1.00,https://example.com/toast,,\r\n',
+            name='recipes.csv'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        soup = Recipe.objects.get(user=self.user, title='Soup')
+        self.assertEqual(
+            sorted(soup.ingredients.values_list('name', flat=True)),
+            ['Leek', 'Salt']
+        )
+        toast = Recipe.objects.get(user=self.user, title='Toast')
+        self.assertEqual(toast.link, 'https://example.com/toast')
+        self.assertFalse(toast.tags.exists())
+
+    def test_import_gzip(self):
+        """Test a gzipped file is decompressed"""
+        res = self.upload(
+            gzip.compress(ndjson({'title': 'Soup', 'time_minutes': 20,
+                                  'price': '4.50'})),
+            name='recipes.ndjson.gz'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Recipe.objects.filter(title='Soup').exists())
+
+    def test_import_export_round_trip(self):
+        """Test an export imports back into the same recipes"""
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Soup',
+            time_minutes=20,
+            price=4.50
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Leek')
+        )
+
+        exports = {
+            output: b''.join(self.client.get(
+                EXPORT_URL, {'output': output}
+            ).streaming_content)
+            for output in ('ndjson', 'csv')
+        }
+        for output, exported in exports.items():
+            res = self.upload(exported, name=f'recipes.{output}')
+            self.assertEqual(res.data['created'], 1)
+
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        for copy in Recipe.objects.exclude(id=recipe.id):
+            self.assertEqual(copy.title, 'Soup')
+            self.assertEqual(copy.tags.get().name, 'Vegan')
+            self.assertEqual(copy.ingredients.get().name, 'Leek')
+
+    @override_settings(RECIPE_IMPORT_CHUNK_SIZE=2)
+    def test_import_invalid_rows(self):
+        """Test the invalid rows are reported with their line while the
+        valid ones are created"""
+        content = ndjson(
+            {'title': 'Soup', 'time_minutes': 20, 'price': '4.50'},
+            {'title': 'No time', 'price': '1.00'},
+        ) + b'not json\n\n' + ndjson(
+            ['not', 'an', 'object'],
+            {'title': 'Toast', 'time_minutes': 3, 'price': '1.00'},
+        )
+        res = self.upload(content)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['failed'], 3)
+        self.assertEqual(
+            [error['line'] for error in res.data['errors']],
+            [2, 3, 5]
+        )
+        self.assertIn('time_minutes', res.data['errors'][0]['errors'])
+
+    @override_settings(RECIPE_IMPORT_MAX_ERRORS=1)
+    def test_import_errors_capped(self):
+        """Test only the first errors are reported, all are counted"""
+        res = self.upload(ndjson({'title': 'A'}, {'title': 'B'}))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['failed'], 2)
+        self.assertEqual(len(res.data['errors']), 1)
+
+    def test_import_requires_file(self):
+        """Test a file must be uploaded, not another value, in a known
+        format"""
+        res = self.client.post(IMPORT_URL, {}, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for payload in ({'file': 'recipes.ndjson'}, [{'file': 'x'}]):
+            res = self.client.post(IMPORT_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('file', res.data)
+
+        res = self.upload(ndjson(), params='?input=xml')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('input', res.data)
+
+    @override_settings(RECIPE_IMPORT_CHUNK_SIZE=1)
+    def test_import_invalid_utf8(self):
+        """Test a file that isn't UTF-8 is refused with what was saved
+        before"""
+        res = self.upload(ndjson(
+            {'title': 'Soup', 'time_minutes': 20, 'price': '4.50'},
+        ) + b'{"title": "Cr\xe8pes"}\n')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['created'], 1)
+        self.assertIn('file', res.data)
+        self.assertTrue(Recipe.objects.filter(title='Soup').exists())
+
+    def test_import_not_gzipped(self):
+        """Test a file named .gz that isn't gzipped is refused"""
+        for content in (b'not gzipped\n', gzip.compress(b'{}\n')[:-10]):
+            res = self.upload(content, name='recipes.ndjson.gz')
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(res.data['created'], 0)
+            self.assertIn('file', res.data)
@@ -89,6 +89,19 @@ class PrivateIngredientApiTests(TestCase):
         ).exists()
         self.assertTrue(is_existing)
 
+    def test_create_existing_ingredient(self):
+        """Test creating an ingredient of an existing name returns it"""
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+
+        response = self.client.post(INGREDIENT_URL, {'name': 'SALT'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], ingredient.id)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(),
+            1
+        )
+
     def test_create_ingredient_invalid(self):
         """Test creating an invalid ingredient"""
         # parepare the parameters for the invalid ingredient
@@ -1,17 +1,25 @@
 import tempfile
 import os
+import re
+import tracemalloc
+from unittest.mock import patch
 
 from PIL import Image
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory, \
+                                force_authenticate
 
 from core.models import Recipe, Tag, Ingredient
+from recipe import images
+from recipe.pagination import RecipePagination
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.views import RecipeViewSet
 
 
 RECIPE_URL = reverse('recipe:recipe-list')
@@ -27,6 +35,12 @@ def detail_url(recipe_id):
     return reverse('recipe:recipe-detail', args=[recipe_id])
 
 
+def next_page_url(response):
+    """Return the next page URL advertised in the Link header, if any"""
+    match = re.search(r'<([^>]+)>; rel="next"', response.get('Link', ''))
+    return match.group(1) if match else None
+
+
 def sample_tag(user, name='Main course'):
     """Create and return a sample Tag"""
     return Tag.objects.create(user=user, name=name)
@@ -279,6 +293,297 @@ class PrivateRecipeApiTest(TestCase):
         self.assertIn(serializer2.data, response.data)
         self.assertNotIn(serializer3.data, response.data)
 
+    def test_filter_recipes_any_tag_no_duplicates(self):
+        """Test a recipe matching several tags is only returned once"""
+        recipe = sample_recipe(user=self.user, title='Pepperoni Pizza')
+        tag1 = sample_tag(user=self.user, name='Pizza')
+        tag2 = sample_tag(user=self.user, name='Italian')
+        recipe.tags.add(tag1, tag2)
+
+        response = self.client.get(
+            RECIPE_URL,
+            {'tags': f'{tag1.id},{tag2.id}', 'tags_mode': 'any'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in response.data], [recipe.id])
+
+    def test_filter_recipes_all_tags(self):
+        """Test returning only recipes that have every given tag"""
+        recipe1 = sample_recipe(user=self.user, title='Pepperoni Pizza')
+        recipe2 = sample_recipe(user=self.user, title='Cheese Pizza')
+        tag1 = sample_tag(user=self.user, name='Pizza')
+        tag2 = sample_tag(user=self.user, name='Spicy')
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag1)
+
+        response = self.client.get(
+            RECIPE_URL,
+            {'tags': f'{tag1.id},{tag2.id},{tag2.id}', 'tags_mode': 'all'}
+        )
+
+        self.assertEqual([r['id'] for r in response.data], [recipe1.id])
+
+    def test_filter_recipes_all_tags_and_ingredients(self):
+        """Test combining tag and ingredient filters in all mode"""
+        recipe1 = sample_recipe(user=self.user, title='Cheese Burger')
+        recipe2 = sample_recipe(user=self.user, title='Mushroom Burger')
+        tag = sample_tag(user=self.user, name='Burger')
+        ingredient1 = sample_ingredient(user=self.user, name='Cheese')
+        ingredient2 = sample_ingredient(user=self.user, name='Bun')
+        recipe1.tags.add(tag)
+        recipe1.ingredients.add(ingredient1, ingredient2)
+        recipe2.tags.add(tag)
+        recipe2.ingredients.add(ingredient2)
+
+        response = self.client.get(RECIPE_URL, {
+            'tags': f'{tag.id}',
+            'tags_mode': 'all',
+            'ingredients': f'{ingredient1.id},{ingredient2.id}',
+            'ingredients_mode': 'all',
+        })
+
+        self.assertEqual([r['id'] for r in response.data], [recipe1.id])
+
+    def test_filter_recipes_invalid_mode(self):
+        """Test an unknown filter mode is rejected"""
+        tag = sample_tag(user=self.user)
+
+        response = self.client.get(
+            RECIPE_URL,
+            {'tags': f'{tag.id}', 'tags_mode': 'some'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags_mode', response.data)
+
+    def test_list_recipes_constant_queries(self):
+        """Test listing recipes runs the same number of queries for any size"""
+        for i in range(10):
+            recipe = sample_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(sample_tag(user=self.user, name=f'Tag {i}'))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f'Ingredient {i}')
+            )
+
+        # one query for the recipes and one for their tag and ingredient ids
+        with self.assertNumQueries(2):
+            response = self.client.get(RECIPE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 10)
+
+    def test_view_recipe_detail_constant_queries(self):
+        """Test viewing a recipe detail does not query per related object"""
+        recipe = sample_recipe(user=self.user)
+        for i in range(5):
+            recipe.tags.add(sample_tag(user=self.user, name=f'Tag {i}'))
+            recipe.ingredients.add(
+                sample_ingredient(user=self.user, name=f'Ingredient {i}')
+            )
+
+        with self.assertNumQueries(3):
+            response = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['tags']), 5)
+        self.assertEqual(len(response.data['ingredients']), 5)
+
+    def test_recipes_paginated_by_cursor(self):
+        """Test walking the recipe list page by page with the cursor"""
+        recipes = [
+            sample_recipe(user=self.user, title=f'Recipe {i}')
+            for i in range(5)
+        ]
+
+        response = self.client.get(RECIPE_URL, {'page_size': 2})
+        ids = [recipe['id'] for recipe in response.data]
+        next_url = next_page_url(response)
+        while next_url:
+            response = self.client.get(next_url)
+            ids.extend(recipe['id'] for recipe in response.data)
+            next_url = next_page_url(response)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+
+    def test_recipes_page_size_capped(self):
+        """Test the requested page size cannot exceed the maximum"""
+        sample_recipe(user=self.user)
+        sample_recipe(user=self.user)
+
+        with patch.object(RecipePagination, 'max_page_size', 1):
+            response = self.client.get(RECIPE_URL, {'page_size': 100})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertIsNotNone(next_page_url(response))
+
+    def test_bulk_create_recipes(self):
+        """Test creating many recipes with their tags in one request"""
+        tag1 = sample_tag(user=self.user, name='Vegan')
+        tag2 = sample_tag(user=self.user, name='Desert')
+        ingredient = sample_ingredient(user=self.user, name='Lime')
+        payload = [
+            {
+                'title': 'Avocado Lime Cheesecake',
+                'tags': [tag1.id, tag2.id],
+                'ingredients': [ingredient.id],
+                'time_minutes': 100,
+                'price': '35.00'
+            },
+            {
+                'title': 'Pizza',
+                'tags': [tag2.id],
+                'ingredients': [],
+                'time_minutes': 30,
+                'price': '12.50'
+            },
+        ]
+
+        response = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 2)
+        recipe = Recipe.objects.get(id=response.data[0]['id'])
+        self.assertEqual(recipe.user, self.user)
+        self.assertEqual(recipe.tags.count(), 2)
+        self.assertEqual(list(recipe.ingredients.all()), [ingredient])
+        self.assertEqual(response.data[1]['tags'], [tag2.id])
+
+    def test_bulk_create_recipes_all_or_nothing(self):
+        """Test an invalid item rejects the whole list by default"""
+        payload = [
+            {'title': 'Pizza', 'time_minutes': 30, 'price': '12.50',
+             'tags': [], 'ingredients': []},
+            {'title': '', 'time_minutes': 30, 'price': '12.50',
+             'tags': [], 'ingredients': []},
+        ]
+
+        response = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('title', response.data[1])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_bulk_create_recipes_partial_commit(self):
+        """Test the valid items are created when atomic is disabled"""
+        payload = [
+            {'title': '', 'time_minutes': 30, 'price': '12.50',
+             'tags': [], 'ingredients': []},
+            {'title': 'Pizza', 'time_minutes': 30, 'price': '12.50',
+             'tags': [], 'ingredients': []},
+        ]
+
+        response = self.client.post(
+            f'{RECIPE_URL}?atomic=0',
+            payload,
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['created']), 1)
+        self.assertEqual(response.data['created'][0]['title'], 'Pizza')
+        self.assertIn('title', response.data['errors'][0])
+        self.assertEqual(response.data['errors'][1], {})
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_create_recipes_atomic_boolean(self):
+        """Test atomic is parsed as a boolean and refused otherwise"""
+        payload = [
+            {'title': '', 'time_minutes': 30, 'price': '12.50',
+             'tags': [], 'ingredients': []},
+            {'title': 'Pizza', 'time_minutes': 30, 'price': '12.50',
+             'tags': [], 'ingredients': []},
+        ]
+
+        for value in ('false', 'no'):
+            response = self.client.post(
+                f'{RECIPE_URL}?atomic={value}',
+                payload,
+                format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertIn('errors', response.data)
+
+        response = self.client.post(
+            f'{RECIPE_URL}?atomic=maybe',
+            payload,
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('atomic', response.data)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def _serializer(self, data, **kwargs):
+        """Return a recipe serializer bound to a request of the user"""
+        request = RequestFactory().post(RECIPE_URL)
+        request.user = self.user
+        return RecipeSerializer(
+            data=data,
+            context={'request': request},
+            **kwargs
+        )
+
+    def test_validate_ingredients_single_query(self):
+        """Test all the ingredient ids are resolved with one query"""
+        ingredients = [
+            sample_ingredient(user=self.user, name=f'Ingredient {i}')
+            for i in range(40)
+        ]
+        serializer = self._serializer({
+            'title': 'Soup',
+            'time_minutes': 30,
+            'price': '5.00',
+            'tags': [],
+            'ingredients': [ingredient.id for ingredient in ingredients],
+        })
+
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+
+        self.assertEqual(
+            serializer.validated_data['ingredients'],
+            ingredients
+        )
+
+    def test_validate_reports_every_missing_id(self):
+        """Test unknown and other users' ids are all reported at once"""
+        other_user = get_user_model().objects.create_user(
+            email='second_sample_user@somewhere2.com',
+            password='second_random_password'
+        )
+        own_tag = sample_tag(user=self.user)
+        other_tag = sample_tag(user=other_user)
+        serializer = self._serializer({
+            'title': 'Soup',
+            'time_minutes': 30,
+            'price': '5.00',
+            'tags': [own_tag.id, other_tag.id, 0],
+            'ingredients': [],
+        })
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(len(serializer.errors['tags']), 2)
+        self.assertIn(str(other_tag.id), serializer.errors['tags'][0])
+
+    def test_validate_bulk_shares_lookup(self):
+        """Test a bulk payload resolves ids with one query per field"""
+        tag = sample_tag(user=self.user)
+        ingredient = sample_ingredient(user=self.user)
+        item = {
+            'title': 'Soup',
+            'time_minutes': 30,
+            'price': '5.00',
+            'tags': [tag.id],
+            'ingredients': [ingredient.id],
+        }
+        serializer = self._serializer([item] * 10, many=True)
+
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid())
+
 
 class RecipeImageUploadTest(TestCase):
 
@@ -292,8 +597,22 @@ class RecipeImageUploadTest(TestCase):
         self.recipe = sample_recipe(user=self.user)
 
     def tearDown(self):
+        self.recipe.refresh_from_db()
+        for path in self.recipe.image_variants.values():
+            default_storage.delete(path)
         self.recipe.image.delete()
 
+    def _upload_image(self, size=(20, 20), image_format='JPEG'):
+        """Upload an image of the given size to the sample recipe"""
+        url = image_upload_url(self.recipe.id)
+        suffix = f'.{image_format.lower()}'
+        with tempfile.NamedTemporaryFile(suffix=suffix) as ntf:
+            img = Image.new('RGB', size)
+            img.save(ntf, format=image_format)
+            ntf.seek(0)
+
+            return self.client.post(url, {'image': ntf}, format='multipart')
+
     def test_upload_image_success(self):
         """Test uploading an image to recipe"""
         url = image_upload_url(self.recipe.id)
@@ -313,6 +632,143 @@ class RecipeImageUploadTest(TestCase):
         self.assertIn('image', response.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    @patch('recipe.images.schedule_variants')
+    def test_upload_image_schedules_variants(self, schedule_variants):
+        """Test uploading an image queues the generation of its variants"""
+        response = self._upload_image()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['image_variants'], {})
+        schedule_variants.assert_called_once()
+        self.assertEqual(schedule_variants.call_args[0][0].id, self.recipe.id)
+
+    @override_settings(
+        RECIPE_IMAGE_VARIANT_SIZES=(16, 64),
+        RECIPE_IMAGE_VARIANT_FORMATS=('JPEG', ),
+        RECIPE_IMAGE_WORKERS=0
+    )
+    def test_generate_image_variants(self):
+        """Test the variants are resized and exposed once generated"""
+        self._upload_image(size=(200, 100))
+        self.recipe.refresh_from_db()
+
+        images.generate_variants(self.recipe.id, self.recipe.image.name)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            set(self.recipe.image_variants),
+            {'16-jpeg', '64-jpeg'}
+        )
+        with default_storage.open(
+            self.recipe.image_variants['64-jpeg']
+        ) as variant:
+            self.assertEqual(Image.open(variant).size, (64, 32))
+
+    @override_settings(
+        RECIPE_IMAGE_VARIANT_SIZES=(16, ),
+        RECIPE_IMAGE_VARIANT_FORMATS=('JPEG', ),
+        RECIPE_IMAGE_WORKERS=0
+    )
+    @patch('django.db.transaction.on_commit', side_effect=lambda func: func())
+    def test_image_variants_in_detail(self, on_commit):
+        """Test the detail exposes the variants once generated"""
+        self._upload_image(size=(200, 100))
+
+        response = self.client.get(detail_url(self.recipe.id))
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(response.data['image_variants'], {
+            '16-jpeg': default_storage.url(
+                self.recipe.image_variants['16-jpeg']
+            ),
+        })
+
+    @override_settings(
+        RECIPE_IMAGE_VARIANT_SIZES=(16, ),
+        RECIPE_IMAGE_VARIANT_FORMATS=('JPEG', ),
+        RECIPE_IMAGE_WORKERS=0
+    )
+    @patch('django.db.transaction.on_commit', side_effect=lambda func: func())
+    def test_reupload_deletes_previous_variants(self, on_commit):
+        """Test uploading a new image deletes the variants of the previous
+        one, and a generation outrun by a newer upload keeps no files"""
+        self._upload_image()
+        self.recipe.refresh_from_db()
+        first_image = self.recipe.image.name
+        previous = self.recipe.image_variants['16-jpeg']
+
+        self._upload_image()
+        self.recipe.refresh_from_db()
+
+        self.assertFalse(default_storage.exists(previous))
+        self.assertTrue(default_storage.exists(
+            self.recipe.image_variants['16-jpeg']
+        ))
+
+        outrun = images.generate_variants(self.recipe.id, first_image)
+        default_storage.delete(first_image)
+
+        self.assertEqual(outrun, {})
+        self.assertFalse(default_storage.exists(previous))
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=100 * 1024)
+    def test_upload_image_too_large(self):
+        """Test uploads over the byte limit are rejected"""
+        response = self._upload_image(size=(200, 200), image_format='BMP')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', response.data)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=100 * 100)
+    def test_upload_image_too_many_pixels(self):
+        """Test images over the pixel limit are rejected"""
+        response = self._upload_image(size=(200, 200))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('pixels', response.data['image'][0])
+
+    def test_upload_image_not_an_image(self):
+        """Test uploading a file that is not an image"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            ntf.write(b'not an image' * 100)
+            ntf.seek(0)
+            response = self.client.post(
+                url,
+                {'image': ntf},
+                format='multipart'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('recipe.images.schedule_variants')
+    def test_upload_image_memory_bounded(self, schedule_variants):
+        """Test a large upload is streamed rather than buffered in memory"""
+        with tempfile.NamedTemporaryFile(suffix='.bmp') as ntf:
+            # an uncompressed 12MB image
+            Image.new('RGB', (2000, 2000)).save(ntf, format='BMP')
+            ntf.seek(0)
+            request = APIRequestFactory().post(
+                image_upload_url(self.recipe.id),
+                {'image': ntf},
+                format='multipart'
+            )
+        force_authenticate(request, user=self.user)
+        view = RecipeViewSet.as_view({'post': 'upload_image'})
+
+        tracemalloc.start()
+        try:
+            response = view(request, pk=self.recipe.id)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            request.close()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLess(peak, 2 * 1024 * 1024)
+
     def test_upload_image_bad_request(self):
         """Test uploading an invalid image"""
         url = image_upload_url(self.recipe.id)
@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.utils import SHARED_CACHES
+from recipe import cache
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Return a Recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'sample_recipe',
+        'time_minutes': 10,
+        'price': 10.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class RecipeRepresentationCacheTest(TestCase):
+    """Test the serialized recipes cache"""
+
+    def setUp(self):
+        cache.get_representation_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='some_random_user@somewhere.com',
+            password='some_random_pass'
+        )
+        self.client.force_authenticate(self.user)
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_list_served_from_cache(self):
+        """Test the second list only hits the cache, the hits and misses
+        are reported with the timings of the request"""
+        sample_recipe(user=self.user)
+        sample_recipe(user=self.user, title='Pizza')
+
+        with self.assertLogs('core.middleware', 'INFO') as logs:
+            first = self.client.get(RECIPE_URL)
+            second = self.client.get(RECIPE_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertIn('cache_misses;desc="2"', first['Server-Timing'])
+        self.assertIn('cache_hits;desc="2"', second['Server-Timing'])
+        self.assertEqual(
+            [record.counts for record in logs.records],
+            [
+                {'cache_hits': 0, 'cache_misses': 2},
+                {'cache_hits': 2, 'cache_misses': 0},
+            ]
+        )
+        self.assertIn('cache_hits=2 cache_misses=0', logs.output[1])
+
+    def test_recipe_update_invalidates(self):
+        """Test saving a recipe drops its cached representation"""
+        recipe = sample_recipe(user=self.user)
+        self.client.get(detail_url(recipe.id))
+
+        recipe.title = 'Pizza'
+        recipe.save()
+        response = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(response.data['title'], 'Pizza')
+
+    def test_tag_rename_invalidates(self):
+        """Test renaming a tag refreshes the recipes nesting it"""
+        recipe = sample_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        self.client.get(detail_url(recipe.id))
+
+        tag.name = 'Vegetarian'
+        tag.save()
+        response = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(response.data['tags'][0]['name'], 'Vegetarian')
+
+    def test_ingredient_delete_invalidates(self):
+        """Test deleting an ingredient refreshes the recipes using it"""
+        recipe = sample_recipe(user=self.user)
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        recipe.ingredients.add(ingredient)
+        self.client.get(RECIPE_URL)
+
+        ingredient.delete()
+        response = self.client.get(RECIPE_URL)
+
+        self.assertEqual(response.data[0]['ingredients'], [])
+
+    def test_relations_change_invalidates(self):
+        """Test adding and clearing tags from both sides invalidates"""
+        recipe = sample_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(RECIPE_URL)
+
+        tag.recipe_set.add(recipe)
+        response = self.client.get(RECIPE_URL)
+        self.assertEqual(response.data[0]['tags'], [tag.id])
+
+        tag.recipe_set.clear()
+        response = self.client.get(RECIPE_URL)
+        self.assertEqual(response.data[0]['tags'], [])
+
+    def test_update_through_api_invalidates(self):
+        """Test a PATCH is visible on the next detail call"""
+        recipe = sample_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(detail_url(recipe.id))
+
+        self.client.patch(detail_url(recipe.id), {'tags': [tag.id]})
+        response = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(response.data['tags'][0]['id'], tag.id)
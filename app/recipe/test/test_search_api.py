@@ -0,0 +1,141 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'sample_recipe',
+        'time_minutes': 10,
+        'price': 10.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeSearchApiTest(TestCase):
+    """Test searching recipes with the q parameter"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='some_random_user@somewhere.com',
+            password='some_random_pass'
+        )
+        self.client.force_authenticate(self.user)
+
+    def reset_float_digits(self):
+        with connection.cursor() as cursor:
+            cursor.execute('RESET extra_float_digits')
+
+    def search(self, text, **params):
+        """Return the ids of the recipes found for `text`"""
+        response = self.client.get(RECIPE_URL, {'q': text, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        return [recipe['id'] for recipe in response.data]
+
+    def test_search_title(self):
+        """Test searching words of the title, stemmed"""
+        soup = sample_recipe(user=self.user, title='Tomato Soup')
+        sample_recipe(user=self.user, title='Cheese Burger')
+
+        self.assertEqual(self.search('tomatoes'), [soup.id])
+
+    def test_search_misspelled_title(self):
+        """Test misspelled titles are found by trigram similarity"""
+        pizza = sample_recipe(user=self.user, title='Pizza Margherita')
+        sample_recipe(user=self.user, title='Cheese Burger')
+
+        self.assertEqual(self.search('piza margarita'), [pizza.id])
+
+    def test_search_tags_and_ingredients(self):
+        """Test recipes are found by the names of tags and ingredients"""
+        burger = sample_recipe(user=self.user, title='Burger')
+        burger.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        soup = sample_recipe(user=self.user, title='Soup')
+        soup.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Mushroom')
+        )
+
+        self.assertEqual(self.search('vegan'), [burger.id])
+        self.assertEqual(self.search('mushrooms'), [soup.id])
+
+    def test_search_follows_renamed_tag(self):
+        """Test the search vector follows tag renames and removals"""
+        recipe = sample_recipe(user=self.user, title='Burger')
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+
+        tag.name = 'Spicy'
+        tag.save()
+        self.assertEqual(self.search('spicy'), [recipe.id])
+
+        tag.recipe_set.clear()
+        self.assertEqual(self.search('spicy'), [])
+
+    def test_search_ranked_and_paginated(self):
+        """Test title matches rank first and pages follow the rank"""
+        by_tag = sample_recipe(user=self.user, title='Salad')
+        by_tag.tags.add(Tag.objects.create(user=self.user, name='Lemon'))
+        by_title = sample_recipe(user=self.user, title='Lemon Pie')
+
+        first = self.client.get(RECIPE_URL, {'q': 'lemon', 'page_size': 1})
+        self.assertEqual(first.data[0]['id'], by_title.id)
+
+        next_url = first['Link'].split('>')[0].lstrip('<')
+        second = self.client.get(next_url)
+        self.assertEqual([recipe['id'] for recipe in second.data], [by_tag.id])
+
+    def test_search_paginated_through_ties(self):
+        """Test pages walk recipes tied on the rank without skipping or
+        repeating any, even with floats sent rounded as PostgreSQL < 12
+        does by default"""
+        with connection.cursor() as cursor:
+            cursor.execute('SET extra_float_digits = 0')
+        self.addCleanup(self.reset_float_digits)
+        tied = {
+            sample_recipe(user=self.user, title='Spicy Pasta').id
+            for _ in range(5)
+        }
+
+        response = self.client.get(RECIPE_URL, {'q': 'pasta', 'page_size': 2})
+        ids = [recipe['id'] for recipe in response.data]
+        while 'rel="next"' in response.get('Link', ''):
+            next_url = response['Link'].split('>')[0].lstrip('<')
+            response = self.client.get(next_url)
+            ids.extend(recipe['id'] for recipe in response.data)
+            self.assertLessEqual(len(ids), len(tied))
+
+        self.assertEqual(ids, sorted(tied, reverse=True))
+
+    def test_search_invalid_cursor(self):
+        """Test a cursor whose rank isn't a number is refused"""
+        # p=["x",1]
+        response = self.client.get(RECIPE_URL, {
+            'q': 'pasta',
+            'cursor': 'cD1bIngiLDFd',
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_limited_to_user(self):
+        """Test other users' recipes are never found"""
+        other_user = get_user_model().objects.create_user(
+            email='second_sample_user@somewhere2.com',
+            password='second_random_password'
+        )
+        sample_recipe(user=other_user, title='Tomato Soup')
+
+        self.assertEqual(self.search('tomato'), [])
@@ -0,0 +1,130 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.utils import SHARED_CACHES
+from recipe import cache
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Return a Recipe detail URL"""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class SparseFieldsApiTest(TestCase):
+    """Test trimming and expanding the recipe representations"""
+
+    def setUp(self):
+        cache.get_representation_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='some_random_user@somewhere.com',
+            password='some_random_pass'
+        )
+        self.client.force_authenticate(self.user)
+
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=5.00
+            )
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'Tag {i}'),
+                Tag.objects.create(user=self.user, name=f'Other tag {i}')
+            )
+            recipe.ingredients.add(
+                Ingredient.objects.create(user=self.user, name=f'Salt {i}')
+            )
+        self.recipe = recipe
+
+    def test_list_fields(self):
+        """Test only the fields asked for are listed and selected"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(RECIPE_URL, {'fields': 'id,title'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+        for item in response.data:
+            self.assertEqual(list(item), ['id', 'title'])
+
+        # no query for the relations and no unused column
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"price"', queries[0]['sql'])
+
+    def test_retrieve_fields(self):
+        """Test only the fields asked for are in the detail"""
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                detail_url(self.recipe.id),
+                {'fields': 'title,tags'}
+            )
+
+        self.assertEqual(list(response.data), ['title', 'tags'])
+        self.assertEqual(len(response.data['tags']), 2)
+
+    def test_list_expand(self):
+        """Test expanding inlines the tags and ingredients in bulk"""
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                RECIPE_URL,
+                {'expand': 'tags,ingredients'}
+            )
+
+        self.assertEqual(response.data[0]['tags'], [
+            {'id': tag.id, 'name': tag.name}
+            for tag in self.recipe.tags.order_by('id')
+        ])
+        self.assertEqual(response.data[0]['ingredients'], [
+            {'id': ingredient.id, 'name': ingredient.name}
+            for ingredient in self.recipe.ingredients.all()
+        ])
+
+    def test_list_expand_conforms(self):
+        """Test the expanded list is the one the serializers build"""
+        params = {'expand': 'tags', 'fields': 'id,tags,price'}
+
+        fast = self.client.get(RECIPE_URL, params)
+        with patch('recipe.rows.RowSerializer.add_field', return_value=False):
+            slow = self.client.get(RECIPE_URL, params)
+
+        self.assertEqual(fast.content, slow.content)
+        self.assertEqual(list(fast.data[0]), ['id', 'tags', 'price'])
+
+    def test_sparse_not_cached(self):
+        """Test trimmed representations don't replace the cached ones"""
+        self.client.get(RECIPE_URL, {'fields': 'id'})
+        self.client.get(RECIPE_URL, {'expand': 'tags'})
+
+        response = self.client.get(RECIPE_URL)
+
+        self.assertEqual(list(response.data[0]), [
+            'id', 'title', 'ingredients', 'tags',
+            'time_minutes', 'price', 'link'
+        ])
+        self.assertIsInstance(response.data[0]['tags'][0], int)
+
+    def test_unknown_fields_rejected(self):
+        """Test unknown fields and relations are a bad request"""
+        response = self.client.get(RECIPE_URL, {'fields': 'id,secret'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+
+        response = self.client.get(RECIPE_URL, {'expand': 'title'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('expand', response.data)
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -64,6 +66,31 @@ class PrivateTagsApiTest(TestCase):
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['name'], tag.name)
 
+    def test_tags_paginated_by_name(self):
+        """Test tags are paginated in name order"""
+        for name in ('Vegan', 'Drink', 'Dinner', 'Lunch', 'Breakfast'):
+            Tag.objects.create(user=self.user, name=name)
+
+        response = self.client.get(TAG_URL, {'page_size': 2})
+        names = [tag['name'] for tag in response.data]
+        ids = [tag['id'] for tag in response.data]
+        while 'rel="next"' in response.get('Link', ''):
+            next_url = response['Link'].split('>')[0].lstrip('<')
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(next_url)
+            names.extend(tag['name'] for tag in response.data)
+            ids.extend(tag['id'] for tag in response.data)
+
+            # the cursor is the (name, id) of the last tag, not an offset
+            self.assertIn('"core_tag"."id" <', queries[-1]['sql'])
+            self.assertNotIn('OFFSET', queries[-1]['sql'])
+
+        self.assertEqual(
+            names,
+            ['Vegan', 'Lunch', 'Drink', 'Dinner', 'Breakfast']
+        )
+        self.assertEqual(len(set(ids)), 5)
+
     def test_create_tags_successful(self):
         """Test creating a new tag"""
         params = {'name': 'Test-Tag'}
@@ -76,6 +103,44 @@ class PrivateTagsApiTest(TestCase):
 
         self.assertTrue(is_existing)
 
+    def test_bulk_create_tags(self):
+        """Test creating many tags with a single insert"""
+        payload = [{'name': 'Vegan'}, {'name': 'Dessert'}]
+
+        response = self.client.post(TAG_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [tag['name'] for tag in response.data],
+            ['Vegan', 'Dessert']
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_create_existing_tag(self):
+        """Test creating a tag of an existing name returns that tag"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        response = self.client.post(TAG_URL, {'name': 'vegan'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'id': tag.id, 'name': 'Vegan'})
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_create_tags_resolves_names(self):
+        """Test a list of names is resolved with a single statement"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        payload = [{'name': 'Dessert'}, {'name': 'VEGAN'}, {'name': 'dessert'}]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(TAG_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ids = [item['id'] for item in response.data]
+        self.assertEqual(ids[1], tag.id)
+        self.assertEqual(ids[0], ids[2])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(len(queries), 1)
+
     def test_create_tag_invalid_name(self):
         """Test creating a new tag with invalid name"""
         params = {'name': ''}
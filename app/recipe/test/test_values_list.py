@@ -0,0 +1,111 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.utils import SHARED_CACHES
+from recipe import cache
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class ValuesListConformanceTest(TestCase):
+    """Test the lists built from rows match the serializers byte for byte"""
+
+    def setUp(self):
+        cache.get_representation_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='some_random_user@somewhere.com',
+            password='some_random_pass'
+        )
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Vegan', 'Dessert', 'Crème  ', 'Dinner')
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=f'Ingredient {i}')
+            for i in range(6)
+        ]
+        prices = ('0.00', '5.50', '10.05', '999.99', '12.00')
+        for i, price in enumerate(prices * 3):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Pasta «{i}» bake',
+                time_minutes=i * 7,
+                price=Decimal(price),
+                link='' if i % 2 else f'https://example.com/{i}'
+            )
+            recipe.tags.add(*tags[i % 4:])
+            recipe.ingredients.add(*ingredients[:i % 6])
+
+    def assertListConforms(self, url, params=None):
+        """Assert the list is identical from rows and from the serializer"""
+        params = {'page_size': 4, **(params or {})}
+
+        fast = self.client.get(url, params)
+        cache.get_representation_cache().clear()
+        with patch('recipe.rows.RowSerializer.add_field', return_value=False):
+            slow = self.client.get(url, params)
+
+        self.assertEqual(fast.status_code, slow.status_code)
+        self.assertEqual(fast.content, slow.content)
+        self.assertEqual(fast.get('Link'), slow.get('Link'))
+        self.assertTrue(fast.data)
+
+        return fast
+
+    def test_recipes_conform(self):
+        """Test the recipe list pages are byte identical"""
+        response = self.assertListConforms(RECIPE_URL)
+
+        # and so is the next page, walked with the cursor
+        next_url = response['Link'].split('>')[0].lstrip('<')
+        self.assertListConforms(next_url)
+
+    def test_filtered_recipes_conform(self):
+        """Test the filtered and searched recipe lists are byte identical"""
+        tag = Tag.objects.get(name='Dessert')
+        ingredient = Ingredient.objects.get(name='Ingredient 1')
+
+        self.assertListConforms(RECIPE_URL, {'tags': f'{tag.id}'})
+        self.assertListConforms(RECIPE_URL, {
+            'ingredients': f'{ingredient.id}',
+            'ingredients_mode': 'all',
+        })
+        self.assertListConforms(RECIPE_URL, {'q': 'pasta'})
+
+    def test_cached_recipes_conform(self):
+        """Test recipes served from the representation cache conform"""
+        self.client.get(RECIPE_URL, {'page_size': 2})
+
+        self.assertListConforms(RECIPE_URL)
+
+    def test_tags_conform(self):
+        """Test the tag lists are byte identical"""
+        self.assertListConforms(TAGS_URL)
+        self.assertListConforms(TAGS_URL, {'assigned_only': 1})
+
+    def test_ingredients_conform(self):
+        """Test the ingredient lists are byte identical"""
+        self.assertListConforms(INGREDIENTS_URL)
+        self.assertListConforms(INGREDIENTS_URL, {'assigned_only': 1})
+
+    def test_rows_skip_model_instances(self):
+        """Test the fast path never instantiates recipes"""
+        with patch.object(Recipe, '__init__') as init:
+            response = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(response.data), 15)
+        init.assert_not_called()
@@ -0,0 +1,84 @@
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.translation import gettext as _
+
+from rest_framework import serializers
+
+# Bytes of multipart framing tolerated on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Give up identifying the image when its header is not within these bytes
+HEADER_MAX_BYTES = 1024 * 1024
+
+
+class BoundedImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploaded images to a temporary file chunk by chunk.
+
+    Uploads over RECIPE_IMAGE_MAX_BYTES are rejected as soon as the limit
+    is crossed and images over RECIPE_IMAGE_MAX_PIXELS as soon as their
+    header arrived, which Pillow parses without decoding any pixel. The
+    temporary file is then moved in place by the storage, not copied.
+    """
+    # serializer field the rejections are reported on
+    error_field = 'image'
+
+    def reject(self, message):
+        """Abort the upload with a validation error"""
+        raise serializers.ValidationError({self.error_field: [message]})
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > settings.RECIPE_IMAGE_MAX_BYTES + \
+                MULTIPART_OVERHEAD:
+            self.reject(self.size_message())
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.identified = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.RECIPE_IMAGE_MAX_BYTES:
+            self.reject(self.size_message())
+
+        super().receive_data_chunk(raw_data, start)
+        if not self.identified:
+            self.check_header(final=start + len(raw_data) > HEADER_MAX_BYTES)
+
+    def file_complete(self, file_size):
+        if not self.identified:
+            self.check_header(final=True)
+
+        return super().file_complete(file_size)
+
+    def check_header(self, final):
+        """Check the image dimensions once its header has been received"""
+        self.file.flush()
+        try:
+            with Image.open(self.file.temporary_file_path()) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            self.reject(self.pixels_message())
+        except (OSError, SyntaxError, ValueError):
+            # the header may still be incomplete
+            if final:
+                self.reject(_(
+                    'Upload a valid image. The file you uploaded was either '
+                    'not an image or a corrupted image.'
+                ))
+            return
+
+        self.identified = True
+        if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+            self.reject(self.pixels_message())
+
+    def size_message(self):
+        return _('Ensure the image is at most %(limit)d bytes.') % {
+            'limit': settings.RECIPE_IMAGE_MAX_BYTES,
+        }
+
+    def pixels_message(self):
+        return _('Ensure the image has at most %(limit)d pixels.') % {
+            'limit': settings.RECIPE_IMAGE_MAX_PIXELS,
+        }
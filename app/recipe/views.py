@@ -1,22 +1,40 @@
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import router
+from django.db.models import Count, Exists, OuterRef, Prefetch
+from django.http import StreamingHttpResponse
+
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
+from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 
 from core.models import Tag, Ingredient, Recipe
+from core.timing import measure
+from users.authentication import CachedTokenAuthentication
 
-from recipe import serializers
+from recipe import coverage, export, images, importer, search, \
+                   serializers
+from recipe.conditional import ConditionalListMixin, \
+                               ConditionalRetrieveMixin
+from recipe.mixins import BulkCreateModelMixin, ValuesListMixin, \
+                          boolean_param
+from recipe.pagination import NamePagination, RecipePagination
+from recipe.rows import RowSerializer
+from recipe.uploads import BoundedImageUploadHandler
 
 
-class TagViewSet(viewsets.GenericViewSet,
-                 mixins.ListModelMixin,
-                 mixins.CreateModelMixin):
+class TagViewSet(ConditionalListMixin,
+                 viewsets.GenericViewSet,
+                 ValuesListMixin,
+                 BulkCreateModelMixin):
     """Manage tags in the database"""
-    authentication_classes = (TokenAuthentication, )
+    authentication_classes = (CachedTokenAuthentication, )
     permission_classes = (IsAuthenticated, )
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerilizer
+    pagination_class = NamePagination
 
     def get_queryset(self):
         """Return the objects for the current authenticated user only"""
@@ -26,25 +44,28 @@ class TagViewSet(viewsets.GenericViewSet,
         queryset = self.queryset
 
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            # the join repeats the rows assigned to several recipes
+            queryset = queryset.filter(recipe__isnull=False).distinct()
 
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by('-name', '-id')
 
     def perform_create(self, serializer):
         """create a new Tag"""
         serializer.save(user=self.request.user)
 
 
-class IngredientViewSet(viewsets.GenericViewSet,
-                        mixins.ListModelMixin,
-                        mixins.CreateModelMixin):
+class IngredientViewSet(ConditionalListMixin,
+                        viewsets.GenericViewSet,
+                        ValuesListMixin,
+                        BulkCreateModelMixin):
     """Manage Ingredients in the database"""
-    authentication_classes = (TokenAuthentication, )
+    authentication_classes = (CachedTokenAuthentication, )
     permission_classes = (IsAuthenticated, )
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    pagination_class = NamePagination
 
     def get_queryset(self):
         """Return the Ingredients for the current authenticated user only"""
@@ -54,43 +75,164 @@ class IngredientViewSet(viewsets.GenericViewSet,
         queryset = self.queryset
 
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            # the join repeats the rows assigned to several recipes
+            queryset = queryset.filter(recipe__isnull=False).distinct()
 
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by('-name', '-id')
 
     def perform_create(self, serilizer):
         """Create a new Ingredient"""
         serilizer.save(user=self.request.user)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalListMixin,
+                    ConditionalRetrieveMixin,
+                    ValuesListMixin,
+                    BulkCreateModelMixin,
+                    viewsets.ModelViewSet):
     """Manage recipes in the database"""
     serializer_class = serializers.RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication, )
+    pagination_class = RecipePagination
+    authentication_classes = (CachedTokenAuthentication, )
     permission_classes = (IsAuthenticated, )
 
     def _params_to_ints(self, querystring):
         """Convert a list of string IDs to a list of integers"""
         return [int(str_id) for str_id in querystring.split(',')]
 
+    def _filter_by_related(self, queryset, param, through, column):
+        """Filter the recipes linked to any (the default) or all of the
+        related ids given in the `param` query parameter.
+
+        Both modes use a subquery on the through table so no recipe is
+        repeated and no DISTINCT is needed.
+        """
+        ids = set(self._params_to_ints(self.request.query_params[param]))
+        mode = self.request.query_params.get(f'{param}_mode', 'any')
+        links = through.objects.filter(**{f'{column}__in': ids})
+
+        if mode == 'any':
+            return queryset.annotate(
+                **{f'has_{param}': Exists(
+                    links.filter(recipe_id=OuterRef('pk'))
+                )}
+            ).filter(**{f'has_{param}': True})
+        elif mode == 'all':
+            return queryset.filter(pk__in=links.order_by().values(
+                'recipe_id'
+            ).annotate(
+                matches=Count('recipe_id')
+            ).filter(
+                matches=len(ids)
+            ).values('recipe_id'))
+
+        raise ValidationError({f'{param}_mode': ['Must be "any" or "all".']})
+
+    def _get_sparse_params(self):
+        """Return the `fields` and `expand` serializer arguments asked for
+        on the read actions"""
+        if self.action not in ('list', 'retrieve'):
+            return {}
+
+        serializer_class = self.get_serializer_class()
+        params = {}
+        for param, known in (
+            ('fields', serializer_class.Meta.fields),
+            ('expand', serializer_class.expandable_fields),
+        ):
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+
+            names = [name for name in value.split(',') if name]
+            unknown = [name for name in names if name not in known]
+            if unknown:
+                raise ValidationError({param: [
+                    f'Unknown field "{name}".' for name in unknown
+                ]})
+
+            params[param] = names
+
+        return params
+
+    def _get_prefetches(self, fields, expand):
+        """Return the related objects to prefetch for the current action"""
+        if self.action in ('upload_image', 'export'):
+            return ()
+
+        prefetches = []
+        for name, model in (('tags', Tag), ('ingredients', Ingredient)):
+            if name not in fields:
+                continue
+
+            # nested objects need names, everything else only needs ids,
+            # in the same order as the lists built by recipe.rows
+            if self.action == 'retrieve' or name in expand:
+                only = ('id', 'name')
+            else:
+                only = ('id', )
+
+            prefetches.append(Prefetch(
+                name,
+                queryset=model.objects.only(*only).order_by('id')
+            ))
+
+        return prefetches
+
     def get_queryset(self):
         """Retrieve the recipes for the authenticated user"""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
+        text = self.request.query_params.get('q')
         queryset = self.queryset
 
+        if text:
+            queryset = search.search_recipes(
+                queryset,
+                text,
+                self.request.user
+            )
+
         if tags:
-            tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = self._filter_by_related(
+                queryset,
+                'tags',
+                Recipe.tags.through,
+                'tag_id'
+            )
 
-        if ingredients:
-            ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+        # the cookable recipes are filtered by their coverage instead
+        if ingredients and self.action != 'cookable':
+            queryset = self._filter_by_related(
+                queryset,
+                'ingredients',
+                Recipe.ingredients.through,
+                'ingredient_id'
+            )
+
+        sparse = self._get_sparse_params()
+        fields = sparse.get('fields', self.serializer_class.Meta.fields)
+        queryset = queryset.filter(user=self.request.user).order_by('-id')
+
+        if 'fields' in sparse:
+            queryset = queryset.only('id', *(
+                name for name in fields
+                if name not in ('tags', 'ingredients')
+            ))
+        else:
+            queryset = queryset.defer('search_vector')
+
+        return queryset.prefetch_related(
+            *self._get_prefetches(fields, sparse.get('expand', ()))
+        )
 
-        return queryset.filter(user=self.request.user)
+    def get_serializer(self, *args, **kwargs):
+        """Return the serializer, trimmed and expanded as asked for"""
+        kwargs.update(self._get_sparse_params())
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """Return appropriate serializer class"""
@@ -108,6 +250,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload an image for a Recipe"""
+        request.upload_handlers = [BoundedImageUploadHandler(request)]
         recipe = self.get_object()
         serializer = self.get_serializer(
             recipe,
@@ -115,7 +258,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
         if serializer.is_valid():
-            serializer.save()
+            replaced = list(recipe.image_variants.values())
+            recipe = serializer.save(image_variants={})
+            images.schedule_variants(recipe, replaced)
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
@@ -124,3 +269,122 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    @action(methods=['GET'], detail=False)
+    def export(self, request):
+        """Stream every recipe of the user, filtered like the list, as
+        NDJSON or CSV (`output`), gzipped with `gzip=true`"""
+        output = request.query_params.get('output', 'ndjson')
+        if output not in export.FORMATS:
+            raise ValidationError({'output': [
+                f'Must be one of {", ".join(export.FORMATS)}.'
+            ]})
+        content_type, write_lines = export.FORMATS[output]
+        filename = f'recipes.{output}'
+
+        # the rows are read while the response streams, after the request
+        # is handled, the database has to be picked now
+        queryset = self.filter_queryset(self.get_queryset()).using(
+            router.db_for_read(Recipe)
+        )
+        content = export.blocks(write_lines(export.export_rows(
+            queryset,
+            settings.RECIPE_EXPORT_CHUNK_SIZE
+        )))
+        if boolean_param(request, 'gzip', False):
+            content = export.gzip_blocks(content)
+            content_type = 'application/gzip'
+            filename += '.gz'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = \
+            f'attachment; filename="{filename}"'
+        return response
+
+    @action(methods=['POST'], detail=False, url_path='import')
+    def import_recipes(self, request):
+        """Create recipes from an uploaded NDJSON or CSV `file`, like the
+        export writes them, and report the rows that failed"""
+        upload = (
+            request.data.get('file')
+            if isinstance(request.data, dict) else None
+        )
+        if not isinstance(upload, UploadedFile):
+            raise ValidationError({'file': ['No file was submitted.']})
+
+        input_format = request.query_params.get(
+            'input',
+            importer.guess_format(upload.name)
+        )
+        if input_format not in importer.FORMATS:
+            raise ValidationError({'input': [
+                f'Must be one of {", ".join(importer.FORMATS)}.'
+            ]})
+
+        errors = []
+
+        def on_error(line, row, row_errors):
+            if len(errors) < settings.RECIPE_IMPORT_MAX_ERRORS:
+                errors.append({'line': line, 'errors': row_errors})
+
+        try:
+            created, failed = importer.import_recipes(
+                request.user,
+                importer.PARSERS[input_format](
+                    importer.open_lines(upload, upload.name)
+                ),
+                settings.RECIPE_IMPORT_CHUNK_SIZE,
+                on_error=on_error
+            )
+        except importer.UnreadableFile as exc:
+            # the chunks read before are saved, tell how many
+            return Response(
+                {
+                    'created': exc.created,
+                    'failed': exc.failed,
+                    'errors': errors,
+                    'file': [str(exc)],
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            {'created': created, 'failed': failed, 'errors': errors},
+            status=(
+                status.HTTP_201_CREATED if created
+                else status.HTTP_400_BAD_REQUEST
+            )
+        )
+
+    @action(methods=['GET'], detail=False)
+    def cookable(self, request):
+        """List the recipes using any of the `ingredients` the user has,
+        the fully covered first, then by fewest missing ingredients"""
+        try:
+            ingredient_ids = set(self._params_to_ints(
+                request.query_params.get('ingredients', '')
+            ))
+        except ValueError:
+            raise ValidationError({'ingredients': [
+                'Must be a comma separated list of ids.'
+            ]})
+
+        queryset = coverage.rank_by_coverage(
+            self.filter_queryset(self.get_queryset()),
+            ingredient_ids
+        )
+        rows = RowSerializer(self.get_serializer())
+        ordering = self.paginator.get_ordering(request, queryset, self)
+        page = self.paginate_queryset(rows.values(
+            queryset,
+            *(name.lstrip('-') for name in ordering)
+        ))
+
+        # the representations may be shared with the cache, copy them
+        with measure('serialize'):
+            data = [
+                {**item, 'matched': row['matched'], 'missing': row['missing']}
+                for item, row in zip(rows.to_representation(page), page)
+            ]
+
+        return self.get_paginated_response(data)
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core import caching
+
+
+def get_token_cache():
+    """Return the cache holding the resolved tokens, None unless it is
+    shared by the processes: a revoked token would stay valid in those
+    that didn't handle the revocation"""
+    return caching.shared_cache(settings.TOKEN_AUTH_CACHE)
+
+
+def token_cache_key(key):
+    """Return the cache key of an auth token"""
+    return f'auth-token:{key}'
+
+
+def invalidate_token(key):
+    """Drop a token from the cache"""
+    cache = get_token_cache()
+    if cache is not None:
+        cache.delete(token_cache_key(key))
+
+
+def token_entry(token):
+    """Return what is cached of a resolved token, its user without the
+    password hash"""
+    user = token.user
+    return {
+        'created': token.created,
+        'user': {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.attname != 'password'
+        },
+    }
+
+
+def token_from_entry(key, entry):
+    """Rebuild a token and its user from a cache entry, the password is
+    deferred and only loaded if something reads it"""
+    user_model = get_user_model()
+    user = user_model.from_db(
+        router.db_for_write(user_model),
+        list(entry['user']),
+        list(entry['user'].values())
+    )
+    token = Token(key=key, user_id=user.pk, created=entry['created'])
+    token.user = user
+
+    return token
+
+
+def invalidate_user_tokens(user_id):
+    """Drop every token of a user from the cache"""
+    cache = get_token_cache()
+    if cache is None:
+        return
+
+    keys = Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    cache.delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication caching the token to user resolution.
+
+    Entries live for TOKEN_AUTH_CACHE_TTL seconds and are dropped as soon
+    as the token is deleted or its user is saved or deleted (see
+    users.signals). They never hold the password hash. Without a shared
+    TOKEN_AUTH_CACHE every request reads the token.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        if cache is None:
+            return super().authenticate_credentials(key)
+
+        cache_key = token_cache_key(key)
+        entry = cache.get(cache_key)
+
+        if entry is None:
+            # invalid tokens and inactive users raise, so never get cached
+            user, token = super().authenticate_credentials(key)
+            cache.set(
+                cache_key,
+                token_entry(token),
+                settings.TOKEN_AUTH_CACHE_TTL
+            )
+        else:
+            token = token_from_entry(key, entry)
+
+        return (token.user, token)
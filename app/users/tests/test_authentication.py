@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import caching
+from core.tests.utils import SHARED_CACHES
+from users.authentication import get_token_cache, token_cache_key
+
+SELF_URL = reverse('users:self')
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class CachedTokenAuthenticationTests(TestCase):
+    """Test the cached token authentication backend"""
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@test.com',
+            password='some_random_pass',
+            name='test_name'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_resolution_cached(self):
+        """Test the token is only looked up on the first request"""
+        self.client.get(SELF_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(SELF_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], self.user.email)
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token is still rejected"""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        response = self.client.get(SELF_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_invalidated(self):
+        """Test a deleted token stops authenticating"""
+        self.client.get(SELF_URL)
+        self.token.delete()
+
+        response = self.client.get(SELF_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_invalidated(self):
+        """Test a deactivated user stops authenticating"""
+        self.client.get(SELF_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(SELF_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_invalidated(self):
+        """Test a profile update is visible on the next request"""
+        self.client.get(SELF_URL)
+        self.client.patch(SELF_URL, {'name': 'new_name'})
+
+        response = self.client.get(SELF_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'new_name')
+
+    def test_password_hash_not_cached(self):
+        """Test the cache never holds the password hash, which is only
+        loaded when needed"""
+        self.client.get(SELF_URL)
+
+        entry = get_token_cache().get(token_cache_key(self.token.key))
+        self.assertNotIn('password', entry['user'])
+        self.assertNotIn(self.user.password, repr(entry))
+
+        response = self.client.patch(SELF_URL, {'password': 'new_password'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new_password'))
+        self.assertEqual(self.user.name, 'test_name')
+
+    def test_deleted_user_invalidated(self):
+        """Test a deleted user stops authenticating"""
+        self.client.get(SELF_URL)
+        self.user.delete()
+
+        response = self.client.get(SELF_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_process_cache_not_used(self):
+        """Test tokens are read on every request with a cache the other
+        processes don't see, they couldn't be revoked there"""
+        with self.settings(CACHES={'default': {
+            'BACKEND': caching.PROCESS_CACHES[0],
+        }}):
+            self.assertIsNone(get_token_cache())
+            self.client.get(SELF_URL)
+
+            with self.assertNumQueries(1):
+                response = self.client.get(SELF_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -1,6 +1,7 @@
-from rest_framework import generics, permissions, authentication
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
+from users.authentication import CachedTokenAuthentication
 from users.serializers import UserSerializer, AuthTokenSerializer
 
 
@@ -18,7 +19,7 @@ class CreateTokenView(ObtainAuthToken):
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication, )
+    authentication_classes = (CachedTokenAuthentication, )
     permission_classes = (permissions.IsAuthenticated, )
 
     def get_object(self):